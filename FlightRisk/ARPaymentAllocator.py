@@ -1,6 +1,5 @@
 import sys
 import os
-import requests
 import json
 import logging
 import csv
@@ -9,6 +8,7 @@ from datetime import datetime
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroBatchWriter import createPayments
 
 def log_payment_to_csv(invoice_number, invoice_date, amount_paid, payment_date):
     file_path = os.path.join(os.path.dirname(__file__), "payment_allocations.csv")
@@ -69,15 +69,7 @@ def main():
 
     print(f"Found {len(target_invoices)} pending FRC# invoices.")
 
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-tenant-id": xeroTenantId,
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-
-    url = "https://api.xero.com/api.xro/2.0/Payments"
-
+    pending = []
     for inv in target_invoices:
         invoice_number = inv.get("InvoiceNumber")
         amount_due = inv.get("AmountDue")
@@ -97,33 +89,33 @@ def main():
         print(f"  Amount Due: {amount_due}")
         print(f"  Payment Date: {payment_date}")
         
-        payment_payload = {
-            "Payments": [
-                {
-                    "Invoice": {
-                        "InvoiceID": invoice_id
-                    },
-                    "Account": {
-                        "Code": "4002"
-                    },
-                    "Date": payment_date,
-                    "Amount": amount_due,
-                    "Reference": "" 
-                }
-            ]
+        payment = {
+            "Invoice": {
+                "InvoiceID": invoice_id
+            },
+            "Account": {
+                "Code": "4002"
+            },
+            "Date": payment_date,
+            "Amount": amount_due,
+            "Reference": "" 
         }
+        pending.append((invoice_number, amount_due, payment_date, payment))
 
-        try:
-            response = requests.put(url, headers=headers, json=payment_payload)
-            
-            if response.status_code in [200, 201]:
-                print(f"  [SUCCESS] Payment allocated for {invoice_number}")
-                log_payment_to_csv(invoice_number, payment_date, amount_due, payment_date)
-            else:
-                print(f"  [FAILED] Could not allocate payment: {response.status_code}")
-                print(f"  Response: {response.text}")
-        except Exception as e:
-             print(f"  [ERROR] Exception occurred: {e}")
+    # Payments go up in batches of 50; only the ones Xero rejects are retried
+    print(f"\nAllocating {len(pending)} payment(s)...")
+    try:
+        results = createPayments(accessToken, xeroTenantId, [payment for _, _, _, payment in pending])
+    except Exception as e:
+        print(f"  [ERROR] Exception occurred: {e}")
+        return
+
+    for (invoice_number, amount_due, payment_date, _), result in zip(pending, results):
+        if result["ok"]:
+            print(f"  [SUCCESS] Payment allocated for {invoice_number}")
+            log_payment_to_csv(invoice_number, payment_date, amount_due, payment_date)
+        else:
+            print(f"  [FAILED] Could not allocate payment for {invoice_number}: {result['error']}")
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,19 @@
 import sys
 import os
-import requests
 import logging
 import csv
 import argparse
-import time
 import pandas as pd
 from datetime import datetime, timezone
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroBatchWriter import createPayments
 from helpers.emailAttachment import sendEmail
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 PREPAYMENT_ACCOUNT_CODE = "2010"
-PAYMENT_URL = "https://api.xero.com/api.xro/2.0/Payments"
 CLIENT = "FLIGHT_RISK"
 
 
@@ -220,17 +218,11 @@ def main():
     }
     logging.info(f"Fetched {len(invoices_map)} ACCREC invoices.")
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Xero-tenant-id": xero_tenant_id,
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
     # 3. Process rows
     rows_to_process = df.iloc[: args.limit] if args.limit else df
     allocated_rows = []
     unapplied_rows = []
+    payments = []
 
     for index, row in rows_to_process.iterrows():
         row_num = index + 2
@@ -281,29 +273,32 @@ def main():
         payment_date = date_str.split("T")[0]
         logging.info(f"Row {row_num}: Allocating ${prepayment_amount:,.2f} to {sales_order} (payment date: {payment_date})")
 
+        payments.append((sales_order, prepayment_amount, payment_date, {
+            "Invoice": {"InvoiceID": invoice_id},
+            "Account": {"Code": PREPAYMENT_ACCOUNT_CODE},
+            "Date": payment_date,
+            "Amount": prepayment_amount,
+            "Reference": f"{sales_order} {payment_date}",
+        }))
+
+    # Allocate in batches of 50; per-payment results, only rejected payments are retried
+    if dry_run:
+        results = [{"ok": True} for _ in payments]
+    else:
+        logging.info(f"Allocating {len(payments)} payment(s) in Xero...")
+        try:
+            results = createPayments(access_token, xero_tenant_id, [payment for _, _, _, payment in payments])
+        except Exception as e:
+            logging.error(f"  [ERROR] Payment batch failed: {e}")
+            results = [{"ok": False, "error": f"Exception: {e}"} for _ in payments]
+
+    for (sales_order, prepayment_amount, payment_date, _), result in zip(payments, results):
+        if not result["ok"]:
+            logging.error(f"  [FAILED] {sales_order} — {result['error']}")
+            unapplied_rows.append((sales_order, prepayment_amount, f"API error: {result['error']}"))
+            continue
         if not dry_run:
-            payload = {
-                "Payments": [{
-                    "Invoice": {"InvoiceID": invoice_id},
-                    "Account": {"Code": PREPAYMENT_ACCOUNT_CODE},
-                    "Date": payment_date,
-                    "Amount": prepayment_amount,
-                    "Reference": f"{sales_order} {payment_date}",
-                }]
-            }
-            try:
-                response = requests.put(PAYMENT_URL, headers=headers, json=payload)
-                if response.status_code in [200, 201]:
-                    logging.info(f"  [SUCCESS] Payment allocated for {sales_order}")
-                else:
-                    logging.error(f"  [FAILED] {sales_order} — HTTP {response.status_code}: {response.text}")
-                    unapplied_rows.append((sales_order, prepayment_amount, f"API error {response.status_code}"))
-                    continue
-            except Exception as e:
-                logging.error(f"  [ERROR] {sales_order}: {e}")
-                unapplied_rows.append((sales_order, prepayment_amount, f"Exception: {e}"))
-                continue
-            time.sleep(1.1)
+            logging.info(f"  [SUCCESS] Payment allocated for {sales_order}")
 
         status = "DRY_RUN" if dry_run else "ALLOCATED"
         allocated_rows.append((sales_order, payment_date, prepayment_amount, payment_date, status))
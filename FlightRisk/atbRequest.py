@@ -12,7 +12,8 @@ except ImportError:
     pass
 
 from atbAnalysis import processAtbData, exportAtbData
-from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.fetchXeroInvoices import iter_invoices
+from helpers.xeroClient import XeroClient
 
 
 def main():
@@ -24,9 +25,9 @@ def main():
     )
     args = parser.parse_args()
 
-    invoices, _, _ = fetchInvoicesForClient("FLIGHT_RISK", "AUTHORISED")
-    if not isinstance(invoices, list):
-        raise Exception(f"Expected a list of invoices but got {type(invoices)}")
+    # Stream pages straight into the row builder rather than collecting every invoice first
+    client = XeroClient.forClient("FLIGHT_RISK")
+    invoices = iter_invoices(client, "AUTHORISED", where='Type=="ACCREC"')
 
     if args.local:
         exportAtbData(invoices)
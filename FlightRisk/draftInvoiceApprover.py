@@ -1,5 +1,4 @@
 import sys
-import time
 import logging
 import os
 import re
@@ -12,51 +11,38 @@ from datetime import datetime, timezone
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroClient import XeroClient
+from helpers.xeroBatchWriter import updateInvoices, createPayments
 
 
-def xeroAPIUpdateBill(invoice, accessToken, xeroTenantId):
-    url = f"https://api.xero.com/api.xro/2.0/Invoices/{invoice.get('InvoiceID')}"
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-tenant-id": xeroTenantId,
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
+UPDATE_FIELDS = [
+    "Type", "Date", "DueDate", "Status", "LineItems", "InvoiceNumber", "CurrencyRate",
+]
 
-    update_fields = [
-        "Type", "Date", "DueDate", "Status", "LineItems", "InvoiceNumber", "CurrencyRate",
-    ]
 
-    payload = {k: v for k, v in invoice.items() if k in update_fields and v is not None}
+def invoiceUpdatePayload(invoice):
+    payload = {k: v for k, v in invoice.items() if k in UPDATE_FIELDS and v is not None}
+    payload["InvoiceID"] = invoice.get("InvoiceID")
+    return payload
 
-    max_retries = 5
-    for attempt in range(max_retries):
-        response = requests.post(url, headers=headers, json=payload)
 
-        if response.status_code in [200, 201]:        
-            return response.json()
-        elif response.status_code == 429:
-            retry_after = response.headers.get("Retry-After")
-            if retry_after:
-                wait_time = int(retry_after) + 1
-            else:
-                wait_time = 10 * (attempt + 1)
-            
-            print(f"Hit rate limit (429). Waiting {wait_time}s before retry ({attempt+1}/{max_retries})...")
-            time.sleep(wait_time)
-            continue
-        else:
-            print("Failed to update invoice:", response.status_code, response.text)
-            return None
+def xeroAPIUpdateBills(invoices, accessToken, xeroTenantId):
+    """Update invoices/bills in batches of up to 50. Returns one result per invoice, in order
+    ({"ok", "record", "error"}); only the failed ones are retried."""
+    results = updateInvoices(accessToken, xeroTenantId, [invoiceUpdatePayload(inv) for inv in invoices])
+    for invoice, result in zip(invoices, results):
+        if not result["ok"]:
+            print(f"Failed to update invoice {invoice.get('InvoiceNumber', invoice.get('InvoiceID'))}: {result['error']}")
+    return results
 
-    print(f"Failed to update invoice after {max_retries} attempts.")
-    return None
 
+def xeroAPIUpdateBill(invoice, accessToken, xeroTenantId):
+    result = xeroAPIUpdateBills([invoice], accessToken, xeroTenantId)[0]
+    return {"Invoices": [result["record"]]} if result["ok"] else None
 
-def approveInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
+
+def prepareInvoiceAndBills(inv, related_bills):
     inv["Status"] = "AUTHORISED"
-    inv_number = inv.get("InvoiceNumber", "Unknown")
-    results = []
 
     total_adjustment = 0.0
     rounding_line = None
@@ -119,57 +105,72 @@ def approveInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
     for bill in related_bills:
         for line in bill.get("LineItems", []): line.pop("TaxAmount", None)
 
-    print(f"Approving Invoice...")
-
-    invoiceResponse = xeroAPIUpdateBill(inv, accessToken, xeroTenantId)
-    if invoiceResponse:
-        updated_invoice = invoiceResponse.get("Invoices", [{}])[0]
-        pre_total = inv.get("Total")
-        post_total = updated_invoice.get("Total")
-        print(f"  [✓] Invoice Approved. Total: {pre_total} -> {post_total}")
-        results.append((inv_number, "Invoice", "✅ Approved"))
-
-        for i, bill in enumerate(related_bills, 1):
-            bill_num = bill.get('InvoiceNumber', 'No Invoice Number')
-            print(f"  > Processing Bill {i}/{len(related_bills)}: {bill_num}")
-
-            bill["Status"] = "AUTHORISED"
-            for line in bill.get("LineItems", []): line["TaxType"] = "BASEXCLUDED"
-            invoiceDate = inv.get("Date", None)
-            if invoiceDate:
-                bill["Date"] = invoiceDate
-                bill["DueDate"] = invoiceDate
-
-            billResponse = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-            if billResponse:
-                print(f"    [✓] Bill Approved")
-                results.append((bill_num, "Bill", "✅ Approved"))
-            else:
-                print(f"    [X] Bill Approval Failed")
-                results.append((bill_num, "Bill", "❌ Failed"))
-    else:
-        print(f"  [X] Invoice Approval Failed. Related bills will not be approved.")
-        results.append((inv_number, "Invoice", "❌ Failed"))
+        # Bills are only sent once their invoice has been approved
+        bill["Status"] = "AUTHORISED"
+        for line in bill.get("LineItems", []): line["TaxType"] = "BASEXCLUDED"
+        invoiceDate = inv.get("Date", None)
+        if invoiceDate:
+            bill["Date"] = invoiceDate
+            bill["DueDate"] = invoiceDate
+
+
+def approveInvoicesAndBills(approvals, accessToken, xeroTenantId):
+    """Approve (invoice, related_bills) pairs: every invoice in one batched call, then the
+    bills of the invoices that were approved in another. Bills of a failed invoice are not sent."""
+    for inv, related_bills in approvals:
+        prepareInvoiceAndBills(inv, related_bills)
+
+    print(f"Approving {len(approvals)} invoice(s)...")
+    invoice_results = xeroAPIUpdateBills([inv for inv, _ in approvals], accessToken, xeroTenantId)
+
+    approved_bills = [
+        bill
+        for (_, related_bills), result in zip(approvals, invoice_results) if result["ok"]
+        for bill in related_bills
+    ]
+    if approved_bills:
+        print(f"Approving {len(approved_bills)} related bill(s)...")
+    bill_results = iter(xeroAPIUpdateBills(approved_bills, accessToken, xeroTenantId))
+
+    results = []
+    for (inv, related_bills), invoice_result in zip(approvals, invoice_results):
+        inv_number = inv.get("InvoiceNumber", "Unknown")
+        if invoice_result["ok"]:
+            pre_total = inv.get("Total")
+            post_total = invoice_result["record"].get("Total")
+            print(f"  [✓] Invoice {inv_number} Approved. Total: {pre_total} -> {post_total}")
+            results.append((inv_number, "Invoice", "✅ Approved"))
+
+            for bill in related_bills:
+                bill_num = bill.get('InvoiceNumber', 'No Invoice Number')
+                if next(bill_results)["ok"]:
+                    print(f"    [✓] Bill {bill_num} Approved")
+                    results.append((bill_num, "Bill", "✅ Approved"))
+                else:
+                    print(f"    [X] Bill {bill_num} Approval Failed")
+                    results.append((bill_num, "Bill", "❌ Failed"))
+        else:
+            print(f"  [X] Invoice {inv_number} Approval Failed. Related bills will not be approved.")
+            results.append((inv_number, "Invoice", "❌ Failed"))
 
     return results
 
 
+def approveInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
+    return approveInvoicesAndBills([(inv, related_bills)], accessToken, xeroTenantId)
+
+
 MINOR_ADJUSTMENTS_ACCOUNT = "2105"
 WRITE_OFF_THRESHOLD = 1.00
 
 
 def fetchAuthorisedACCRECInvoices(accessToken, xeroTenantId):
-    url = "https://api.xero.com/api.xro/2.0/Invoices"
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-tenant-id": xeroTenantId,
-        "Accept": "application/json",
-    }
+    client = XeroClient(accessToken, xeroTenantId)
     all_invoices = []
     page = 1
     while True:
         params = {"Type": "ACCREC", "Statuses": "AUTHORISED", "page": page}
-        response = requests.get(url, headers=headers, params=params)
+        response = client.get("Invoices", params=params)
         if response.status_code != 200:
             print(f"Failed to fetch authorised invoices (page {page}): {response.status_code} {response.text}")
             break
@@ -178,51 +179,48 @@ def fetchAuthorisedACCRECInvoices(accessToken, xeroTenantId):
         if len(batch) < 100:
             break
         page += 1
-        time.sleep(0.5)
     return all_invoices
 
 
-def createPayment(invoice_id, amount, account_code, date, accessToken, xeroTenantId):
-    url = "https://api.xero.com/api.xro/2.0/Payments"
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-tenant-id": xeroTenantId,
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-    payload = {
+def paymentPayload(invoice_id, amount, account_code, date):
+    return {
         "Invoice": {"InvoiceID": invoice_id},
         "Account": {"Code": account_code},
         "Amount": round(float(amount), 2),
         "Date": date,
     }
-    response = requests.post(url, headers=headers, json=payload)
-    if response.status_code in [200, 201]:
-        return response.json()
-    print(f"Failed to create payment: {response.status_code} {response.text}")
+
+
+def createPayment(invoice_id, amount, account_code, date, accessToken, xeroTenantId):
+    result = createPayments(accessToken, xeroTenantId, [paymentPayload(invoice_id, amount, account_code, date)])[0]
+    if result["ok"]:
+        return {"Payments": [result["record"]]}
+    print(f"Failed to create payment: {result['error']}")
     return None
 
 
 def processSmallBalanceWriteOffs(invoices, accessToken, xeroTenantId):
-    results = []
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     print(f"  Total authorised invoices fetched: {len(invoices)}")
+    write_offs = []
     for invoice in invoices:
         amount_due = round(float(invoice.get("AmountDue", 0)), 2)
         if not (0 < amount_due < WRITE_OFF_THRESHOLD):
             continue
         inv_number = invoice.get("InvoiceNumber", "Unknown")
-        invoice_id = invoice.get("InvoiceID")
-        time.sleep(1)
         print(f"Writing off ${amount_due} on {inv_number} → account {MINOR_ADJUSTMENTS_ACCOUNT}")
-        response = createPayment(invoice_id, amount_due, MINOR_ADJUSTMENTS_ACCOUNT, today, accessToken, xeroTenantId)
-        if response:
-            print(f"  [✓] Write-off successful")
+        write_offs.append((inv_number, amount_due, paymentPayload(invoice.get("InvoiceID"), amount_due, MINOR_ADJUSTMENTS_ACCOUNT, today)))
+
+    results = []
+    payment_results = createPayments(accessToken, xeroTenantId, [payment for _, _, payment in write_offs])
+    for (inv_number, amount_due, _), result in zip(write_offs, payment_results):
+        if result["ok"]:
+            print(f"  [✓] Write-off successful: {inv_number}")
             results.append((inv_number, f"${amount_due:.2f}", "✅ Written off"))
         else:
-            print(f"  [X] Write-off failed")
+            print(f"  [X] Write-off failed: {inv_number} ({result['error']})")
             results.append((inv_number, f"${amount_due:.2f}", "❌ Failed"))
-        print("--------------------------------------------------")
+    print("--------------------------------------------------")
     return results
 
 
@@ -305,6 +303,7 @@ def processPOBills(bills, accessToken, xeroTenantId, unleashedApiId, unleashedAp
     pattern = re.compile(r"^(PO-(\d{8})(\/\d+)?)( - .+)?$")
     print(f"processPOBills: checking {len(bills)} bill(s) for PO pattern.")
     results = []
+    matched = []
 
     for bill in bills:
         inv_number = bill.get("InvoiceNumber", "")
@@ -355,22 +354,39 @@ def processPOBills(bills, accessToken, xeroTenantId, unleashedApiId, unleashedAp
                     line["LineAmount"] = expected
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Saving PO bill: {inv_number} → {short_po}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
+        matched.append((bill, inv_number, short_po))
+
+    po_results = xeroAPIUpdateBills([bill for bill, _, _ in matched], accessToken, xeroTenantId)
+    for (_, inv_number, short_po), result in zip(matched, po_results):
+        if result["ok"]:
             print(f"PO bill {short_po} saved successfully.")
             results.append((inv_number, short_po, "✅ Saved"))
         else:
             print(f"PO bill {short_po} save failed.")
             results.append((inv_number, short_po, "❌ Failed"))
-        print("--------------------------------------------------")
+    print("--------------------------------------------------")
+    return results
+
+
+def approveJournals(journals, label, accessToken, xeroTenantId):
+    """Send the prepared journals in batches and report each one."""
+    results = []
+    for bill, result in zip(journals, xeroAPIUpdateBills(journals, accessToken, xeroTenantId)):
+        inv_number = bill.get("InvoiceNumber", "")
+        if result["ok"]:
+            print(f"{label} {inv_number} approved successfully.")
+            results.append((inv_number, "✅ Approved"))
+        else:
+            print(f"{label} {inv_number} approval failed.")
+            results.append((inv_number, "❌ Failed"))
+    print("--------------------------------------------------")
     return results
 
 
 def processStockAdjustmentJournals(bills, accessToken, xeroTenantId):
     """Stock Adjustment Journals (Journal-SA-*): set BAS Excluded + account 5500, approve."""
-    results = []
+    matched = []
     for bill in bills:
         if bill.get("Contact", {}).get("Name", "") != "Stock Journal":
             continue
@@ -385,22 +401,15 @@ def processStockAdjustmentJournals(bills, accessToken, xeroTenantId):
                 line["AccountCode"] = "5500"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving stock adjustment journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Stock adjustment journal {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"Stock adjustment journal {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return approveJournals(matched, "Stock adjustment journal", accessToken, xeroTenantId)
 
 
 def processCNJournals(bills, accessToken, xeroTenantId):
     """Credit Note Journals (Journal-CN-*): set BAS Excluded, approve."""
-    results = []
+    matched = []
     for bill in bills:
         inv_number = bill.get("InvoiceNumber", "")
         if not inv_number.startswith("Journal-CN-"):
@@ -411,22 +420,15 @@ def processCNJournals(bills, accessToken, xeroTenantId):
             line["TaxType"] = "BASEXCLUDED"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving CN journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"CN journal {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"CN journal {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return approveJournals(matched, "CN journal", accessToken, xeroTenantId)
 
 
 def processRecostJournals(bills, accessToken, xeroTenantId):
     """Recost Journals (Journal - PO-*[ReCost]): set BAS Excluded + account 5020, approve."""
-    results = []
+    matched = []
     for bill in bills:
         if bill.get("Contact", {}).get("Name", "") != "Stock Journal":
             continue
@@ -441,17 +443,10 @@ def processRecostJournals(bills, accessToken, xeroTenantId):
                 line["AccountCode"] = "5020"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving recost journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Recost journal {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"Recost journal {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return approveJournals(matched, "Recost journal", accessToken, xeroTenantId)
 
 
 def write_github_summary(invoice_results, sa_results, cn_results, recost_results, po_results, writeoff_results):
@@ -529,10 +524,10 @@ def main():
     unleashed_api_key = os.getenv("FLIGHT_RISK_API_KEY")
 
     invoice_results = []
+    approvals = []
 
     print("--------------------------------------------------")
     for invoice in draftInvoices:
-        time.sleep(1)
         invNumber = invoice.get("InvoiceNumber", "No Invoice Number")
         base_inv_number = invNumber.split('/')[0]
         search_term = None
@@ -600,7 +595,7 @@ def main():
                 invoice["DueDate"] = completed_date
                 print(f"Date set to Unleashed completed date: {completed_date}")
 
-            invoice_results.extend(approveInvoiceAndBills(invoice, related_bills, accessToken, xeroTenantId))
+            approvals.append((invoice, related_bills))
         else:
             print(f"No matching bills found for search term: {search_term}")
             if base_inv_number.startswith("FRC#"):
@@ -624,11 +619,15 @@ def main():
                         line["TaxType"] = "BASEXCLUDED"
 
                 print(f"Unleashed: {base_inv_number} is completed. Approving invoice (no bills).")
-                invoice_results.extend(approveInvoiceAndBills(invoice, [], accessToken, xeroTenantId))
+                approvals.append((invoice, []))
             else:
                 print("ACTION: SKIPPING")
                 invoice_results.append((invNumber, "Invoice", "⚠️ Skipped (no matching bills)"))
 
+    if approvals:
+        print(f"\n{'='*60}")
+        invoice_results.extend(approveInvoicesAndBills(approvals, accessToken, xeroTenantId))
+
     sa_results = processStockAdjustmentJournals(draftBills, accessToken, xeroTenantId)
     cn_results = processCNJournals(draftBills, accessToken, xeroTenantId)
     recost_results = processRecostJournals(draftBills, accessToken, xeroTenantId)
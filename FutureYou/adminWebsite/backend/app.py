@@ -2,7 +2,6 @@ import sys
 import os
 import tempfile
 import importlib.util
-import time as _time
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 from functools import wraps
@@ -12,8 +11,7 @@ import pytz
 from flask import Flask, jsonify, request, send_file, after_this_request
 from flask_cors import CORS
 from dotenv import load_dotenv
-from google.cloud import bigquery, firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud import bigquery
 from werkzeug.security import generate_password_hash, check_password_hash
 
 load_dotenv()
@@ -31,9 +29,12 @@ for p in [REPO_ROOT, FUTUREYOU_DIR, TALENT_MAP_DIR]:
 app = Flask(__name__)
 CORS(app)
 
-# ── Legends in-memory cache (keyed by fy) ─────────────────────────────────────
-_legends_cache: dict = {}
-_LEGENDS_CACHE_TTL = 3600  # 1 hour
+# ── Read-side query cache (TTL + LRU, keyed by endpoint + params) ────────────
+from helpers.queryCache import QueryCache, SliceVersions
+
+fc_cache = QueryCache(ttl=300)  # forecasts/targets — keyed on fc_versions, so uploads invalidate every instance
+_LEGENDS_CACHE_TTL  = 3600      # 1 hour
+_INVOICES_CACHE_TTL = 600       # revenue only changes when the invoice ETL runs
 
 # ── Forecasting — FutureYou GCP project ──────────────────────────────────────
 FORECAST_PROJECT_ID = "futureyou-458212"
@@ -43,28 +44,61 @@ AEST = pytz.timezone("Australia/Sydney")
 FIRESTORE_KEY_PATH = os.getenv("FUTUREYOU_FIRESTOREACCESS")
 BQACCESS_KEY_PATH  = os.getenv("FUTUREYOU_BQACCESS")
 
-if FIRESTORE_KEY_PATH and os.path.exists(FIRESTORE_KEY_PATH):
-    forecast_db = firestore.Client.from_service_account_json(
-        FIRESTORE_KEY_PATH, project=FORECAST_PROJECT_ID, database="futureyou"
-    )
-else:
-    forecast_db = firestore.Client(project=FORECAST_PROJECT_ID, database="futureyou")
-
-if BQACCESS_KEY_PATH and os.path.exists(BQACCESS_KEY_PATH):
-    from google.oauth2 import service_account as _sa
-    _creds = _sa.Credentials.from_service_account_file(
-        BQACCESS_KEY_PATH, scopes=["https://www.googleapis.com/auth/bigquery"]
-    )
-    forecast_bq = bigquery.Client(credentials=_creds, project=FORECAST_PROJECT_ID)
-else:
-    forecast_bq = bigquery.Client(project=FORECAST_PROJECT_ID)
+# Built on first use (key file locally, default credentials on Cloud Run) so cold starts don't wait on them
+from helpers.gcpClients import LazyClient, bigQueryClient, firestoreClient
+from helpers.bigQueryCost import QUERY_COSTS
+from helpers.firestoreDirectory import FirestoreDirectory
+
+forecast_db = LazyClient(lambda: firestoreClient(
+    FORECAST_PROJECT_ID, database="futureyou", key_path=FIRESTORE_KEY_PATH, missing_key_ok=True
+))
+fc_versions = SliceVersions(forecast_db)  # forecasts per (fy, month), monthly-targets per fy
+forecast_bq = LazyClient(lambda: bigQueryClient(FORECAST_PROJECT_ID, BQACCESS_KEY_PATH, missing_key_ok=True))
+# users/recruiters/areas held in memory and kept current by Firestore listeners (started on first use)
+fc_directory = LazyClient(lambda: FirestoreDirectory(forecast_db))
+
+@app.after_request
+def _log_query_costs(response):
+    # One "📈 <statement>: bytes, slot-ms, wall" log line per BigQuery job this request ran
+    QUERY_COSTS.settle()
+    return response
+
 
 # BQ table references
 _RF  = f"{FORECAST_PROJECT_ID}.RecruiterForecasts"
-FC_STAGING = f"{_RF}.StagingTable"
 FC_MAIN    = f"{_RF}.RecruiterForecasts"
 FC_REVENUE = f"{FORECAST_PROJECT_ID}.InvoiceData.InvoiceEnquiry"
 FC_TARGETS = f"{_RF}.MonthlyTargets"
+# Rollups kept by the invoice ETL / target uploads (FutureYou/revenueRollups.py)
+FC_TARGETS_CURRENT = f"{_RF}.MonthlyTargetsCurrent"
+FC_MARGIN_ROLLUP   = f"{FORECAST_PROJECT_ID}.InvoiceData.ConsultantMarginRollup"
+
+_fc_current_targets_ready = False
+
+
+def _fc_ensure_current_targets():
+    """
+    Build MonthlyTargetsCurrent from the MonthlyTargets history the first time this process
+    touches it, if the invoice ETL hasn't created it yet (a no-op DDL once it exists).
+    """
+    global _fc_current_targets_ready
+    if not _fc_current_targets_ready:
+        forecast_bq.query(f"""
+            CREATE TABLE IF NOT EXISTS `{FC_TARGETS_CURRENT}` CLUSTER BY FinancialYear AS
+            SELECT FinancialYear, Month, Target, uploadUser, uploadTimestamp, uploadTimeRaw
+            FROM `{FC_TARGETS}`
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY FinancialYear, Month ORDER BY uploadTimeRaw DESC) = 1
+        """).result()
+        _fc_current_targets_ready = True
+
+
+# RecruiterForecasts columns — an upload is passed to its MERGE as one ARRAY<STRUCT> parameter
+FC_FORECAST_COLUMNS = [
+    ("key", "STRING"), ("fy", "STRING"), ("month", "STRING"), ("week", "INT64"),
+    ("range", "STRING"), ("revenue", "INT64"), ("tempRevenue", "INT64"), ("notes", "STRING"),
+    ("name", "STRING"), ("uploadMonth", "STRING"), ("uploadWeek", "INT64"), ("uploadYear", "INT64"),
+    ("uploadTimestamp", "STRING"), ("uploadUser", "STRING"),
+]
 
 
 # ── Forecasting auth helpers ──────────────────────────────────────────────────
@@ -124,8 +158,7 @@ def fc_finance_required(f):
 @fc_admin_required
 def generate_annual_leave():
     try:
-        from xeroAuthHelper import getXeroAccessToken
-        from xeroAuth import XeroTenants
+        from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
         from fetchFYAnnualLeave import (
             fetchEmployeeList,
             fetchAllEmployeeAnnualLeave,
@@ -134,7 +167,7 @@ def generate_annual_leave():
         )
 
         access_token = getXeroAccessToken("FUTUREYOU_RECRUITMENT")
-        tenant_id    = XeroTenants(access_token)
+        tenant_id    = getXeroTenantId("FUTUREYOU_RECRUITMENT", access_token)
         employees    = fetchEmployeeList(access_token, tenant_id)
 
         if not employees:
@@ -229,6 +262,52 @@ def generate_talent_map():
         return jsonify({"error": str(e)}), 500
 
 
+def _run_query(sql, cfg=None):
+    return [dict(r) for r in forecast_bq.query(sql, job_config=cfg).result()]
+
+
+def _invalidate_forecasts(forecasts):
+    """
+    Drop cached forecast reads for every (fy, month, recruiter, uploadWeek) slice an upload
+    wrote, and bump each (fy, month) version so the other instances' copies miss too.
+    """
+    for entry in forecasts:
+        fy, month = entry["fy"], entry["month"]
+        fc_cache.invalidate("forecasts/view", fy=fy, month=month)
+        fc_cache.invalidate("forecasts/weekly", fy=fy, month=month, uploadWeek=entry["uploadWeek"])
+        fc_cache.invalidate("forecasts/recruiter", fy=fy, month=month, name=entry["name"])
+    for fy, month in {(entry["fy"], entry["month"]) for entry in forecasts}:
+        fc_versions.bump("forecasts", fy=fy, month=month)
+
+
+def _fresh_user(username):
+    """
+    (doc_id, fields) of the user as stored in Firestore right now, or None.
+
+    Credentials and user existence are never taken from fc_directory alone: another
+    instance may have changed the password or deleted the user, and this instance's
+    listener can lag (Cloud Run throttles CPU between requests). The directory supplies
+    the doc id for one direct get; a username it doesn't know yet falls back to an
+    indexed query. The fresh document is written back into the directory.
+    """
+    found = fc_directory.userByUsername(username)
+    if found is not None:
+        snapshot = forecast_db.collection("users").document(found[0]).get()
+        if snapshot.exists and (snapshot.to_dict() or {}).get("username") == username:
+            fc_directory.patch("users", snapshot.id, snapshot.to_dict())
+            return snapshot.id, snapshot.to_dict()
+        if not snapshot.exists:
+            fc_directory.patch("users", found[0], delete=True)
+
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    users = forecast_db.collection("users").where(filter=FieldFilter("username", "==", username)).limit(1).stream()
+    snapshot = next(iter(users), None)
+    if snapshot is None:
+        return None
+    fc_directory.patch("users", snapshot.id, snapshot.to_dict())
+    return snapshot.id, snapshot.to_dict()
+
+
 # ── Forecasting endpoints ─────────────────────────────────────────────────────
 
 @app.route("/forecasting/login", methods=["POST"])
@@ -241,12 +320,11 @@ def fc_login():
         return jsonify({"success": False, "error": "Username and password are required."}), 400
 
     try:
-        users    = forecast_db.collection("users").where(filter=FieldFilter("username", "==", username)).limit(1).stream()
-        user_doc = next(users, None)
-        if user_doc is None:
+        found = _fresh_user(username)
+        if found is None:
             return jsonify({"success": False, "error": "Invalid username or password."}), 401
 
-        user           = user_doc.to_dict()
+        user_id, user  = found[0], dict(found[1])
         stored_password = user.get("password", "")
         is_hashed      = stored_password.startswith(("scrypt:", "pbkdf2:"))
 
@@ -257,12 +335,10 @@ def fc_login():
             # Plaintext comparison — auto-hash on match and flag for password change
             if stored_password != password:
                 return jsonify({"success": False, "error": "Invalid username or password."}), 401
-            hashed = generate_password_hash(password)
-            forecast_db.collection("users").document(user_doc.id).update({
-                "password": hashed,
-                "must_change_password": True,
-            })
-            user["must_change_password"] = True
+            changes = {"password": generate_password_hash(password), "must_change_password": True}
+            forecast_db.collection("users").document(user_id).update(changes)
+            fc_directory.patch("users", user_id, changes)
+            user.update(changes)
 
         must_change = user.get("must_change_password", False)
 
@@ -307,12 +383,12 @@ def fc_change_password():
         return jsonify({"success": False, "error": "All fields are required."}), 400
 
     try:
-        users    = forecast_db.collection("users").where(filter=FieldFilter("username", "==", username)).limit(1).stream()
-        user_doc = next(users, None)
-        if user_doc is None:
+        found = _fresh_user(username)
+        if found is None:
             return jsonify({"success": False, "error": "User not found."}), 404
 
-        stored = user_doc.to_dict().get("password", "")
+        user_id, user = found
+        stored = user.get("password", "")
         is_hashed = stored.startswith(("scrypt:", "pbkdf2:"))
 
         if is_hashed:
@@ -322,10 +398,9 @@ def fc_change_password():
             if stored != old_password:
                 return jsonify({"success": False, "error": "Old password is incorrect."}), 403
 
-        forecast_db.collection("users").document(user_doc.id).update({
-            "password": generate_password_hash(new_password),
-            "must_change_password": False,
-        })
+        changes = {"password": generate_password_hash(new_password), "must_change_password": False}
+        forecast_db.collection("users").document(user_id).update(changes)
+        fc_directory.patch("users", user_id, changes)
         return jsonify({"success": True, "message": "Password changed successfully."})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -335,7 +410,6 @@ def fc_change_password():
 @fc_token_required
 def fc_upload_forecasts():
     try:
-        forecast_bq.query(f"TRUNCATE TABLE `{FC_STAGING}`").result()
         data         = request.get_json()
         forecasts    = data.get("forecasts", [])
         recruiter    = forecasts[0]["name"] if forecasts else "Unknown"
@@ -343,20 +417,27 @@ def fc_upload_forecasts():
 
         for entry in forecasts:
             entry["key"]            = f"{entry['fy']}:{entry['month']}:{entry['week']}:{entry['name']}"
+            entry["week"]           = int(entry["week"])
             entry["revenue"]        = int(entry.get("revenue", 0) or 0)
             entry["tempRevenue"]    = int(entry.get("tempRevenue", 0) or 0)
             entry["uploadMonth"]    = entry.get("uploadMonth", "")
             entry["uploadWeek"]     = int(entry.get("uploadWeek", 0) or 0)
-            entry["uploadYear"]     = entry.get("uploadYear", 0) or 0
+            entry["uploadYear"]     = int(entry.get("uploadYear", 0) or 0)
             entry["uploadTimestamp"] = datetime.now(AEST).strftime("%-I:%M%p %-d/%-m/%Y").lower()
             entry["uploadUser"]     = upload_user
 
-        errors = forecast_bq.insert_rows_json(FC_STAGING, forecasts)
-        if errors:
-            return jsonify({"error": errors}), 400
+        if not forecasts:
+            return jsonify({"success": True, "message": "No forecast rows to update."})
 
+        # One job, no shared staging table: the rows travel with the query as @rows
+        rows_param = bigquery.ArrayQueryParameter("rows", "STRUCT", [
+            bigquery.StructQueryParameter(
+                None, *[bigquery.ScalarQueryParameter(col, typ, entry.get(col)) for col, typ in FC_FORECAST_COLUMNS]
+            )
+            for entry in forecasts
+        ])
         merge_sql = f"""
-            MERGE `{FC_MAIN}` T USING `{FC_STAGING}` S
+            MERGE `{FC_MAIN}` T USING (SELECT * FROM UNNEST(@rows)) S
             ON T.key = S.key AND T.uploadMonth = S.uploadMonth
                AND T.uploadWeek = S.uploadWeek AND T.uploadYear = S.uploadYear
             WHEN MATCHED THEN UPDATE SET
@@ -370,7 +451,8 @@ def fc_upload_forecasts():
             VALUES (S.`key`,S.fy,S.month,S.week,S.`range`,S.revenue,S.tempRevenue,S.notes,S.name,
                     S.uploadMonth,S.uploadWeek,S.uploadYear,S.uploadTimestamp,S.uploadUser)
         """
-        forecast_bq.query(merge_sql).result()
+        forecast_bq.query(merge_sql, job_config=bigquery.QueryJobConfig(query_parameters=[rows_param])).result()
+        _invalidate_forecasts(forecasts)
         return jsonify({"success": True, "message": f"Updated forecast for {recruiter}."})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -393,7 +475,9 @@ def fc_forecast_view():
         bigquery.ScalarQueryParameter("month", "STRING", month),
     ])
     try:
-        return jsonify([dict(r) for r in forecast_bq.query(sql, job_config=cfg).result()])
+        params = {"fy": fy, "month": month, "version": fc_versions.current("forecasts", fy=fy, month=month)}
+        rows = fc_cache.getOrLoad("forecasts/view", params, lambda: _run_query(sql, cfg))
+        return jsonify(rows)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -418,7 +502,10 @@ def fc_forecast_weekly():
         bigquery.ScalarQueryParameter("uploadWeek", "STRING", upload_week),
     ])
     try:
-        return jsonify([dict(r) for r in forecast_bq.query(sql, job_config=cfg).result()])
+        params = {"fy": fy, "month": month, "uploadWeek": upload_week,
+                  "version": fc_versions.current("forecasts", fy=fy, month=month)}
+        rows = fc_cache.getOrLoad("forecasts/weekly", params, lambda: _run_query(sql, cfg))
+        return jsonify(rows)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -443,6 +530,11 @@ def fc_forecast_for_recruiter(recruiter_name):
         bigquery.ScalarQueryParameter("fy", "STRING", fy),
         bigquery.ScalarQueryParameter("month", "STRING", month),
     ])
+    params = {"fy": fy, "month": month, "name": recruiter_name,
+              "version": fc_versions.current("forecasts", fy=fy, month=month)}
+    cached = fc_cache.get("forecasts/recruiter", params)
+    if cached is not None:
+        return jsonify(cached)
     try:
         results   = list(forecast_bq.query(sql, job_config=cfg).result())
         week_map  = defaultdict(list)
@@ -465,6 +557,7 @@ def fc_forecast_for_recruiter(recruiter_name):
                              "name": recruiter_name, "uploadMonth": "",
                              "uploadWeek": 0, "uploadYear": 0, "uploadTimestamp": "", "uploadUser": ""}
                 final.append(entry)
+        fc_cache.set("forecasts/recruiter", params, final)
         return jsonify(final)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -484,7 +577,10 @@ def fc_invoices():
         bigquery.ScalarQueryParameter("fy", "STRING", fy),
     ])
     try:
-        return jsonify([dict(r) for r in forecast_bq.query(sql, job_config=cfg).result()])
+        rows = fc_cache.getOrLoad(
+            "invoices", {"fy": fy, "month": month}, lambda: _run_query(sql, cfg), ttl=_INVOICES_CACHE_TTL
+        )
+        return jsonify(rows)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -498,8 +594,7 @@ def fc_get_targets():
 
     sql = f"""
         SELECT Month, Target, uploadTimestamp, uploadTimeRaw, uploadUser
-        FROM `{FC_TARGETS}` WHERE FinancialYear=@fy
-        QUALIFY ROW_NUMBER() OVER (PARTITION BY Month ORDER BY uploadTimeRaw DESC) = 1
+        FROM `{FC_TARGETS_CURRENT}` WHERE FinancialYear=@fy
         ORDER BY CASE Month
             WHEN 'Jan' THEN 1 WHEN 'Feb' THEN 2 WHEN 'Mar' THEN 3 WHEN 'Apr' THEN 4
             WHEN 'May' THEN 5 WHEN 'Jun' THEN 6 WHEN 'Jul' THEN 7 WHEN 'Aug' THEN 8
@@ -510,7 +605,9 @@ def fc_get_targets():
         bigquery.ScalarQueryParameter("fy", "STRING", fy),
     ])
     try:
-        return jsonify([dict(r) for r in forecast_bq.query(sql, job_config=cfg).result()])
+        _fc_ensure_current_targets()
+        params = {"fy": fy, "version": fc_versions.current("monthly-targets", fy=fy)}
+        return jsonify(fc_cache.getOrLoad("monthly-targets", params, lambda: _run_query(sql, cfg)))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -533,13 +630,32 @@ def fc_submit_target():
         utc_dt    = datetime.fromisoformat(raw_ts.replace("Z", "+00:00"))
         local_dt  = utc_dt.astimezone(AEST)
         fmt_ts    = local_dt.strftime("%-I:%M%p %-d/%-m/%Y").lower()
-        table_ref = forecast_bq.dataset("RecruiterForecasts").table("MonthlyTargets")
-        table     = forecast_bq.get_table(table_ref)
-        row = {"FinancialYear": fy, "Month": month, "Target": target,
-               "uploadUser": upload_user, "uploadTimestamp": fmt_ts, "uploadTimeRaw": raw_ts}
-        errors = forecast_bq.insert_rows_json(table, [row])
-        if errors:
-            return jsonify({"success": False, "error": str(errors)}), 500
+        # Append to the history and upsert the latest-per-month table in one transaction
+        sql = f"""
+            BEGIN TRANSACTION;
+            INSERT INTO `{FC_TARGETS}` (FinancialYear, Month, Target, uploadUser, uploadTimestamp, uploadTimeRaw)
+            VALUES (@fy, @month, @target, @user, @ts, @raw);
+            MERGE `{FC_TARGETS_CURRENT}` T
+            USING (SELECT @fy AS FinancialYear, @month AS Month, @target AS Target,
+                          @user AS uploadUser, @ts AS uploadTimestamp, @raw AS uploadTimeRaw) S
+            ON T.FinancialYear = S.FinancialYear AND T.Month = S.Month
+            WHEN MATCHED AND T.uploadTimeRaw <= S.uploadTimeRaw THEN UPDATE SET
+                Target=S.Target, uploadUser=S.uploadUser, uploadTimestamp=S.uploadTimestamp, uploadTimeRaw=S.uploadTimeRaw
+            WHEN NOT MATCHED THEN INSERT ROW;
+            COMMIT TRANSACTION;
+        """
+        cfg = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter("fy", "STRING", fy),
+            bigquery.ScalarQueryParameter("month", "STRING", month),
+            bigquery.ScalarQueryParameter("target", "FLOAT64", float(target)),
+            bigquery.ScalarQueryParameter("user", "STRING", upload_user),
+            bigquery.ScalarQueryParameter("ts", "STRING", fmt_ts),
+            bigquery.ScalarQueryParameter("raw", "STRING", raw_ts),
+        ])
+        _fc_ensure_current_targets()
+        forecast_bq.query(sql, job_config=cfg).result()
+        fc_cache.invalidate("monthly-targets", fy=fy)
+        fc_versions.bump("monthly-targets", fy=fy)
         return jsonify({"success": True, "message": "Monthly target submitted."})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -552,16 +668,17 @@ def fc_legends():
     if not fy:
         return jsonify({"error": "Missing 'fy'"}), 400
 
-    cached = _legends_cache.get(fy)
-    if cached and _time.time() - cached["fetched_at"] < _LEGENDS_CACHE_TTL:
-        return jsonify(cached["data"])
+    cached = fc_cache.get("legends", {"fy": fy})
+    if cached is not None:
+        return jsonify(cached)
 
-    sql1 = """
+    # Both read the consultant × month × week rollup, not the raw invoice lines
+    sql1 = f"""
         SELECT Consultant, Area, SUM(Margin) AS TotalMargin, Quarter
-        FROM `futureyou-458212.InvoiceData.InvoiceEnquiry`
+        FROM `{FC_MARGIN_ROLLUP}`
         WHERE FinancialYear=@fy GROUP BY Consultant, Quarter, Area ORDER BY TotalMargin DESC
     """
-    sql2 = """
+    sql2 = f"""
         SELECT Consultant, Area, Type, SUM(Margin) AS TotalMargin, Quarter,
                FutureYouMonth AS MonthName,
                CASE FutureYouMonth
@@ -569,7 +686,7 @@ def fc_legends():
                  WHEN 'May' THEN 5 WHEN 'Jun' THEN 6 WHEN 'Jul' THEN 7 WHEN 'Aug' THEN 8
                  WHEN 'Sep' THEN 9 WHEN 'Oct' THEN 10 WHEN 'Nov' THEN 11 WHEN 'Dec' THEN 12
                  ELSE NULL END AS Month
-        FROM `futureyou-458212.InvoiceData.InvoiceEnquiry`
+        FROM `{FC_MARGIN_ROLLUP}`
         WHERE FinancialYear=@fy
         GROUP BY Consultant, Area, Type, Quarter, MonthName, Month
         ORDER BY Consultant, Type, Quarter, Month
@@ -594,7 +711,7 @@ def fc_legends():
             "consultantTypeTotals":      [dict(r) for r in r2],
             "priorConsultantTypeTotals": prior_rows,
         }
-        _legends_cache[fy] = {"data": result, "fetched_at": _time.time()}
+        fc_cache.set("legends", {"fy": fy}, result, ttl=_LEGENDS_CACHE_TTL)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -606,8 +723,7 @@ def fc_legends():
 @fc_token_required
 def fc_get_recruiters():
     try:
-        docs = forecast_db.collection("recruiters").where(filter=FieldFilter("active", "==", True)).stream()
-        return jsonify([{"id": d.id, **d.to_dict()} for d in docs])
+        return jsonify(fc_directory.recruiters(active=True))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -616,10 +732,7 @@ def _derive_username(full_name: str) -> str:
     """Generate username from name, appending last initial if first name is taken."""
     parts = full_name.strip().split()
     first = parts[0].lower()
-    existing = {
-        d.to_dict().get("username", "")
-        for d in forecast_db.collection("users").stream()
-    }
+    existing = fc_directory.usernames()
     if first not in existing:
         return first
     last_initial = parts[-1][0].lower() if len(parts) > 1 else ""
@@ -639,14 +752,17 @@ def fc_add_recruiter():
     try:
         username = _derive_username(name)
         recruiter_doc = {"name": name, "area": area, "active": True, "xeroTrackingName": xero, "username": username}
-        ref = forecast_db.collection("recruiters").add(recruiter_doc)
-        forecast_db.collection("users").add({
+        user_doc = {
             "username": username,
             "password": username,  # plaintext — auto-hashed and flagged on first login
             "role": "recruiter",
             "name": name,
             "must_change_password": True,
-        })
+        }
+        ref = forecast_db.collection("recruiters").add(recruiter_doc)
+        user_ref = forecast_db.collection("users").add(user_doc)
+        fc_directory.patch("recruiters", ref[1].id, recruiter_doc)
+        fc_directory.patch("users", user_ref[1].id, user_doc)
         return jsonify({"success": True, "id": ref[1].id, "username": username})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -657,18 +773,14 @@ def fc_add_recruiter():
 @fc_finance_required
 def fc_delete_recruiter(doc_id):
     try:
-        recruiter_ref = forecast_db.collection("recruiters").document(doc_id)
-        recruiter = recruiter_ref.get()
-        if recruiter.exists:
-            username = recruiter.to_dict().get("username")
-            if username:
-                user_docs = forecast_db.collection("users").where(
-                    filter=FieldFilter("username", "==", username)
-                ).limit(1).stream()
-                user_doc = next(user_docs, None)
-                if user_doc:
-                    forecast_db.collection("users").document(user_doc.id).delete()
-        recruiter_ref.update({"active": False})
+        recruiter = forecast_db.collection("recruiters").document(doc_id).get()
+        username = (recruiter.to_dict() or {}).get("username") if recruiter.exists else None
+        found = _fresh_user(username) if username else None
+        if found:
+            forecast_db.collection("users").document(found[0]).delete()
+            fc_directory.patch("users", found[0], delete=True)
+        forecast_db.collection("recruiters").document(doc_id).update({"active": False})
+        fc_directory.patch("recruiters", doc_id, {"active": False})
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -678,8 +790,7 @@ def fc_delete_recruiter(doc_id):
 @fc_token_required
 def fc_get_areas():
     try:
-        docs = forecast_db.collection("areas").stream()
-        return jsonify([{"id": d.id, **d.to_dict()} for d in docs])
+        return jsonify(fc_directory.areas())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -694,6 +805,7 @@ def fc_update_area(doc_id):
         return jsonify({"error": "Missing 'headcount'"}), 400
     try:
         forecast_db.collection("areas").document(doc_id).update({"headcount": float(headcount)})
+        fc_directory.patch("areas", doc_id, {"headcount": float(headcount)})
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -4,8 +4,6 @@ import pandas as pd
 from datetime import datetime, date
 from openpyxl import load_workbook
 from openpyxl.styles import NamedStyle, Alignment
-import requests
-import time
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +11,8 @@ logging.basicConfig(level=logging.INFO)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.dateStringsHelper import getSydneyDate
+from helpers.xeroClient import XeroClient
+from helpers.xeroAsyncClient import getMany
 
 # Helper functions
 
@@ -42,51 +42,63 @@ def getConsultant(invoice):
 
 
 def fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id):
-    XERO_HISTORY_API_URL = "https://api.xero.com/api.xro/2.0/Invoices/{invoice_id}/History"
-
-    if not access_token or not xero_tenant_id:
-        raise Exception("Missing Xero authentication credentials.")
-
-    url = XERO_HISTORY_API_URL.format(invoice_id=invoice_id)
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Xero-Tenant-Id": xero_tenant_id
-    }
-
-    response = requests.get(url, headers=headers)
+    client = XeroClient(access_token, xero_tenant_id)
+    response = client.get(f"Invoices/{invoice_id}/History")
 
     if response.status_code == 200: 
         return response.json()
-    
-    elif response.status_code == 429:
-        retry_after = int(response.headers.get("Retry-After", 5))  
-        print(f"⚠️ Rate limit hit! Retrying in {retry_after} seconds for invoice {invoice_id}...")
-        time.sleep(retry_after)
-        return fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id) 
 
     else:
         print(f"❌ Error fetching invoice history: {invoice_id}: {response.status_code} - {response.text}")
         return None
 
 
-def getNotes(invoice_id, invoice_number, client_tokens):
-    """Fetch notes using the correct Xero credentials based on invoice number prefix."""
-    
-    # Determine which credentials to use
-    if invoice_number.startswith("TC"):
-        client_key = "FUTUREYOU_CONTRACTING"
-    else:
-        client_key = "FUTUREYOU_RECRUITMENT"
+def getClientKey(invoice_number, client_tokens):
+    """Pick the Xero org (and so the credentials) from the invoice number prefix."""
+    client_key = "FUTUREYOU_CONTRACTING" if invoice_number.startswith("TC") else "FUTUREYOU_RECRUITMENT"
 
     if client_key not in client_tokens:
         raise Exception(f"❌ No credentials found for {client_key}")
 
-    access_token = client_tokens[client_key]["access_token"]
-    xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+    return client_key
+
+
+def fetchInvoiceHistories(invoices, client_tokens):
+    """Fetch History for every invoice at once, fanned out concurrently per Xero org."""
+    invoice_ids_by_client = {}
+    for invoice in invoices:
+        client_key = getClientKey(invoice.get("InvoiceNumber", ""), client_tokens)
+        invoice_ids_by_client.setdefault(client_key, []).append(invoice.get("InvoiceID", ""))
+
+    histories = {}
+    for client_key, invoice_ids in invoice_ids_by_client.items():
+        access_token = client_tokens[client_key]["access_token"]
+        xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+        responses = getMany(access_token, xero_tenant_id, [f"Invoices/{invoice_id}/History" for invoice_id in invoice_ids])
+
+        for invoice_id, response in zip(invoice_ids, responses):
+            if response.status_code == 200:
+                histories[invoice_id] = response.json()
+            else:
+                print(f"❌ Error fetching invoice history: {invoice_id}: {response.status_code} - {response.text}")
+
+    return histories
+
+
+def getNotes(invoice_id, invoice_number, client_tokens, histories=None):
+    """Fetch notes using the correct Xero credentials based on invoice number prefix.
+
+    Pass histories from fetchInvoiceHistories to skip the per-invoice API call.
+    """
+    if histories is not None:
+        history = histories.get(invoice_id)
+    else:
+        client_key = getClientKey(invoice_number, client_tokens)
+        access_token = client_tokens[client_key]["access_token"]
+        xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+        history = fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id)
 
     notes = []
-    history = fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id)
 
     if history:
         history_records = history.get("HistoryRecords", [])
@@ -108,7 +120,6 @@ def getNotes(invoice_id, invoice_number, client_tokens):
                     notes.append(note_entry)
 
     print(f"✅ Notes fetched for invoice {invoice_number}")
-    time.sleep(1)  # Enforce rate limit (1 request per second)
     return ", ".join(notes) if notes else ""
 
 
@@ -124,6 +135,7 @@ def getAtbData(data, client_tokens):
     
     invoices = []
     overdue_invoices = []
+    histories = fetchInvoiceHistories(accrec_invoices, client_tokens)
 
     for index, invoice in enumerate(accrec_invoices, start=1):
         invoice_id = invoice.get("InvoiceID", "")
@@ -152,7 +164,7 @@ def getAtbData(data, client_tokens):
 
         logging.info(f"📊 Processing invoice {index}/{len(accrec_invoices)} - {invoice_number}")
         
-        comments = getNotes(invoice_id, invoice_number, client_tokens)
+        comments = getNotes(invoice_id, invoice_number, client_tokens, histories)
         category = getCategory(invoice)
         consultant = getConsultant(invoice)
 
@@ -2,15 +2,17 @@ import os
 import sys
 import pandas as pd
 from datetime import datetime, date
-import requests
-import time
 import logging
 from google.cloud import bigquery
-from google.oauth2 import service_account
 
 logging.basicConfig(level=logging.INFO)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from helpers.dateStringsHelper import getSydneyDate
+from helpers.xeroClient import XeroClient
+from helpers.xeroAsyncClient import getMany
+from helpers.gcpClients import bigQueryClient
+from helpers.bigQueryCost import QUERY_COSTS
+from bigQuerySchemas import TABLES, liveLoadJobConfig
 
 # --- Helper functions ---
 def getCategory(invoice):
@@ -23,41 +25,49 @@ def getCategory(invoice):
 
 # --- Get Notes ---
 def fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id):
-    XERO_HISTORY_API_URL = "https://api.xero.com/api.xro/2.0/Invoices/{invoice_id}/History"
-
-    if not access_token or not xero_tenant_id:
-        raise Exception("Missing Xero authentication credentials.")
-    url = XERO_HISTORY_API_URL.format(invoice_id=invoice_id)
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Xero-Tenant-Id": xero_tenant_id
-    }
-
-    response = requests.get(url, headers=headers)
+    client = XeroClient(access_token, xero_tenant_id)
+    response = client.get(f"Invoices/{invoice_id}/History")
     if response.status_code == 200: return response.json()
-    elif response.status_code == 429:
-        retry_after = int(response.headers.get("Retry-After", 5))  
-        print(f"⚠️ Rate limit hit! Retrying in {retry_after} seconds for invoice {invoice_id}...")
-        time.sleep(retry_after)
-        return fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id) 
     else:
         print(f"❌ Error fetching invoice history: {invoice_id}: {response.status_code} - {response.text}")
         return None
 
-def getNotes(invoice_id, invoice_number, client_tokens):
+def getClientKey(invoice_number, client_tokens):
     # Determine which credentials to use
     if invoice_number.startswith("TC"): client_key = "FUTUREYOU_CONTRACTING"
     else: client_key = "FUTUREYOU_RECRUITMENT"
 
     if client_key not in client_tokens:
         raise Exception(f"❌ No credentials found for {client_key}")
-
-    access_token = client_tokens[client_key]["access_token"]
-    xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+    return client_key
+
+def fetchInvoiceHistories(invoices, client_tokens):
+    # One History call per invoice, fanned out concurrently per Xero org
+    invoice_ids_by_client = {}
+    for invoice in invoices:
+        client_key = getClientKey(invoice.get("InvoiceNumber", ""), client_tokens)
+        invoice_ids_by_client.setdefault(client_key, []).append(invoice.get("InvoiceID", ""))
+
+    histories = {}
+    for client_key, invoice_ids in invoice_ids_by_client.items():
+        access_token = client_tokens[client_key]["access_token"]
+        xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+        responses = getMany(access_token, xero_tenant_id, [f"Invoices/{invoice_id}/History" for invoice_id in invoice_ids])
+        for invoice_id, response in zip(invoice_ids, responses):
+            if response.status_code == 200: histories[invoice_id] = response.json()
+            else: print(f"❌ Error fetching invoice history: {invoice_id}: {response.status_code} - {response.text}")
+    return histories
+
+def getNotes(invoice_id, invoice_number, client_tokens, histories=None):
+    if histories is not None:
+        history = histories.get(invoice_id)
+    else:
+        client_key = getClientKey(invoice_number, client_tokens)
+        access_token = client_tokens[client_key]["access_token"]
+        xero_tenant_id = client_tokens[client_key]["xero_tenant_id"]
+        history = fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id)
 
     notes = []
-    history = fetchInvoiceHistory(invoice_id, access_token, xero_tenant_id)
 
     if history:
         history_records = history.get("HistoryRecords", [])
@@ -75,7 +85,6 @@ def getNotes(invoice_id, invoice_number, client_tokens):
                 if note_entry not in notes: notes.append(note_entry)
 
     print(f"✅ Notes fetched for invoice {invoice_number}")
-    time.sleep(1)  # Enforce rate limit (1 request per second)
     return ", ".join(notes) if notes else ""
 
 # --- Process Data ---
@@ -85,6 +94,7 @@ def getAtbData(data, client_tokens):
         if isinstance(invoice, dict) and invoice.get("Type") == "ACCREC"
     ]
     invoice_rows = []
+    histories = fetchInvoiceHistories(accrec_invoices, client_tokens)
 
     for index, invoice in enumerate(accrec_invoices, start=1):
         invoice_id = invoice.get("InvoiceID", "")
@@ -110,7 +120,7 @@ def getAtbData(data, client_tokens):
         if currency_code != "AUD" and currency_rate != 0:
             amount_due *= (1 / currency_rate)
 
-        comments = getNotes(invoice_id, invoice_number, client_tokens)
+        comments = getNotes(invoice_id, invoice_number, client_tokens, histories)
         contact = invoice.get("Contact", {}).get("Name", "")
         category = getCategory(invoice)
 
@@ -182,7 +192,9 @@ def writeGithubSummary(df, table_ref):
     lines += ["### By Type", "| Type | Rows | Amount |", "| --- | --- | --- |"]
     for t, row in type_summary.iterrows():
         lines.append(f"| {t or '—'} | {int(row['Rows'])} | ${row['Amount']:,.2f} |")
-    lines += ["", f"_Generated {today.strftime('%d %b %Y')}_"]
+    lines.append("")
+    lines += QUERY_COSTS.summaryLines()
+    lines.append(f"_Generated {today.strftime('%d %b %Y')}_")
 
     summary = "\n".join(lines)
     print(summary)
@@ -206,18 +218,14 @@ def processAtbData(data, client_tokens):
     table_ref = f"{project_id}.{dataset_id}.{table_id}"
 
     # Authenticate using service account
-    credentials = service_account.Credentials.from_service_account_file(key_path)
-    client = bigquery.Client(credentials=credentials, project=project_id)
-
-    # 🧹 Clear existing contents without dropping the table
-    clear_query = f"DELETE FROM `{table_ref}` WHERE TRUE"
-    client.query(clear_query).result()
-    print(f"🧹 Cleared existing rows in {table_ref}")
+    client = bigQueryClient(project_id, key_path)
 
-    # Upload the data
-    job_config = bigquery.LoadJobConfig(
+    # Replace the contents in one load (WRITE_TRUNCATE), in the declared partitioning/clustering
+    # once the live table has been migrated to it
+    job_config = liveLoadJobConfig(
+        client,
+        TABLES["ATBEnquiry"],
         write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-        autodetect=True,
     )
 
     load_job = client.load_table_from_dataframe(
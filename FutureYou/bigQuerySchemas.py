@@ -0,0 +1,291 @@
+from datetime import date
+
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+PROJECT_ID = "futureyou-458212"
+
+F = bigquery.SchemaField
+
+# Table layouts for the FutureYou dashboards. InvoiceEnquiry/ATBEnquiry are partitioned
+# by month of InvoiceDate and clustered on the columns the backends filter on, so
+# `WHERE FinancialYear = @fy AND FutureYouMonth = @month` only reads the matching blocks.
+# The forecast tables have no date column and are small, so they are clustered only.
+TABLES = {
+    "InvoiceEnquiry": {
+        "table": f"{PROJECT_ID}.InvoiceData.InvoiceEnquiry",
+        "schema": [
+            F("Year", "INTEGER"),
+            F("FinancialYear", "STRING"),
+            F("Month", "STRING"),
+            F("FutureYouMonth", "STRING"),
+            F("Week", "INTEGER"),
+            F("InvoiceNumber", "STRING"),
+            F("Type", "STRING"),
+            F("ToClient", "STRING"),
+            F("KeyVal", "STRING"),
+            F("Description", "STRING"),
+            F("Contractor", "STRING"),
+            F("InvoiceDate", "TIMESTAMP"),
+            F("InvoiceTotal", "FLOAT"),
+            F("EXGST", "FLOAT"),
+            F("Margin", "FLOAT"),
+            F("Office", "STRING"),
+            F("ConsultantCode", "STRING"),
+            F("Consultant", "STRING"),
+            F("Area", "STRING"),
+            F("Account", "STRING"),
+            F("AccountName", "STRING"),
+            F("PlacementCount", "FLOAT"),
+            F("CurrencyCode", "STRING"),
+            F("CurrencyRate", "FLOAT"),
+            F("UpdatedDate", "TIMESTAMP"),
+            F("InvoiceID", "STRING"),
+            F("Quarter", "STRING"),
+            # When a --stream cycle wrote the row (NULL for batch loads) — see stream_to_bigquery
+            F("SyncedAt", "TIMESTAMP"),
+        ],
+        "partition": ("InvoiceDate", "MONTH"),
+        "cluster": ["FinancialYear", "FutureYouMonth", "Consultant"],
+    },
+    "ATBEnquiry": {
+        "table": f"{PROJECT_ID}.InvoiceData.ATBEnquiry",
+        "schema": [
+            F("InvoiceNumber", "STRING"),
+            F("Type", "STRING"),
+            F("Contact", "STRING"),
+            F("InvoiceDate", "DATE"),
+            F("DueDate", "DATE"),
+            F("Reference", "STRING"),
+            F("Total", "FLOAT"),
+            F("Category", "STRING"),
+            F("Consultant", "STRING"),
+            F("Comments", "STRING"),
+        ],
+        "partition": ("InvoiceDate", "MONTH"),
+        "cluster": ["Consultant", "Type"],
+    },
+    "RecruiterForecasts": {
+        "table": f"{PROJECT_ID}.RecruiterForecasts.RecruiterForecasts",
+        "schema": [
+            F("key", "STRING"),
+            F("fy", "STRING"),
+            F("month", "STRING"),
+            F("week", "INTEGER"),
+            F("range", "STRING"),
+            F("revenue", "INTEGER"),
+            F("tempRevenue", "INTEGER"),
+            F("notes", "STRING"),
+            F("name", "STRING"),
+            F("uploadMonth", "STRING"),
+            F("uploadWeek", "INTEGER"),
+            F("uploadYear", "INTEGER"),
+            F("uploadTimestamp", "STRING"),
+            F("uploadUser", "STRING"),
+        ],
+        "partition": None,
+        "cluster": ["fy", "month", "name"],
+    },
+    "MonthlyTargets": {
+        "table": f"{PROJECT_ID}.RecruiterForecasts.MonthlyTargets",
+        "schema": [
+            F("FinancialYear", "STRING"),
+            F("Month", "STRING"),
+            F("Target", "FLOAT"),
+            F("uploadUser", "STRING"),
+            F("uploadTimestamp", "STRING"),
+            F("uploadTimeRaw", "STRING"),
+        ],
+        "partition": None,
+        "cluster": ["FinancialYear", "Month"],
+    },
+    # Pre-aggregated reads for the dashboards (see revenueRollups.py)
+    "ConsultantMarginRollup": {
+        "table": f"{PROJECT_ID}.InvoiceData.ConsultantMarginRollup",
+        "schema": [
+            F("FinancialYear", "STRING"),
+            F("FutureYouMonth", "STRING"),
+            F("Week", "INTEGER"),
+            F("Quarter", "STRING"),
+            F("Consultant", "STRING"),
+            F("Area", "STRING"),
+            F("Type", "STRING"),
+            F("Margin", "FLOAT"),
+            F("LineCount", "INTEGER"),
+            F("RefreshedAt", "TIMESTAMP"),
+        ],
+        "partition": None,
+        "cluster": ["FinancialYear", "FutureYouMonth", "Consultant"],
+    },
+    "MonthlyTargetsCurrent": {
+        "table": f"{PROJECT_ID}.RecruiterForecasts.MonthlyTargetsCurrent",
+        "schema": [
+            F("FinancialYear", "STRING"),
+            F("Month", "STRING"),
+            F("Target", "FLOAT"),
+            F("uploadUser", "STRING"),
+            F("uploadTimestamp", "STRING"),
+            F("uploadTimeRaw", "STRING"),
+        ],
+        "partition": None,
+        "cluster": ["FinancialYear"],
+    },
+}
+
+# databaseInvoiceRequestv2 row keys -> InvoiceEnquiry columns (other keys already match)
+INVOICE_ENQUIRY_COLUMNS = {
+    "FutureYou Month": "FutureYouMonth",
+    "Invoice #": "InvoiceNumber",
+    "# Placement": "PlacementCount",
+    "Invoice Date": "InvoiceDate",
+    "Updated Date": "UpdatedDate",
+    "Invoice Total": "InvoiceTotal",
+    "EX GST": "EXGST",
+    "Consultant Code": "ConsultantCode",
+    "Account Name": "AccountName",
+    "Currency Code": "CurrencyCode",
+    "Currency Rate": "CurrencyRate",
+    "To": "ToClient",
+    "Key": "KeyVal",
+}
+
+# Partition expressions by column type (CREATE TABLE ... PARTITION BY)
+_PARTITION_EXPRESSIONS = {
+    "TIMESTAMP": "TIMESTAMP_TRUNC({column}, {unit})",
+    "DATETIME": "DATETIME_TRUNC({column}, {unit})",
+    "DATE": "DATE_TRUNC({column}, {unit})",
+}
+
+
+def buildTable(spec):
+    table = bigquery.Table(spec["table"], schema=spec["schema"])
+    if spec["partition"]:
+        column, unit = spec["partition"]
+        table.time_partitioning = bigquery.TimePartitioning(type_=unit, field=column)
+    table.clustering_fields = spec["cluster"]
+    return table
+
+
+def loadJobConfig(spec, **kwargs):
+    """LoadJobConfig that writes with the spec's schema, partitioning and clustering."""
+    table = buildTable(spec)
+    return bigquery.LoadJobConfig(
+        schema=spec["schema"],
+        time_partitioning=table.time_partitioning,
+        clustering_fields=spec["cluster"],
+        **kwargs,
+    )
+
+
+def liveLoadJobConfig(client, spec, **kwargs):
+    """
+    loadJobConfig for loading into the live table.
+
+    A load that declares partitioning/clustering different from the existing table's is
+    rejected by BigQuery, so the layout is only requested when the table doesn't exist
+    yet (the load creates it) or already has it; otherwise the rows are loaded into the
+    current layout until migrate_bigquery.py has rebuilt the table.
+    """
+    try:
+        table = client.get_table(spec["table"])
+    except NotFound:
+        return loadJobConfig(spec, **kwargs)
+    if layoutMatches(table, spec):
+        return loadJobConfig(spec, **kwargs)
+    print(f"⚠️ {spec['table']} is not partitioned/clustered as declared — loading into its current layout "
+          f"(run migrate_bigquery.py --apply to rebuild it).")
+    return bigquery.LoadJobConfig(schema=spec["schema"], **kwargs)
+
+
+def ensureTable(client, spec):
+    """Create the table with its declared layout if it doesn't exist yet, and add any declared columns it lacks."""
+    table = client.create_table(buildTable(spec), exists_ok=True)
+    existing = {field.name for field in table.schema}
+    missing = [field for field in spec["schema"] if field.name not in existing]
+    if missing:
+        # Appending NULLABLE columns is an in-place schema update — no rewrite
+        table.schema = list(table.schema) + missing
+        table = client.update_table(table, ["schema"])
+        print(f"➕ Added {', '.join(field.name for field in missing)} to {spec['table']}")
+    return table
+
+
+def layoutMatches(table, spec):
+    partitioning = table.time_partitioning
+    if spec["partition"]:
+        column, unit = spec["partition"]
+        if not partitioning or partitioning.field != column or partitioning.type_ != unit:
+            return False
+    elif partitioning:
+        return False
+    return list(table.clustering_fields or []) == spec["cluster"]
+
+
+def migrateTable(client, spec, apply=False, backup=True):
+    """
+    Rebuild an existing table with the declared partitioning and clustering.
+
+    BigQuery can't change a table's partitioning in place, so the rows are copied into
+    <table>_migrating with CREATE TABLE ... PARTITION BY ... CLUSTER BY ... AS SELECT *
+    (existing column types are kept) and the two are swapped with ALTER TABLE RENAME:
+    the original becomes <table>_backup_<yyyymmdd> and <table>_migrating takes its name.
+    The original is never deleted before the rebuilt table is in place, and it is only
+    dropped afterwards when backup=False. Without apply it only prints what it would do.
+
+    Run it while nothing writes to the table (the invoice/ATB workflows are not running):
+    the row count is re-checked before the swap and the migration aborts if it changed,
+    and the table name is briefly unbound between the two renames.
+    """
+    table_ref = spec["table"]
+    try:
+        table = client.get_table(table_ref)
+    except NotFound:
+        print(f"🆕 {table_ref} does not exist — {'creating' if apply else 'would create'} it.")
+        if apply:
+            ensureTable(client, spec)
+        return "created"
+
+    if layoutMatches(table, spec):
+        print(f"✅ {table_ref} already partitioned/clustered as declared.")
+        return "unchanged"
+
+    clauses = []
+    if spec["partition"]:
+        column, unit = spec["partition"]
+        column_type = next((f.field_type for f in table.schema if f.name == column), None)
+        if column_type not in _PARTITION_EXPRESSIONS:
+            raise ValueError(f"❌ Cannot partition {table_ref} on {column} (type {column_type}).")
+        clauses.append("PARTITION BY " + _PARTITION_EXPRESSIONS[column_type].format(column=f"`{column}`", unit=unit))
+    clauses.append("CLUSTER BY " + ", ".join(f"`{c}`" for c in spec["cluster"]))
+
+    table_name = table_ref.split(".")[-1]
+    migrating_ref = f"{table_ref}_migrating"
+    backup_name = f"{table_name}_backup_{date.today():%Y%m%d}"
+    sql = f"CREATE OR REPLACE TABLE `{migrating_ref}`\n" + "\n".join(clauses) + f"\nAS SELECT * FROM `{table_ref}`"
+    size_mb = (table.num_bytes or 0) / 1_000_000
+    print(f"🔧 {table_ref}: {table.num_rows} rows, {size_mb:,.1f} MB")
+    print(sql)
+    print(f"ALTER TABLE `{table_ref}` RENAME TO `{backup_name}`")
+    print(f"ALTER TABLE `{migrating_ref}` RENAME TO `{table_name}`")
+    if not apply:
+        return "pending"
+
+    client.query(sql).result()
+    source_rows = client.get_table(table_ref).num_rows
+    migrated_rows = client.get_table(migrating_ref).num_rows
+    if source_rows != migrated_rows:
+        client.delete_table(migrating_ref, not_found_ok=True)
+        raise RuntimeError(
+            f"❌ {table_ref} changed during the migration ({source_rows} rows, rebuilt {migrated_rows}) — "
+            f"stop the writers and run it again."
+        )
+
+    client.query(f"ALTER TABLE `{table_ref}` RENAME TO `{backup_name}`").result()
+    client.query(f"ALTER TABLE `{migrating_ref}` RENAME TO `{table_name}`").result()
+    backup_ref = f"{table_ref.rsplit('.', 1)[0]}.{backup_name}"
+    if backup:
+        print(f"💾 Original kept as {backup_ref}")
+    else:
+        client.delete_table(backup_ref, not_found_ok=True)
+    print(f"✅ Migrated {table_ref}")
+    return "migrated"
@@ -0,0 +1,189 @@
+import os
+import sys
+import csv
+import json
+import argparse
+import subprocess
+from datetime import timedelta
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+from helpers.companyCalendar import CALENDAR_PATH, CompanyCalendar, load_calendar_file
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Byte-for-byte copies of helpers/companyCalendar.json inside each frontend's build context
+FRONTEND_COPIES = [
+    os.path.join(REPO_ROOT, "FutureYou", "adminWebsite", "frontend", "lib", "companyCalendar.json"),
+    os.path.join(REPO_ROOT, "FutureYou", "forecastingWebsite", "frontend", "src", "data", "companyCalendar.json"),
+]
+
+
+def loadVersion(spec):
+    """A calendar from a file path, or from git as REF:path (e.g. HEAD:helpers/companyCalendar.json)."""
+    if not os.path.exists(spec) and ":" in spec:
+        source = subprocess.run(["git", "show", spec], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+        return CompanyCalendar(json.loads(source))
+    return CompanyCalendar(load_calendar_file(spec))
+
+
+def calendarChanges(old, new):
+    """[(first day, last day, old CalendarDay, new CalendarDay)] for each run of days whose month or week differs."""
+    first, last = max(old.first, new.first), min(old.last, new.last)
+    changes = []
+    day = first
+    while day <= last:
+        before, after = old.lookup(day), new.lookup(day)
+        if (before.month, before.week) != (after.month, after.week):
+            if changes and changes[-1][1] == day - timedelta(days=1) and changes[-1][2:] == (before, after):
+                changes[-1] = (changes[-1][0], day, before, after)
+            else:
+                changes.append((day, day, before, after))
+        day += timedelta(days=1)
+    return changes
+
+
+def movedInvoiceRows(client, changes, new):
+    """InvoiceEnquiry rows dated on a changed day whose stored month/week differ from the new calendar."""
+    from google.cloud import bigquery
+    from bigQuerySchemas import TABLES
+
+    days = sorted({c[0] + timedelta(days=i) for c in changes for i in range((c[1] - c[0]).days + 1)})
+    job = client.query(f"""
+        SELECT InvoiceID, InvoiceNumber, DATE(InvoiceDate) AS InvoiceDay, FinancialYear, FutureYouMonth, Week, Margin
+        FROM `{TABLES["InvoiceEnquiry"]["table"]}`
+        WHERE InvoiceDate >= TIMESTAMP(@first) AND InvoiceDate < TIMESTAMP(DATE_ADD(@last, INTERVAL 1 DAY))
+          AND DATE(InvoiceDate) IN UNNEST(@days)
+    """, job_config=bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("first", "DATE", days[0]),
+        bigquery.ScalarQueryParameter("last", "DATE", days[-1]),
+        bigquery.ArrayQueryParameter("days", "DATE", days),
+    ]))
+    moved = []
+    for row in job.result():
+        target = new.lookup(row["InvoiceDay"])
+        if (row["FutureYouMonth"], row["Week"]) != (target.month, target.week):
+            moved.append({**dict(row.items()), "NewMonth": target.month, "NewWeek": target.week, "NewQuarter": target.quarter})
+    return moved
+
+
+def applyMoves(client, moved):
+    """Rewrite FutureYouMonth/Week/Quarter for the moved days, then refresh their rollup years."""
+    from google.cloud import bigquery
+    from bigQuerySchemas import TABLES
+    from revenueRollups import refreshMarginRollup
+
+    targets = {}
+    for row in moved:
+        targets[row["InvoiceDay"]] = (row["NewMonth"], row["NewWeek"], row["NewQuarter"])
+    days = sorted(targets)
+    client.query(f"""
+        UPDATE `{TABLES["InvoiceEnquiry"]["table"]}` T
+        SET FutureYouMonth = u.month, Week = u.week, Quarter = u.quarter
+        FROM UNNEST(@days) u
+        WHERE T.InvoiceDate >= TIMESTAMP(@first) AND T.InvoiceDate < TIMESTAMP(DATE_ADD(@last, INTERVAL 1 DAY))
+          AND DATE(T.InvoiceDate) = u.day
+    """, job_config=bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("first", "DATE", days[0]),
+        bigquery.ScalarQueryParameter("last", "DATE", days[-1]),
+        bigquery.ArrayQueryParameter("days", "STRUCT", [
+            bigquery.StructQueryParameter(
+                None,
+                bigquery.ScalarQueryParameter("day", "DATE", day),
+                bigquery.ScalarQueryParameter("month", "STRING", targets[day][0]),
+                bigquery.ScalarQueryParameter("week", "INT64", targets[day][1]),
+                bigquery.ScalarQueryParameter("quarter", "STRING", targets[day][2]),
+            )
+            for day in days
+        ]),
+    ])).result()
+    print(f"✅ Moved {len(moved):,} InvoiceEnquiry rows on {len(days)} day(s).")
+    refreshMarginRollup(client, {row["FinancialYear"] for row in moved})
+
+
+def diffCommand(args):
+    old, new = loadVersion(args.old), loadVersion(args.new)
+    changes = calendarChanges(old, new)
+    print(f"📅 {args.old} ({old.version}) → {args.new} ({new.version}): {len(changes)} changed range(s)")
+    for first, last, before, after in changes:
+        span = f"{first}" if first == last else f"{first} – {last}"
+        print(f"   {span}: {before.month} week {before.week} → {after.month} week {after.week}")
+    if not changes or not args.invoices:
+        return
+
+    from helpers.gcpClients import bigQueryClient
+    from bigQuerySchemas import PROJECT_ID
+
+    client = bigQueryClient(PROJECT_ID, os.getenv("FUTUREYOU_BQACCESS"))
+    moved = movedInvoiceRows(client, changes, new)
+    invoices = {row["InvoiceID"] for row in moved}
+    margin = sum(row["Margin"] or 0 for row in moved)
+    print(f"🧾 {len(moved):,} InvoiceEnquiry rows ({len(invoices):,} invoices, ${margin:,.2f} margin) would move.")
+
+    if args.csv and moved:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(moved[0]))
+            writer.writeheader()
+            writer.writerows(moved)
+        print(f"📝 Wrote {args.csv}")
+    if args.apply and moved:
+        applyMoves(client, moved)
+
+
+def validateCommand(args):
+    calendar = loadVersion(args.file)
+    print(f"✅ {args.file} ({calendar.version}): {len(calendar.spans)} months, {calendar.first} – {calendar.last}")
+
+
+def syncCommand(args):
+    with open(CALENDAR_PATH, "rb") as f:
+        source = f.read()
+    stale = []
+    for path in FRONTEND_COPIES:
+        current = open(path, "rb").read() if os.path.exists(path) else None
+        if current == source:
+            continue
+        stale.append(path)
+        if not args.check:
+            with open(path, "wb") as f:
+                f.write(source)
+            print(f"📝 Updated {os.path.relpath(path, REPO_ROOT)}")
+    if args.check and stale:
+        for path in stale:
+            print(f"❌ {os.path.relpath(path, REPO_ROOT)} differs from helpers/companyCalendar.json")
+        sys.exit(1)
+    if not stale:
+        print("✅ Frontend calendar copies are up to date.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate, sync and diff the FutureYou company calendar.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="Compile a calendar file and report its range")
+    validate.add_argument("file", nargs="?", default=CALENDAR_PATH, help="Path or REF:path")
+    validate.set_defaults(run=validateCommand)
+
+    sync = commands.add_parser("sync", help="Copy helpers/companyCalendar.json into the frontends")
+    sync.add_argument("--check", action="store_true", help="Only report (exit 1) if a copy is out of date")
+    sync.set_defaults(run=syncCommand)
+
+    diff = commands.add_parser("diff", help="Days whose month/week change between two calendar versions")
+    diff.add_argument("old", nargs="?", default="HEAD:helpers/companyCalendar.json", help="Path or REF:path")
+    diff.add_argument("new", nargs="?", default=CALENDAR_PATH, help="Path or REF:path")
+    diff.add_argument("--invoices", action="store_true", help="Report the InvoiceEnquiry rows that would move")
+    diff.add_argument("--csv", metavar="PATH", help="With --invoices, write the moved rows here")
+    diff.add_argument("--apply", action="store_true",
+                      help="With --invoices, rewrite the moved rows' month/week/quarter and refresh their rollups")
+    diff.set_defaults(run=diffCommand)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,103 @@
 import sys
 import os
-import requests
+import argparse
 import csv
-import pandas as pd
-import re
+import time
+import traceback
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from datetime import datetime, timedelta, timezone, date
 from google.cloud import bigquery
-from google.oauth2 import service_account
-import pandas_gbq
 from manualJournalRequest import get_manual_journal_data
 from databaseMappings import account_code_mapping
+from lineDescriptions import LINE_DESCRIPTIONS
+from journalAllocation import JournalAllocationIndex
+from bigQuerySchemas import TABLES, INVOICE_ENQUIRY_COLUMNS, ensureTable
+from revenueRollups import refreshMarginRollup, ensureCurrentTargets
 from dotenv import load_dotenv
 load_dotenv()
 
-from google.cloud import firestore
-try:
-    _db = firestore.Client.from_service_account_json(
-        os.getenv("FUTUREYOU_FIRESTOREACCESS"), 
-        project="futureyou-458212", 
-        database="futureyou"
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.databaseHelpers import parse_xero_date, get_financial_year
+from helpers.companyCalendar import COMPANY_CALENDAR
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
+from helpers.xeroClient import XeroClient
+from helpers.syncState import getSyncState, IncrementalSync
+from helpers.xeroResponseCache import XeroResponseCache
+from helpers.bigQueryUpsert import upsertArrowTable
+from helpers.arrowRows import ArrowRowBuilder
+from helpers.bigQueryStreamSink import StorageWriteSink, BigQueryStorageWriter, FakeStreamWriter
+from helpers.gcpClients import bigQueryClient, firestoreClient, getCredentials, BIGQUERY_SCOPES
+from helpers.bigQueryCost import QUERY_COSTS, isDryRun
+from helpers.firestoreDirectory import FirestoreDirectory
+
+def load_consultant_area_mapping():
+    """{consultant code: area} from the Firestore recruiters collection."""
+    # One-shot read — a run doesn't live long enough to need the listeners
+    directory = FirestoreDirectory(
+        firestoreClient("futureyou-458212", database="futureyou", key_path=os.getenv("FUTUREYOU_FIRESTOREACCESS")),
+        collections=["recruiters"], listen=False,
     )
-    consultant_area_mapping = {
-        d.to_dict().get("xeroTrackingName", ""): d.to_dict().get("area", "")
-        for d in _db.collection("recruiters").stream()
-        if d.to_dict().get("xeroTrackingName")
-    }
+    return directory.areaByConsultantCode()
+
+try:
+    consultant_area_mapping = load_consultant_area_mapping()
 except Exception as e:
     print(f"Warning: Failed to load consultant mappings from Firestore: {e}")
     consultant_area_mapping = {}
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from helpers.databaseHelpers import parse_xero_date, get_company_month, get_financial_year, week_of_company_month
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken
+def refresh_consultant_area_mapping():
+    """Re-read the mapping before a --watch cycle, keeping the previous one if Firestore fails."""
+    global consultant_area_mapping
+    try:
+        consultant_area_mapping = load_consultant_area_mapping()
+    except Exception as e:
+        print(f"Warning: Failed to reload consultant mappings from Firestore (keeping the previous ones): {e}")
 
 FULL_RESET = False
-
-quarters = {
-    "Jan": "Q3", "Feb": "Q3", "Mar": "Q3",
-    "Apr": "Q4", "May": "Q4", "Jun": "Q4",
-    "Jul": "Q1", "Aug": "Q1", "Sep": "Q1",
-    "Oct": "Q2", "Nov": "Q2", "Dec": "Q2"
-}
+WATCH_MAX_BACKOFF = 8  # a failing --watch worker waits up to this many intervals between attempts
 
 # --- GitHub Summary ---
-def writeGithubSummary(all_rows):
+def writeGithubSummary(table, deleted_count, mode):
     today = date.today()
     run_number = os.environ.get("GITHUB_RUN_NUMBER", "?")
 
-    deleted = [r for r in all_rows if r.get("__deleted__")]
-    valid = [r for r in all_rows if not r.get("__deleted__")]
-
-    total_margin = sum(r["Margin"] for r in valid if isinstance(r.get("Margin"), (int, float)))
+    total_margin = (pc.sum(table["Margin"]).as_py() or 0) if table.num_rows else 0
 
     lines = [f"## FutureYou Revenue DB — Run #{run_number}", ""]
     lines += [
         "### Overview",
         "| Metric | Value |",
         "| --- | --- |",
-        f"| Rows Uploaded | {len(valid)} |",
-        f"| Voided / Deleted | {len(deleted)} |",
+        f"| Rows Uploaded | {table.num_rows} |",
+        f"| Voided / Deleted | {deleted_count} |",
         f"| Total Margin | ${total_margin:,.2f} |",
         "",
     ]
 
-    if valid:
-        df = pd.DataFrame(valid)
-
-        type_counts = df["Type"].value_counts()
+    if table.num_rows:
+        by_type = table.group_by("Type").aggregate([("Type", "count"), ("Margin", "sum")])
+        by_type = sorted(by_type.to_pylist(), key=lambda r: -r["Type_count"])
         lines += ["### By Type", "| Type | Rows | Margin |", "| --- | --- | --- |"]
-        for t, count in type_counts.items():
-            type_margin = df[df["Type"] == t]["Margin"].apply(lambda x: x if isinstance(x, (int, float)) else 0).sum()
-            lines.append(f"| {t} | {count} | ${type_margin:,.2f} |")
+        for r in by_type:
+            lines.append(f"| {r['Type']} | {r['Type_count']} | ${r['Margin_sum'] or 0:,.2f} |")
         lines.append("")
 
         # Row preview (up to 30 rows)
-        preview_rows = valid[:30]
         lines += ["### Row Preview", "| Invoice # | Type | Client | Consultant | EX GST | Margin |", "| --- | --- | --- | --- | --- | --- |"]
-        for r in preview_rows:
-            inv = r.get("Invoice #") or r.get("InvoiceNumber", "—")
-            rtype = r.get("Type", "—")
-            client = r.get("To") or r.get("ToClient", "—")
-            consultant = r.get("Consultant", "—") or "—"
-            exgst = r.get("EX GST") or r.get("EXGST", 0)
-            margin = r.get("Margin", "")
-            exgst_str = f"${float(exgst):,.2f}" if exgst not in (None, "") else "—"
-            margin_str = f"${float(margin):,.2f}" if isinstance(margin, (int, float)) else "—"
-            lines.append(f"| {inv} | {rtype} | {client} | {consultant} | {exgst_str} | {margin_str} |")
-        if len(valid) > 30:
-            lines.append(f"_… and {len(valid) - 30} more rows_")
+        for r in table.slice(0, 30).to_pylist():
+            exgst_str = f"${r['EXGST']:,.2f}" if r["EXGST"] is not None else "—"
+            margin_str = f"${r['Margin']:,.2f}" if r["Margin"] is not None else "—"
+            lines.append(f"| {r['InvoiceNumber'] or '—'} | {r['Type'] or '—'} | {r['ToClient'] or '—'} | {r['Consultant'] or '—'} | {exgst_str} | {margin_str} |")
+        if table.num_rows > 30:
+            lines.append(f"_… and {table.num_rows - 30} more rows_")
         lines.append("")
 
-    lines.append(f"_Generated {today.strftime('%d %b %Y')} — delta sync (last 24 hours)_")
+    lines += QUERY_COSTS.summaryLines()
+    lines.append(f"_Generated {today.strftime('%d %b %Y')} — {mode}_")
 
     summary = "\n".join(lines)
     print(summary)
@@ -104,10 +108,33 @@ def writeGithubSummary(all_rows):
 
 
 # --- BigQuery Functions ---
-def export_to_bigquery(rows):
-    if not rows:
+class InvoiceRows:
+    """Collects export rows straight into typed Arrow batches; voided/deleted invoices only keep their ID."""
+
+    def __init__(self):
+        self.builder = ArrowRowBuilder(TABLES["InvoiceEnquiry"]["schema"], INVOICE_ENQUIRY_COLUMNS)
+        self.deleted_ids = []
+
+    def extend(self, rows):
+        for row in rows:
+            if row.get("__deleted__"):
+                if row.get("InvoiceID"):
+                    self.deleted_ids.append(row["InvoiceID"])
+            else:
+                self.builder.append(row)
+
+    def extend_frame(self, frame, deleted_ids=()):
+        self.builder.extendFrame(frame)
+        self.deleted_ids.extend(deleted_ids)
+
+    def table(self):
+        return self.builder.table()
+
+
+def export_to_bigquery(table, deleted_ids):
+    if not table.num_rows and not deleted_ids:
         print("❌ No rows to upload")
-        return
+        return True
 
     # Path to your service account key file
     key_path = os.getenv("FUTUREYOU_BQACCESS")
@@ -120,141 +147,108 @@ def export_to_bigquery(rows):
 
     try:
         # Create credentials and client
-        credentials = service_account.Credentials.from_service_account_file(
-            key_path, 
-            scopes=["https://www.googleapis.com/auth/bigquery"]
-        )
-        client = bigquery.Client(credentials=credentials, project=project_id)
+        client = bigQueryClient(project_id, key_path)
 
-        # --- 1. Handle deletions first ---
-        deleted_ids = [
-            r["InvoiceID"] for r in rows
-            if r.get("__deleted__") and r.get("InvoiceID")
-        ]
+        # Replace every changed invoice (and drop deleted ones) in a single MERGE, loaded as Parquet
+        ensureTable(client, TABLES["InvoiceEnquiry"])
+        upsertArrowTable(client, table, table_ref, "InvoiceID", deleted_keys=deleted_ids, replace_all=FULL_RESET)
+        if FULL_RESET:
+            print("⚠️ Full reset: table replaced with this run's rows.")
         if deleted_ids:
-            # Construct a DELETE query for BigQuery
-            placeholders = ", ".join(f"'{id}'" for id in deleted_ids)
-            query = f"DELETE FROM `{table_ref}` WHERE InvoiceID IN ({placeholders})"
-            
-            # Execute the deletion query
-            query_job = client.query(query)
-            query_job.result()  # Wait for query to complete
             print(f"🗑️ Deleted {len(deleted_ids)} voided/deleted invoices from BigQuery.")
 
-        # --- 2. Filter out deleted rows before continuing ---
-        filtered_rows = [r for r in rows if not r.get("__deleted__")]
-        if not filtered_rows:
-            print("ℹ️ No valid rows to upload after filtering.")
-            return
-
-        df = pd.DataFrame(filtered_rows)
-
-        # --- 3. Parse and clean up ---
-        df["Invoice Date"] = pd.to_datetime(df["Invoice Date"], errors="coerce", dayfirst=True)
-        df["Updated Date"] = pd.to_datetime(df["Updated Date"], errors="coerce", dayfirst=True)
-
-        float_fields = ["Invoice Total", "EX GST", "Margin", "# Placement", "Currency Rate"]
-        for field in float_fields:
-            df[field] = pd.to_numeric(df[field], errors="coerce").replace([np.inf, -np.inf], None).round(6)
-
-        df.rename(columns={
-            "FutureYou Month": "FutureYouMonth",
-            "Invoice #": "InvoiceNumber",
-            "# Placement": "PlacementCount",
-            "Invoice Date": "InvoiceDate",
-            "Updated Date": "UpdatedDate",
-            "Invoice Total": "InvoiceTotal",
-            "EX GST": "EXGST",
-            "Consultant Code": "ConsultantCode",
-            "Account Name": "AccountName",
-            "Currency Code": "CurrencyCode",
-            "Currency Rate": "CurrencyRate",
-            "To": "ToClient",
-            "Key": "KeyVal"
-        }, inplace=True)
-
-        # Replace NaNs with None for BigQuery compatibility
-        df = df.where(pd.notnull(df), None)
-
-        # --- 4. Handle full reset or delete existing records by InvoiceID ---
-        if FULL_RESET:
-            query = f"DELETE FROM `{table_ref}` WHERE 1=1"
-            query_job = client.query(query)
-            query_job.result()  # Wait for query to complete
-            print("⚠️ Full reset: all rows deleted.")
-        else:
-            updated_ids = df["InvoiceID"].dropna().astype(str).tolist()
-            if updated_ids:
-                # Construct a DELETE query for BigQuery
-                placeholders = ", ".join(f"'{id}'" for id in updated_ids)
-                query = f"DELETE FROM `{table_ref}` WHERE InvoiceID IN ({placeholders})"
-                
-                # Execute the deletion query
-                query_job = client.query(query)
-                query_job.result()  # Wait for query to complete
-                print(f"✅ Deleted {len(updated_ids)} updated invoices from BigQuery.")
-
-        # --- 5. Insert fresh data ---
-        # Convert date columns to datetime format for proper BigQuery loading
-        if "InvoiceDate" in df.columns and df["InvoiceDate"].dtype != 'datetime64[ns]':
-            df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], errors='coerce')
-            
-        if "UpdatedDate" in df.columns and df["UpdatedDate"].dtype != 'datetime64[ns]':
-            df["UpdatedDate"] = pd.to_datetime(df["UpdatedDate"], errors='coerce')
-            
-        # Upload dataframe to BigQuery
-        pandas_gbq.to_gbq(
-            df, 
-            f"{dataset_id}.{table_id}", 
-            project_id=project_id,
-            credentials=credentials,
-            if_exists="append"
-        )
-        
-        print(f"✅ Successfully uploaded {len(df)} rows to BigQuery.")
+        print(f"✅ Successfully uploaded {table.num_rows} rows to BigQuery.")
+        return True
 
     except Exception as e:
         print(f"❌ Upload failed: {e}")
+        return False
+
+def refresh_rollups(table):
+    """
+    Re-aggregate the dashboard margin rollup for the financial years this run touched, and
+    build MonthlyTargetsCurrent from the target history if it doesn't exist yet.
+    """
+    if FULL_RESET:
+        financial_years = None
+    else:
+        # Voided/deleted invoices only carry their ID, so always include the current and previous FY
+        today = datetime.now()
+        financial_years = set(pc.unique(table["FinancialYear"]).to_pylist()) if table.num_rows else set()
+        financial_years |= {get_financial_year(today), get_financial_year(today - timedelta(days=365))}
+    try:
+        client = bigQueryClient("futureyou-458212", os.getenv("FUTUREYOU_BQACCESS"))
+        refreshMarginRollup(client, financial_years)
+        ensureCurrentTargets(client)
+    except Exception as e:
+        print(f"⚠️ Rollup refresh failed (dashboards keep the previous aggregates): {e}")
+
+
+def open_stream_sink(fake=False):
+    """Committed-mode Storage Write API sink for InvoiceEnquiry (or an in-memory fake writer)."""
+    spec = TABLES["InvoiceEnquiry"]
+    if fake or isDryRun():
+        return StorageWriteSink(spec["table"], spec["schema"], writer=FakeStreamWriter())
+    # The write stream's row type is the declared schema, so the table needs every column (e.g. SyncedAt)
+    ensureTable(bigQueryClient("futureyou-458212", os.getenv("FUTUREYOU_BQACCESS")), spec)
+    credentials = getCredentials(os.getenv("FUTUREYOU_BQACCESS"), BIGQUERY_SCOPES)
+    return StorageWriteSink(spec["table"], spec["schema"], writer=BigQueryStorageWriter(credentials))
+
+
+def stream_to_bigquery(table, deleted_ids, sink):
+    """
+    Near-real-time alternative to export_to_bigquery: the new rows are streamed in through
+    the sink first, all stamped with this cycle's SyncedAt, and only then does one DELETE
+    remove the older rows of those invoices (any SyncedAt before this cycle's, or NULL
+    from a batch load) and every row of deleted ones. Rows are queryable within seconds
+    and no load job is run.
+
+    If the stream or the DELETE fails, an invoice is briefly counted twice rather than
+    missing. The watermark isn't committed, so the next cycle streams it again and its
+    DELETE removes every older copy. The batch export's MERGE still replaces these
+    invoices by InvoiceID on its next run.
+    """
+    if not table.num_rows and not deleted_ids:
+        print("ℹ️ Nothing new to stream")
+        return True
+
+    table_ref = TABLES["InvoiceEnquiry"]["table"]
+    synced_at = datetime.now(timezone.utc)
+    column = table.schema.get_field_index("SyncedAt")
+    table = table.set_column(
+        column, "SyncedAt", pa.array([synced_at] * table.num_rows, type=table.schema.field(column).type)
+    )
+    synced_ids = sorted(set(table.column("InvoiceID").to_pylist()))
+    try:
+        written = sink.write(table)
+        print(f"📡 Streamed {written} rows to {table_ref} (stream offset {sink.offset}).")
+
+        if isinstance(sink.writer, FakeStreamWriter):
+            print(f"🧪 Fake writer: skipping DELETE of superseded rows for {len(synced_ids) + len(deleted_ids)} invoices")
+            return True
+        client = bigQueryClient("futureyou-458212", os.getenv("FUTUREYOU_BQACCESS"))
+        job = client.query(
+            f"""
+            DELETE FROM `{table_ref}`
+            WHERE InvoiceID IN UNNEST(@deleted)
+               OR (InvoiceID IN UNNEST(@synced) AND (SyncedAt IS NULL OR SyncedAt < @synced_at))
+            """,
+            job_config=bigquery.QueryJobConfig(query_parameters=[
+                bigquery.ArrayQueryParameter("deleted", "STRING", sorted(set(deleted_ids))),
+                bigquery.ArrayQueryParameter("synced", "STRING", synced_ids),
+                bigquery.ScalarQueryParameter("synced_at", "TIMESTAMP", synced_at),
+            ]),
+        )
+        job.result()
+        print(f"🗑️ Removed {job.num_dml_affected_rows or 0} superseded rows for "
+              f"{len(synced_ids) + len(deleted_ids)} invoices.")
+        return True
 
-# --- Utilities ---
-def build_key(year, month, week, contractor):
-    return f"{year}:{month}:{week}:{contractor.strip().lower()}"
-
-def is_valid_line(line):
-    tracking = line.get("Tracking", [])
-    return any(t.get("Name") == "Category" for t in tracking) and any(t.get("Name") == "Consultant" for t in tracking)
-
-def extract_contractor(invoice_type, line_description):
-    def extract_between(text, start_kw, end_kw):
-        start = text.find(start_kw)
-        if start == -1: return None
-        start += len(start_kw)
-        end = text.find(end_kw, start)
-        return text[start:end].strip() if end != -1 else None
-
-    if invoice_type != "Temp": return None
-    patterns = [("Public Holiday of ", " for the week"), ("personal leave of ", " for the week"),
-                ("sick leave of ", " for the week"), ("contracting services of ", " for the week"), ("payment in lieu of notice of ", " for the week"),
-                (" of ", " for the week"), (" of ", " on ")]
-    
-    if line_description.startswith("Base Wage -"):
-        for start_kw, end_kw in patterns[:5]:
-            if start_kw in line_description:
-                return extract_between(line_description, start_kw, end_kw)
-
-    if line_description.startswith("Annual Leave -"):
-        return extract_between(line_description, " of ", " for the week")
-    if line_description.startswith("Annual Leave Payout -"):
-        return extract_between(line_description, " of ", " on ")
-    return extract_between(line_description, "contracting services of ", " for the week")
-
-def extract_units_worked(line_description):
-    match = re.search(r"-\s*(\d+(?:\.\d+)?)\s*(?:day|hour)\(s\)", line_description, re.IGNORECASE)
-    
-    if match: return float(match.group(1))
-    else: return None
-    
+    except Exception as e:
+        print(f"❌ Streaming failed: {e}")
+        return False
 
+# --- Utilities ---
 def get_consultant_info_from_reference(reference):
     if not reference or "-" not in reference:
         return "", "", ""
@@ -272,331 +266,281 @@ def get_office_from_consultant_code(code):
     return "Sydney" if code.startswith("S") else "Perth" if code.startswith("P") else "Unknown"
 
 # --- Extractors ---
-def extract_invoice_lines(invoice, journal_amounts, journal_units):
-    rows = []
-    if invoice.get("Status") in ["DELETED", "VOIDED"]:
-        return [{
-            "InvoiceID": invoice.get("InvoiceID"),
-            "Status": invoice.get("Status"),
-            "Updated Date": parse_xero_date(invoice.get("UpdatedDateUTC", "")),
-            "__deleted__": True
-        }]
-
-    invoice_number = invoice.get("InvoiceNumber", "")
-    invoice_type = "Temp" if invoice_number.startswith("TC-") else "Perm"
-    contact = invoice.get("Contact", {})
-    parsed_date = parse_xero_date(invoice.get("Date", ""))
-    if not parsed_date:
-        return rows
-
-    invoice_month = parsed_date.strftime("%B")
-    invoice_week = week_of_company_month(parsed_date)
-    company_month = get_company_month(parsed_date)
-    company_quarter = quarters[company_month]
-    currency_rate = invoice.get("CurrencyRate", 1)
-    currency_code = invoice.get("CurrencyCode", "")
-    updated_date = parse_xero_date(invoice.get("UpdatedDateUTC", ""))
-    updated_date_str = updated_date.strftime("%-d/%-m/%Y") if updated_date else ""
-
-    line_items = invoice.get("LineItems", [])
-
-    if invoice_type == "Temp":
-        # Group lines by Key (contractor + week)
-        grouped_lines = {}
-        for line in line_items:
-            if not is_valid_line(line):
-                continue
-            description = line.get("Description", "")
-            contractor = (extract_contractor(invoice_type, description) or "").lower()
-            key = build_key(parsed_date.year, company_month, invoice_week, contractor)
-            grouped_lines.setdefault(key, []).append(line)
-
-        for key, lines in grouped_lines.items():
-            total_exgst = sum(line.get("LineAmount", 0) for line in lines)
-            journal_deduction = float(journal_amounts.get(key, 0) or 0)
-
-            # Sum units on THIS invoice for this key (base wage lines usually carry units)
-            invoice_units_for_key = 0.0
-            for line in lines:
-                u = extract_units_worked(line.get("Description", "")) or 0
-                invoice_units_for_key += float(u)
-
-            # Total units for this key across all manual journals
-            total_units_for_key = float(journal_units.get(key, 0) or 0)
-
-            # Cost allocated to THIS invoice for this key (avoid double-deducting)
-            if journal_deduction != 0 and total_units_for_key > 0 and invoice_units_for_key > 0:
-                invoice_cost_share = journal_deduction * (invoice_units_for_key / total_units_for_key)
-            else:
-                invoice_cost_share = journal_deduction if total_units_for_key == 0 else 0.0
-
-            # --- Existing per-line loop (with tweaked margin logic) ---
-            for line in lines:
-                tracking = line.get("Tracking", [])
-                office = consultant_code = consultant = area = ""
-                for t in tracking:
-                    if t.get("Name") == "Category":
-                        office = t.get("Option")
-                    elif t.get("Name") == "Consultant":
-                        consultant_code = t.get("Option")
-                        if consultant_code and " " in consultant_code:
-                            consultant = consultant_code.split(" ", 1)[1]
-
-                area = consultant_area_mapping.get(consultant_code, "")
-                subtotal = float(line.get("LineAmount", 0) or 0)
-                description = line.get("Description", "")
-                tax = float(line.get("TaxAmount", 0) or 0)
-                total = subtotal + tax
-                contractor = (extract_contractor(invoice_type, description) or "").lower()
-
-                proportion = (subtotal / total_exgst) if total_exgst else 0.0
-
-                if "program fee" in description.lower() or invoice_number.startswith("TC-INV"):
-                    margin = subtotal
-                elif invoice_cost_share != 0:
-                    margin = subtotal + (proportion * invoice_cost_share)
-                else:
-                    margin = ""
-
-                # Currency conversion AFTER margin is set
-                if currency_rate and currency_rate != 1:
-                    subtotal /= currency_rate
-                    total /= currency_rate
-                    if isinstance(margin, (int, float)):
-                        margin /= currency_rate
-
-                account_code = str(line.get("AccountCode", ""))
-                if account_code not in account_code_mapping:
-                    print(f"⚠️ Unknown account code: {account_code} in invoice {invoice_number}")
-                    continue
-
-                rows.append({
-                    "Year": parsed_date.year,
-                    "FinancialYear": get_financial_year(parsed_date),
-                    "Month": invoice_month,
-                    "FutureYou Month": company_month,
-                    "Week": invoice_week,
-                    "Invoice #": invoice_number,
-                    "Type": invoice_type,
-                    "To": contact.get("Name", ""),
-                    "Key": key,
-                    "Description": description,
-                    "Contractor": contractor,
-                    "Invoice Date": parsed_date.strftime("%-d/%-m/%Y"),
-                    "Invoice Total": round(total, 2),
-                    "EX GST": round(subtotal, 2),
-                    "Margin": round(margin, 2) if isinstance(margin, (int, float)) else "",
-                    "Office": office,
-                    "Consultant Code": consultant_code,
-                    "Consultant": consultant,
-                    "Area": area,
-                    "Account": account_code,
-                    "Account Name": account_code_mapping.get(account_code, ""),
-                    "# Placement": 0,
-                    "Currency Code": currency_code,
-                    "Currency Rate": currency_rate,
-                    "Updated Date": updated_date_str,
-                    "InvoiceID": invoice.get("InvoiceID", ""),
-                    "Quarter": company_quarter,
-                })
-    else:
-        valid_lines = [line for line in line_items if is_valid_line(line)]
-        if not valid_lines:
-            return rows
-
-        account_code = str(valid_lines[0].get("AccountCode", ""))
-        if account_code in ["225", "226","227"]: placement_total = 1/3
-        elif account_code == "240": placement_total = 0
-        else: placement_total = 1
-        total_exgst = sum(line.get("LineAmount", 0) for line in valid_lines)
-
-        for line in valid_lines:
-            tracking = line.get("Tracking", [])
-            office = consultant_code = consultant = area = ""
-            for t in tracking:
-                if t.get("Name") == "Category":
-                    office = t.get("Option")
-                elif t.get("Name") == "Consultant":
-                    consultant_code = t.get("Option")
-                    if consultant_code and " " in consultant_code:
-                        consultant = consultant_code.split(" ", 1)[1]
-            area = consultant_area_mapping.get(consultant_code, "")
-
-            subtotal = line.get("LineAmount", 0)
-            description = line.get("Description", "")
-            tax = line.get("TaxAmount", 0)
-            total = subtotal + tax
-            contractor = ""  # not used for perm
-            key = f"{parsed_date.year}:{company_month}:{invoice_week}:{contractor}"
-
-            # placement proportion
-            proportion = subtotal / total_exgst if total_exgst != 0 else 0
-            placement = proportion * placement_total
-            margin = subtotal
-
-            if currency_rate and currency_rate != 1:
-                subtotal /= currency_rate
-                total /= currency_rate
-                margin /= currency_rate
-
-            if account_code not in account_code_mapping:
-                print(f"⚠️ Unknown account code: {account_code} in invoice {invoice_number}")
-                continue
-
-            rows.append({
+EXPORT_ROW_KEYS = [
+    "Year", "FinancialYear", "Month", "FutureYou Month", "Week", "Invoice #", "Type", "To", "Key",
+    "Description", "Contractor", "Invoice Date", "Invoice Total", "EX GST", "Margin", "Office",
+    "Consultant Code", "Consultant", "Area", "Account", "Account Name", "# Placement",
+    "Currency Code", "Currency Rate", "Updated Date", "InvoiceID", "Quarter",
+]
+PLACEMENT_SHARE = {"225": 1/3, "226": 1/3, "227": 1/3, "240": 0}
+
+def date_columns(xero_date, cache):
+    """Year / month / calendar columns of a Xero date string, parsed once per distinct value."""
+    if xero_date not in cache:
+        parsed_date = parse_xero_date(xero_date)
+        if not parsed_date:
+            cache[xero_date] = None
+        else:
+            calendar_day = COMPANY_CALENDAR.lookup(parsed_date)
+            cache[xero_date] = {
                 "Year": parsed_date.year,
-                "FinancialYear": get_financial_year(parsed_date),
-                "Month": invoice_month,
-                "FutureYou Month": company_month,
-                "Week": invoice_week,
-                "Invoice #": invoice_number,
-                "Type": invoice_type,
-                "To": contact.get("Name", ""),
-                "Key": key,
-                "Description": description,
-                "Contractor": contractor,
+                "FinancialYear": calendar_day.financial_year,
+                "Month": parsed_date.strftime("%B"),
+                "FutureYou Month": calendar_day.month,
+                "Week": calendar_day.week,
                 "Invoice Date": parsed_date.strftime("%-d/%-m/%Y"),
-                "Invoice Total": round(total, 2),
-                "EX GST": round(subtotal, 2),
-                "Margin": round(margin, 2),
-                "Office": office,
-                "Consultant Code": consultant_code,
-                "Consultant": consultant,
-                "Area": area,
-                "Account": account_code,
-                "Account Name": account_code_mapping.get(account_code, ""),
-                "# Placement": round(placement, 6),
-                "Currency Code": currency_code,
-                "Currency Rate": currency_rate,
-                "Updated Date": updated_date_str,
-                "InvoiceID": invoice.get("InvoiceID", ""),
-                "Quarter": company_quarter,
-            })
-    return rows
-
-def extract_credit_note_lines(cn):
-    rows = []
-    if cn.get("Status") in ["DELETED", "VOIDED"]:
-        return rows
-
-    parsed_date = parse_xero_date(cn.get("Date", ""))
-    if not parsed_date:
-        return rows
-
-    currency_rate = cn.get("CurrencyRate", 1)
-    currency_code = cn.get("CurrencyCode", "")
-
-    for line in cn.get("LineItems", []):
-        subtotal = line.get("LineAmount", 0)
-        if round(subtotal, 2) == 0:
-            continue
+                "Quarter": calendar_day.quarter,
+            }
+    return cache[xero_date]
+
+def document_header(doc, number, dates):
+    """
+    Per-document columns shared by all its lines. None when the document has no date, or
+    its date is outside the company calendar — that document is logged and left out
+    rather than failing the whole sync (re-run with FULL_RESET once companyCalendar.json
+    covers it).
+    """
+    try:
+        columns = date_columns(doc.get("Date", ""), dates)
+    except ValueError as e:
+        print(f"⚠️ Skipping {number or 'unnumbered document'}: {e}")
+        return None
+    if not columns:
+        return None
+    # Only the formatted date is needed, so an edit made past the calendar's end is fine
+    updated = parse_xero_date(doc.get("UpdatedDateUTC")) if doc.get("UpdatedDateUTC") else None
+    return {
+        **columns,
+        "Invoice #": number,
+        "To": doc.get("Contact", {}).get("Name", ""),
+        "Currency Code": doc.get("CurrencyCode", ""),
+        "Currency Rate": doc.get("CurrencyRate", 1),
+        "Updated Date": updated.strftime("%-d/%-m/%Y") if updated else "",
+    }
 
-        account_code = str(line.get("AccountCode", ""))
-        if not account_code or account_code not in account_code_mapping:
+def flatten_lines(documents, headers):
+    """
+    One row per line item of the documents that have a header, joined to its document's
+    header columns. Columns are gathered straight from the line dicts in one pass (no
+    per-line DataFrame work); `_line` keeps the original line order.
+    """
+    items = [(position, line) for position, doc in enumerate(documents) if position in headers
+             for line in doc.get("LineItems") or []]
+    lines = pd.DataFrame({
+        "_doc": np.fromiter((position for position, _ in items), dtype=np.int64, count=len(items)),
+        "Description": [line.get("Description") or "" for _, line in items],
+        "LineAmount": pd.to_numeric(pd.Series([line.get("LineAmount", 0) for _, line in items], dtype=object)),
+        "TaxAmount": pd.to_numeric(pd.Series([line.get("TaxAmount", 0) for _, line in items], dtype=object)),
+        "AccountCode": [str(line.get("AccountCode") or "") for _, line in items],
+        "Tracking": [line.get("Tracking") or [] for _, line in items],
+    })
+    lines["LineAmount"] = lines["LineAmount"].fillna(0).astype(float)
+    lines["TaxAmount"] = lines["TaxAmount"].fillna(0).astype(float)
+    lines["_line"] = np.arange(len(lines))
+    header = pd.DataFrame(list(headers.values()), index=list(headers))
+    return lines.join(header, on="_doc")
+
+def tracking_options(lines, names=("Category", "Consultant")):
+    """{name: (found, option)} arrays — whether each line has that tracking, and its last option."""
+    found = {name: np.zeros(len(lines), dtype=bool) for name in names}
+    option = {name: np.full(len(lines), None, dtype=object) for name in names}
+    for row, line_tracking in enumerate(lines["Tracking"]):
+        for t in line_tracking:
+            name = t.get("Name")
+            if name in found:
+                found[name][row] = True
+                option[name][row] = t.get("Option")
+    return {name: (found[name], option[name]) for name in names}
+
+def currency_divisor(rates):
+    rates = pd.to_numeric(rates, errors="coerce")
+    return np.where(rates.notna() & (rates != 0) & (rates != 1), rates, 1.0)
+
+def consultant_names(codes, strip_commas=False):
+    """Name part of each consultant code ("SYD Jane Smith" → "Jane Smith"), derived once per distinct code."""
+    codes = pd.Series(codes, dtype=object)
+    names = {}
+    for code in codes.dropna().unique():
+        name = code.split(" ", 1)[1] if " " in code else ""
+        names[code] = name.strip(",") if strip_commas else name
+    return codes.map(names).fillna("").to_numpy(dtype=object)
+
+def rounded(values, digits=2):
+    """round(v, digits) for every value; np.round, with Python's exact round() for the few values near a half step."""
+    values = np.asarray(values, dtype=float)
+    result = np.round(values, digits)
+    scaled = values * 10 ** digits
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        result[i] = round(float(values[i]), digits)
+    return result.astype(object)
+
+def warn_unknown_accounts(frame):
+    for number, account in frame[["Invoice #", "Account"]].drop_duplicates().itertuples(index=False):
+        print(f"⚠️ Unknown account code: {account} in invoice {number}")
+
+def extract_invoice_lines(invoices, journal_index):
+    """
+    Export rows for a batch of invoices, built column-wise.
+
+    Every line item is flattened into one DataFrame; tracking, contractor, units and each
+    (invoice, contractor-week key) group's share of the manual-journal cost are computed
+    with grouped/vectorised ops rather than per-line loops. Returns (rows DataFrame with
+    EXPORT_ROW_KEYS columns, InvoiceIDs of deleted/voided invoices).
+    """
+    deleted_ids = []
+    headers, dates = {}, {}
+    for position, invoice in enumerate(invoices):
+        if invoice.get("Status") in ["DELETED", "VOIDED"]:
+            if invoice.get("InvoiceID"):
+                deleted_ids.append(invoice["InvoiceID"])
             continue
-
-        tracking = line.get("Tracking", [])
-        consultant_code = consultant = area = office = ""
-
-        for t in tracking:
-            if t.get("Name") == "Consultant":
-                consultant_code = t.get("Option")
-                if consultant_code and " " in consultant_code:
-                    consultant = consultant_code.split(" ", 1)[1].strip(",")
-            elif t.get("Name") == "Category":
-                office = t.get("Option")
-
-        if not consultant_code and not office:
+        number = invoice.get("InvoiceNumber", "")
+        header = document_header(invoice, number, dates)
+        if header:
+            headers[position] = {**header, "Type": "Temp" if number.startswith("TC-") else "Perm",
+                                 "InvoiceID": invoice.get("InvoiceID", "")}
+    if not headers:
+        return pd.DataFrame(columns=EXPORT_ROW_KEYS), deleted_ids
+
+    lines = flatten_lines(invoices, headers)
+    options = tracking_options(lines)
+    lines["Office"] = options["Category"][1]
+    lines["Consultant Code"] = options["Consultant"][1]
+    lines = lines[options["Category"][0] & options["Consultant"][0]].reset_index(drop=True)
+    if lines.empty:
+        return pd.DataFrame(columns=EXPORT_ROW_KEYS), deleted_ids
+
+    temp = lines["Type"].eq("Temp").to_numpy()
+    description = lines["Description"]
+    contractors, units_by_description = {}, {}
+    for d in description[temp].unique():
+        parsed = LINE_DESCRIPTIONS.parse(d)
+        contractors[d] = (parsed.contractor or "").lower()
+        units_by_description[d] = parsed.units or 0.0
+    lines["Contractor"] = np.where(temp, description.map(contractors), "")
+    allocation = journal_index.allocate(lines["Year"], lines["FutureYou Month"], lines["Week"], lines["Contractor"],
+                                        consuming=temp)
+    lines["Key"] = np.array([key.label() for key in allocation.keys], dtype=object)[allocation.codes]
+
+    amount = lines["LineAmount"]
+    # Temp: totals per (invoice, key) group; Perm: per invoice, account code of its first line
+    group = [lines["_doc"], np.where(temp, allocation.codes, -1)]
+    total_exgst = amount.groupby(group).transform("sum")
+    proportion = np.divide(amount, total_exgst, out=np.zeros(len(lines)), where=total_exgst.to_numpy() != 0)
+
+    deduction = allocation.amount
+    journal_units_for_key = allocation.units
+    units = description.map(units_by_description).fillna(0.0)
+    invoice_units = units.groupby(group).transform("sum").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shared = (deduction != 0) & (journal_units_for_key > 0) & (invoice_units > 0)
+        cost_share = np.where(shared, deduction * (invoice_units / journal_units_for_key),
+                              np.where(journal_units_for_key == 0, deduction, 0.0))
+
+    flat_margin = (description.str.lower().str.contains("program fee", regex=False)
+                   | lines["Invoice #"].str.startswith("TC-INV")).to_numpy()
+    margin = np.where(temp & ~flat_margin, amount + proportion * cost_share, amount)
+    blank_margin = temp & ~flat_margin & (cost_share == 0)
+
+    first_account = lines.drop_duplicates("_doc").set_index("_doc")["AccountCode"]
+    lines["Account"] = np.where(temp, lines["AccountCode"], lines["_doc"].map(first_account))
+    placement = proportion * lines["Account"].map(PLACEMENT_SHARE).fillna(1).to_numpy()
+
+    divisor = currency_divisor(lines["Currency Rate"])
+    lines["Invoice Total"] = rounded((amount + lines["TaxAmount"]) / divisor)
+    lines["EX GST"] = rounded(amount / divisor)
+    lines["Margin"] = np.where(blank_margin, "", rounded(pd.Series(margin / divisor)))
+    lines["# Placement"] = np.where(temp, 0, rounded(pd.Series(placement), 6))
+    lines["Consultant"] = consultant_names(lines["Consultant Code"])
+    lines["Area"] = lines["Consultant Code"].map(consultant_area_mapping).fillna("")
+
+    # Same order as the per-invoice loop: Temp lines grouped by key (first-seen order), Perm lines as listed
+    lines["_group"] = np.where(temp, lines["_line"].groupby(group).transform("min"), lines["_line"])
+
+    known = lines["Account"].isin(account_code_mapping)
+    if not known.all():
+        warn_unknown_accounts(lines[~known])
+    lines = lines[known].copy()
+    lines["Account Name"] = lines["Account"].map(account_code_mapping)
+
+    lines = lines.sort_values(["_doc", "_group", "_line"], kind="stable")
+    return lines[EXPORT_ROW_KEYS].reset_index(drop=True), deleted_ids
+
+def extract_credit_note_lines(credit_notes):
+    """Export rows (negated amounts) for a batch of credit notes, built column-wise like extract_invoice_lines."""
+    headers, dates = {}, {}
+    for position, cn in enumerate(credit_notes):
+        if cn.get("Status") in ["DELETED", "VOIDED"]:
             continue
-        
-        area = consultant_area_mapping.get(consultant_code, "")
-        tax = line.get("TaxAmount", 0)
-        total = subtotal + tax
-
-        # Apply currency conversion if needed
-        if currency_rate and currency_rate != 1:
-            subtotal /= currency_rate
-            total /= currency_rate
-
-        rows.append({
-            "Year": parsed_date.year,
-            "FinancialYear": get_financial_year(parsed_date),
-            "Month": parsed_date.strftime("%B"),
-            "FutureYou Month": get_company_month(parsed_date),
-            "Week": week_of_company_month(parsed_date),
-            "Invoice #": cn.get("CreditNoteNumber", ""),
-            "Type": "Perm" if len(cn.get("CreditNoteNumber", "")) == 8 else "Temp",
-            "To": cn.get("Contact", {}).get("Name", ""),
-            "Key": "",
-            "Description": line.get("Description", ""),
-            "Contractor": "",
-            "Invoice Date": parsed_date.strftime("%-d/%-m/%Y"),
-            "Invoice Total": -round(total, 2),
-            "EX GST": -round(subtotal, 2),
-            "Margin": -round(subtotal, 2),
-            "Office": office,
-            "Consultant Code": consultant_code,
-            "Consultant": consultant,
-            "Area": area,
-            "Account": account_code,
-            "Account Name": account_code_mapping.get(account_code, ""),
-            "# Placement": "",
-            "Currency Code": currency_code,
-            "Currency Rate": currency_rate,
-            "Updated Date": parse_xero_date(cn.get("UpdatedDateUTC", "")).strftime("%-d/%-m/%Y") if cn.get("UpdatedDateUTC") else "",
-            "InvoiceID": cn.get("CreditNoteID", ""),
-            "Quarter": quarters.get(get_company_month(parsed_date), ""),
-        })
-
-    return rows
+        number = cn.get("CreditNoteNumber", "")
+        header = document_header(cn, number, dates)
+        if header:
+            headers[position] = {**header, "Type": "Perm" if len(number) == 8 else "Temp",
+                                 "InvoiceID": cn.get("CreditNoteID", "")}
+    if not headers:
+        return pd.DataFrame(columns=EXPORT_ROW_KEYS)
+
+    lines = flatten_lines(credit_notes, headers)
+    options = tracking_options(lines)
+    lines["Office"] = np.where(options["Category"][0], options["Category"][1], "")
+    lines["Consultant Code"] = np.where(options["Consultant"][0], options["Consultant"][1], "")
+
+    keep = ((lines["LineAmount"].round(2) != 0)
+            & lines["AccountCode"].ne("") & lines["AccountCode"].isin(account_code_mapping)
+            & (lines["Consultant Code"].astype(bool) | lines["Office"].astype(bool)))
+    lines = lines[keep].reset_index(drop=True)
+    if lines.empty:
+        return pd.DataFrame(columns=EXPORT_ROW_KEYS)
+
+    divisor = currency_divisor(lines["Currency Rate"])
+    subtotal = lines["LineAmount"] / divisor
+    lines["Invoice Total"] = -rounded((lines["LineAmount"] + lines["TaxAmount"]) / divisor)
+    lines["EX GST"] = -rounded(subtotal)
+    lines["Margin"] = lines["EX GST"]
+    lines["Key"] = lines["Contractor"] = lines["# Placement"] = ""
+    lines["Consultant"] = consultant_names(lines["Consultant Code"], strip_commas=True)
+    lines["Area"] = lines["Consultant Code"].map(consultant_area_mapping).fillna("")
+    lines["Account"] = lines["AccountCode"]
+    lines["Account Name"] = lines["Account"].map(account_code_mapping)
+    return lines[EXPORT_ROW_KEYS]
 
 
 # --- API Fetch ---
-def fetch_all(endpoint, access_token, tenant_id, params=None):
-    all_results = []
-    params = params or {"page": 1, "pageSize": 1000}
-    while True:
-        res = requests.get(f"https://api.xero.com/api.xro/2.0/{endpoint}",
-                           headers={"Authorization": f"Bearer {access_token}", "Xero-tenant-id": tenant_id, "Accept": "application/json"},
-                           params=params)
-        if res.status_code != 200:
-            raise Exception(f"Fetch failed for {endpoint}: {res.status_code} - {res.text}")
-        data = res.json().get(endpoint, [])
-        if not data: break
-        all_results.extend(data)
-        params["page"] += 1
-    return all_results
+def fetch_all(endpoint, access_token, tenant_id, params=None, cache=None):
+    results = XeroClient(access_token, tenant_id).getAllPages(endpoint, params)
+    if cache:
+        cache.store(endpoint, params, results)
+    return results
 
 # --- Main Function ---
-def main():
+def main(replay=False, sink=None):
     clients = ["FUTUREYOU_CONTRACTING", "FUTUREYOU_RECRUITMENT"]
-    all_rows = []
-    manual_data = get_manual_journal_data()
-    # FUTUREYOU_CONTRACTING -> journal_totals dict by key
-    journal_amounts = {}
-    journal_units = {}
-
-    for row in manual_data["FUTUREYOU_CONTRACTING"]:
-        key = build_key(row["Year"], row["Month"], row["Week"], row.get("Contractor", ""))
-        amt = float(row.get("Line Amount", 0) or 0)
-        units_worked = float(row.get("Units Worked", 0) or 0)
-        account = int(row.get("Account Code", 0) or 0)
-        contractor = row.get("Contractor", "")
-        
-        if account == 826 and contractor != "":
-            # do not add super on
-            journal_amounts[key] = journal_amounts.get(key, 0)
-        else: journal_amounts[key] = journal_amounts.get(key, 0) + amt
-        journal_units[key] = journal_units.get(key, 0) + units_worked
-
+    all_rows = InvoiceRows()
+    manual_data = get_manual_journal_data(replay=replay)
+    # FUTUREYOU_CONTRACTING -> contractor cost and units by (year, month, week, contractor)
+    journal_index = JournalAllocationIndex.from_journal_rows(manual_data["FUTUREYOU_CONTRACTING"])
 
     # FUTUREYOU_RECRUITMENT -> add_on_lines as list of dicts
     add_on_lines = manual_data["FUTUREYOU_RECRUITMENT"]
-    updated_since = datetime.now(timezone.utc) - timedelta(days=1)
-    updated_date_str = f'DateTime({updated_since.year},{updated_since.month:02},{updated_since.day:02})'
+    if replay:
+        # A replay reproduces the recorded run: the sync store is neither read nor written
+        syncs = {}
+    else:
+        sync_state = getSyncState("futureyou-458212", "InvoiceData", os.getenv("FUTUREYOU_BQACCESS"))
+        syncs = {client: IncrementalSync(sync_state, client) for client in clients}
     for client in clients:
+        cache = XeroResponseCache(client)
+        if replay:
+            # Rebuild from the last recorded fetch — no Xero calls at all
+            invoices = cache.load("Invoices")
+            credit_notes = cache.load("CreditNotes")
+            all_rows.extend_frame(*extract_invoice_lines(invoices, journal_index))
+            all_rows.extend_frame(extract_credit_note_lines(credit_notes))
+            continue
+
+        sync = syncs[client]
         access_token = getXeroAccessToken(client)
-        tenant_id = XeroTenants(access_token)
+        tenant_id = getXeroTenantId(client, access_token)
         if FULL_RESET:
             invoice_params = {
                 "where": 'Type=="ACCREC" AND Date>=DateTime(2024,07,01)',
@@ -610,39 +554,60 @@ def main():
             }
         else:
             invoice_params = {
-                "where": f'Type=="ACCREC" AND UpdatedDateUTC>={updated_date_str}',
+                "where": sync.where("Invoices", 'Type=="ACCREC"'),
                 "page": 1,
                 "pageSize": 1000
             }
             credit_params = {
-                "where": f'UpdatedDateUTC>={updated_date_str}',
+                "where": sync.where("CreditNotes"),
                 "page": 1,
                 "pageSize": 1000
             }
 
-        invoices = fetch_all("Invoices", access_token, tenant_id, invoice_params)
-        credit_notes = fetch_all("CreditNotes", access_token, tenant_id, credit_params)
+        invoices = sync.observe("Invoices", fetch_all("Invoices", access_token, tenant_id, invoice_params, cache))
+        credit_notes = sync.observe("CreditNotes", fetch_all("CreditNotes", access_token, tenant_id, credit_params, cache))
 
-        for inv in invoices: all_rows.extend(extract_invoice_lines(inv, journal_amounts, journal_units))
-        for cn in credit_notes: all_rows.extend(extract_credit_note_lines(cn))
-            
+        all_rows.extend_frame(*extract_invoice_lines(invoices, journal_index))
+        all_rows.extend_frame(extract_credit_note_lines(credit_notes))
+
+    if FULL_RESET:
+        # Incremental runs only see re-synced invoices, so most journal keys are legitimately unmatched
+        journal_index.report_unmatched()
+
+    # Manual add-on lines are re-read in full each run; only keep those changed since the journal watermark.
+    # The cutoff is recorded with the cached responses so a replay filters exactly as the run did.
+    journal_cache = XeroResponseCache("FUTUREYOU_RECRUITMENT")
+    if replay:
+        note = journal_cache.loadNote("addOnCutoff")
+        journals_since = datetime.fromisoformat(note["since"]).date() if note and note.get("since") else None
+        if note is None:
+            print("⚠️ No recorded add-on cutoff — replaying every manual add-on line")
+    else:
+        journal_sync = syncs["FUTUREYOU_RECRUITMENT"]
+        journals_since = None if FULL_RESET else journal_sync.since("ManualJournals").date()
+        journal_sync.observe("ManualJournals", add_on_lines, field="Updated Date")
+        journal_cache.storeNote("addOnCutoff", {"since": journals_since.isoformat() if journals_since else None})
     for row in add_on_lines:
-        if not FULL_RESET and row.get("Updated Date") and row["Updated Date"] < updated_since.date():
+        if journals_since and row.get("Updated Date") and row["Updated Date"] < journals_since:
             continue
         date = row.get("Date")
         if isinstance(date, str): date = pd.to_datetime(date, dayfirst=True, errors="coerce")
         if pd.isna(date): continue
         
-        financial_year = get_financial_year(date)
+        try:
+            calendar_day = COMPANY_CALENDAR.lookup(date)
+        except ValueError as e:
+            print(f"⚠️ Skipping add-on line {row.get('Key', '')}: {e}")
+            continue
         currency_rate = 1
         subtotal = float(row["Line Amount"] or 0)
         total = subtotal
         if subtotal == 0: continue
-        all_rows.append({
+        all_rows.extend([{
             "Year": row["Year"],
-            "FinancialYear": financial_year,
+            "FinancialYear": calendar_day.financial_year,
             "Month": row["Month"],
-            "FutureYou Month": get_company_month(date),
+            "FutureYou Month": calendar_day.month,
             "Week": row["Week"],
             "Invoice #": "",
             "Type": "Perm",
@@ -665,13 +630,70 @@ def main():
             "Currency Rate": currency_rate,
             "Updated Date": pd.to_datetime(row["Updated Date"]).strftime("%-d/%-m/%Y") if pd.notna(row["Updated Date"]) else "",
             "InvoiceID": row.get("InvoiceID", ""),
-            "Quarter": quarters.get(get_company_month(date), ""),
-        })
+            "Quarter": calendar_day.quarter,
+        }])
 
-    # You can keep or remove the CSV export
-    # export_to_csv(all_rows)
-    export_to_bigquery(all_rows)
-    writeGithubSummary(all_rows)
+    table = all_rows.table()
+    if sink is not None:
+        exported = stream_to_bigquery(table, all_rows.deleted_ids, sink)
+    else:
+        exported = export_to_bigquery(table, all_rows.deleted_ids)
+    if exported and not (sink is not None and isinstance(sink.writer, FakeStreamWriter)):
+        refresh_rollups(table)
+    if exported and not replay:
+        for sync in syncs.values():
+            sync.commit()
+    if replay:
+        mode = "replay of the recorded Xero responses"
+    elif FULL_RESET:
+        mode = "full reload (invoices since 1 Jul 2024)"
+    else:
+        mode = "incremental sync (Xero changes since each client's last committed watermark)"
+    writeGithubSummary(table, len(all_rows.deleted_ids), mode)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="FutureYou invoice export to BigQuery")
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Rebuild from the local Xero response cache (.xeroCache) without calling the Xero API"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream rows into InvoiceEnquiry through the Storage Write API instead of the batch MERGE"
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="MINUTES",
+        help="Keep running as a sync worker, streaming changes every MINUTES (implies --stream)"
+    )
+    parser.add_argument(
+        "--fake-writer",
+        action="store_true",
+        help="Stream into an in-memory fake writer instead of BigQuery (local testing)"
+    )
+    args = parser.parse_args()
+
+    if not (args.stream or args.watch):
+        main(replay=args.replay)
+    else:
+        with open_stream_sink(fake=args.fake_writer) as sink:
+            if not args.watch:
+                main(replay=args.replay, sink=sink)
+            failures = 0
+            while args.watch:
+                # A failed cycle (Xero outage, expired token, BigQuery error) must not kill the worker
+                try:
+                    main(replay=args.replay, sink=sink)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    print(f"❌ Sync cycle failed ({failures} in a row): {e}")
+                    traceback.print_exc()
+                delay = args.watch * min(2 ** failures, WATCH_MAX_BACKOFF)
+                print(f"⏳ Next sync in {delay:g} minutes")
+                time.sleep(delay * 60)
+                # Recruiters added or moved between areas since the last cycle
+                refresh_consultant_area_mapping()
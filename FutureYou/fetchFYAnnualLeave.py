@@ -1,10 +1,8 @@
-import requests
 import sys
 import os
 import base64
 import pandas as pd
 from google.cloud import bigquery
-from google.oauth2 import service_account
 import json
 import calendar as cal_module
 from datetime import date, timedelta
@@ -15,23 +13,17 @@ EXCLUDED_EMPLOYEES = {"Alison Kleuver", "Sarah Thompson", "Samaira Bhojani"}
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
+from helpers.xeroClient import XeroClient, XERO_PAYROLL_URL
 from helpers.dateStringsHelper import parse_xero_date
 from helpers.emailAttachment import sendEmail
+from helpers.gcpClients import bigQueryClient
 
 with open(os.path.join(os.path.dirname(__file__), "LeaveTypes.json"), "r") as f:
     _leave_type_data = json.load(f)
 LEAVE_TYPE_MAP = {lt["LeaveTypeID"]: lt["Name"] for lt in _leave_type_data.get("LeaveTypes", [])}
 
 
-def build_headers(access_token, tenant_id):
-    return {
-        "Authorization": f"Bearer {access_token}",
-        "Xero-tenant-id": tenant_id,
-        "Accept": "application/json"
-    }
-
 def upload_to_bigquery(df, key):
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Data passed to upload_to_bigquery must be a DataFrame.")
@@ -41,8 +33,7 @@ def upload_to_bigquery(df, key):
     dataset_id = "FinanceData"
     table_id = "AnnualLeave" if key == "annual_leave" else "LeaveApplications"
 
-    credentials = service_account.Credentials.from_service_account_file(key_path)
-    client = bigquery.Client(credentials=credentials, project=project_id)
+    client = bigQueryClient(project_id, key_path)
     table_ref = f"{project_id}.{dataset_id}.{table_id}"
 
     job_config = bigquery.LoadJobConfig(
@@ -59,9 +50,8 @@ def upload_to_bigquery(df, key):
     
 # 🧾 Function to fetch employees from Xero Payroll API
 def fetchEmployeeList(access_token, tenant_id):
-    url = "https://api.xero.com/payroll.xro/1.0/Employees"
-    headers = build_headers(access_token, tenant_id)
-    response = requests.get(url, headers=headers)
+    client = XeroClient(access_token, tenant_id, base_url=XERO_PAYROLL_URL)
+    response = client.get("Employees")
 
     if response.status_code == 200:
         employees = response.json().get("Employees", [])
@@ -72,6 +62,7 @@ def fetchEmployeeList(access_token, tenant_id):
         return []
     
 def fetchAllEmployeeAnnualLeave(access_token, tenant_id, employee_list):
+    client = XeroClient(access_token, tenant_id, base_url=XERO_PAYROLL_URL)
     results = []
 
     for employee in employee_list:
@@ -84,9 +75,7 @@ def fetchAllEmployeeAnnualLeave(access_token, tenant_id, employee_list):
         state = employee.get("EmployeeGroupName", "Unknown")
 
         # Fetch single employee record (with LeaveBalances)
-        url = f"https://api.xero.com/payroll.xro/1.0/Employees/{employee_id}"
-        headers = build_headers(access_token, tenant_id)
-        response = requests.get(url, headers=headers)
+        response = client.get(f"Employees/{employee_id}")
         if response.status_code != 200:
             print(f"❌ Failed to fetch {name}: {response.status_code} - {response.text}")
             continue
@@ -114,9 +103,8 @@ def fetchAllEmployeeAnnualLeave(access_token, tenant_id, employee_list):
 
 
 def fetchLeaveApplications(access_token, tenant_id, employees):
-    url = "https://api.xero.com/payroll.xro/1.0/LeaveApplications"
-    headers = build_headers(access_token, tenant_id)
-    response = requests.get(url, headers=headers)
+    client = XeroClient(access_token, tenant_id, base_url=XERO_PAYROLL_URL)
+    response = client.get("LeaveApplications")
     if response.status_code != 200:
         print(f"❌ Failed to fetch leave applications: {response.status_code}")
         return pd.DataFrame()
@@ -386,7 +374,7 @@ def main():
     for c in clients:
         print(f"\n🔍 Fetching employees for: {c}")
         access_token = getXeroAccessToken(c)
-        tenant_id = XeroTenants(access_token)
+        tenant_id = getXeroTenantId(c, access_token)
         employeeList = fetchEmployeeList(access_token, tenant_id)
 
         annual_leave_df = fetchAllEmployeeAnnualLeave(access_token, tenant_id, employeeList)
@@ -1,14 +1,13 @@
 from flask import Flask, request, jsonify
 import sys
 import os
+import time
+import threading
 from flask_cors import CORS
 from functools import wraps
 import jwt
 from datetime import datetime, timedelta, timezone
 from google.cloud import bigquery
-from google.cloud import firestore
-from google.oauth2 import service_account
-import pandas_gbq
 from datetime import datetime
 import pytz
 from dotenv import load_dotenv
@@ -18,30 +17,88 @@ project_id = "futureyou-458212"
 FIRESTORE_KEY_PATH = os.getenv("FUTUREYOU_FIRESTOREACCESS")
 BQACCESS_KEY_PATH = os.getenv("FUTUREYOU_BQACCESS")
 
-# Firestore Client
-if FIRESTORE_KEY_PATH and os.path.exists(FIRESTORE_KEY_PATH):
-    print("🔐 Using Firestore service account file for local dev")
-    db = firestore.Client.from_service_account_json(FIRESTORE_KEY_PATH, project=project_id, database="futureyou")
-else:
+class LazyClient:
+    """Builds the wrapped client on first attribute access, so cold starts don't wait on credentials."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+
+    def __getattr__(self, name):
+        if self._instance is None:
+            self._instance = self._factory()
+        return getattr(self._instance, name)
+
+
+class CostLoggingClient:
+    """
+    bigquery.Client wrapper that logs one "📈 <statement>: bytes, slot-ms, wall" line per
+    query job after each request — the same line helpers/bigQueryCost.py logs for the
+    admin backend (this backend's Docker context can't import helpers/).
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._pending = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def query(self, query, *args, **kwargs):
+        job = self._client.query(query, *args, **kwargs)
+        if not hasattr(self._pending, "jobs"):
+            self._pending.jobs = []
+        self._pending.jobs.append((" ".join(query.split())[:60], job, time.perf_counter()))
+        return job
+
+    def settle(self):
+        jobs, self._pending.jobs = getattr(self._pending, "jobs", []), []
+        for label, job, started in jobs:
+            if job.state != "DONE":
+                continue
+            wall_s = (job.ended - job.started).total_seconds() if job.started and job.ended else time.perf_counter() - started
+            status = f"❌ {job.error_result.get('message')}" if job.error_result else "done"
+            print(f"📈 {label}: {job.total_bytes_processed or 0:,} bytes processed, "
+                  f"{job.slot_millis or 0:,} slot-ms, {wall_s:.2f}s ({status})")
+
+
+def _firestore_client():
+    from google.cloud import firestore
+    if FIRESTORE_KEY_PATH and os.path.exists(FIRESTORE_KEY_PATH):
+        print("🔐 Using Firestore service account file for local dev")
+        return firestore.Client.from_service_account_json(FIRESTORE_KEY_PATH, project=project_id, database="futureyou")
     print("✅ Using default Firestore credentials (e.g., Cloud Run)")
-    db = firestore.Client(project=project_id, database="futureyou")
-
-# BigQuery Client
-if BQACCESS_KEY_PATH and os.path.exists(BQACCESS_KEY_PATH):
-    print("🔐 Using BigQuery service account file for local dev")
-    credentials = service_account.Credentials.from_service_account_file(
-        BQACCESS_KEY_PATH,
-        scopes=["https://www.googleapis.com/auth/bigquery"]
-    )
-    client = bigquery.Client(credentials=credentials, project=project_id)
-else:
+    return firestore.Client(project=project_id, database="futureyou")
+
+
+def _bigquery_client():
+    if BQACCESS_KEY_PATH and os.path.exists(BQACCESS_KEY_PATH):
+        from google.oauth2 import service_account
+        print("🔐 Using BigQuery service account file for local dev")
+        credentials = service_account.Credentials.from_service_account_file(
+            BQACCESS_KEY_PATH,
+            scopes=["https://www.googleapis.com/auth/bigquery"]
+        )
+        return CostLoggingClient(bigquery.Client(credentials=credentials, project=project_id))
     print("✅ Using default BigQuery credentials (e.g., Cloud Run)")
-    client = bigquery.Client(project=project_id)
+    return CostLoggingClient(bigquery.Client(project=project_id))
+
+
+db = LazyClient(_firestore_client)
+client = LazyClient(_bigquery_client)
 
 
 app = Flask(__name__)
 CORS(app)  # Allow CORS for local frontend development
 
+
+@app.after_request
+def _log_query_costs(response):
+    # One "📈 <statement>: bytes, slot-ms, wall" log line per BigQuery job this request ran
+    if client._instance is not None:
+        client.settle()
+    return response
+
 # 🔐 Secret key for encoding the token
 SECRET_KEY = os.getenv("FUTUREYOU_FORECAST_SECRET_KEY")
 
@@ -50,13 +107,41 @@ recruiter_dataset_id = "RecruiterForecasts"
 revenue_dataset_id = "InvoiceData"
 revenue_table_id = "InvoiceEnquiry"
 table_id = "RecruiterForecasts"
-staging_table_id = "StagingTable"
 target_table_id = "MonthlyTargets"
 
-STAGING_TABLE = f"{project_id}.{recruiter_dataset_id}.{staging_table_id}"
 MAIN_TABLE = f"{project_id}.{recruiter_dataset_id}.{table_id}"
 REVENUE_TABLE = f"{project_id}.{revenue_dataset_id}.{revenue_table_id}"
 TARGET_TABLE = f"{project_id}.{recruiter_dataset_id}.{target_table_id}"
+# Rollups kept by the invoice ETL / target uploads (FutureYou/revenueRollups.py)
+CURRENT_TARGET_TABLE = f"{project_id}.{recruiter_dataset_id}.MonthlyTargetsCurrent"
+MARGIN_ROLLUP_TABLE = f"{project_id}.{revenue_dataset_id}.ConsultantMarginRollup"
+
+_current_targets_ready = False
+
+
+def ensure_current_targets():
+    """
+    Build MonthlyTargetsCurrent from the MonthlyTargets history the first time this process
+    touches it, if the invoice ETL hasn't created it yet (a no-op DDL once it exists).
+    """
+    global _current_targets_ready
+    if not _current_targets_ready:
+        client.query(f"""
+        CREATE TABLE IF NOT EXISTS `{CURRENT_TARGET_TABLE}` CLUSTER BY FinancialYear AS
+        SELECT FinancialYear, Month, Target, uploadUser, uploadTimestamp, uploadTimeRaw
+        FROM `{TARGET_TABLE}`
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY FinancialYear, Month ORDER BY uploadTimeRaw DESC) = 1
+        """).result()
+        _current_targets_ready = True
+
+
+# RecruiterForecasts columns — an upload is passed to its MERGE as one ARRAY<STRUCT> parameter
+FORECAST_COLUMNS = [
+    ("key", "STRING"), ("fy", "STRING"), ("month", "STRING"), ("week", "INT64"),
+    ("range", "STRING"), ("revenue", "INT64"), ("tempRevenue", "INT64"), ("notes", "STRING"),
+    ("name", "STRING"), ("uploadMonth", "STRING"), ("uploadWeek", "INT64"), ("uploadYear", "INT64"),
+    ("uploadTimestamp", "STRING"), ("uploadUser", "STRING"),
+]
 
 aest = pytz.timezone("Australia/Sydney")
 
@@ -205,7 +290,6 @@ def admin_required(f):
 @token_required
 def test_receive_forecasts():
     try:
-        client.query(f"TRUNCATE TABLE `{STAGING_TABLE}`").result()
         data = request.get_json()
         forecasts = data.get("forecasts")
         recruiterName = forecasts[0]["name"] if forecasts else None
@@ -213,11 +297,12 @@ def test_receive_forecasts():
         # ✅ Add "key" and sanitize fields
         for entry in forecasts:
             entry["key"] = f"{entry['fy']}:{entry['month']}:{entry['week']}:{entry['name']}"
+            entry["week"] = int(entry["week"])
             entry["revenue"] = int(entry.get("revenue", 0) or 0)
             entry["tempRevenue"] = int(entry.get("tempRevenue", 0) or 0)
             entry["uploadMonth"] = entry.get("uploadMonth", "")
             entry["uploadWeek"] = int(entry.get("uploadWeek", 0) or 0)
-            entry["uploadYear"] = entry.get("uploadYear", 0) or 0
+            entry["uploadYear"] = int(entry.get("uploadYear", 0) or 0)
         
             entry["uploadTimestamp"] = datetime.now(aest).strftime("%-I:%M%p %-d/%-m/%Y").lower()
             entry['uploadUser'] = entry.get("uploadUser", "Kermit the Frog")
@@ -225,14 +310,19 @@ def test_receive_forecasts():
 
         print(f"✅ Received {len(forecasts)} rows for {recruiterName}.")
 
-        insert_errors = client.insert_rows_json(STAGING_TABLE, forecasts)
-        if insert_errors:
-            print("❌ BigQuery insert errors:", insert_errors)
-            return jsonify({"error": insert_errors}), 400
+        if not forecasts:
+            return jsonify({"success": True, "message": "No forecast records to update."})
 
+        # Single MERGE straight from the request rows — no shared staging table to clobber
+        rows_param = bigquery.ArrayQueryParameter("rows", "STRUCT", [
+            bigquery.StructQueryParameter(
+                None, *[bigquery.ScalarQueryParameter(col, typ, entry.get(col)) for col, typ in FORECAST_COLUMNS]
+            )
+            for entry in forecasts
+        ])
         merge_query = f"""
             MERGE `{MAIN_TABLE}` T
-            USING `{STAGING_TABLE}` S
+            USING (SELECT * FROM UNNEST(@rows)) S
             ON T.key = S.key
             AND T.uploadMonth = S.uploadMonth
             AND T.uploadWeek = S.uploadWeek
@@ -257,7 +347,7 @@ def test_receive_forecasts():
             VALUES (S.`key`, S.fy, S.month, S.week, S.`range`, S.revenue, S.tempRevenue, S.notes, S.name, S.uploadMonth, S.uploadWeek, S.uploadYear, S.uploadTimestamp, S.uploadUser)
         """
 
-        client.query(merge_query).result()
+        client.query(merge_query, job_config=bigquery.QueryJobConfig(query_parameters=[rows_param])).result()
 
         return jsonify({
             "success": True,
@@ -467,22 +557,34 @@ def submit_monthly_target():
         local_dt = utc_dt.astimezone(aest)
         formatted_timestamp = local_dt.strftime("%-I:%M%p %-d/%-m/%Y").lower()
 
-        table_ref = client.dataset("RecruiterForecasts").table("MonthlyTargets")
-        table = client.get_table(table_ref)
-
-        row = {
-            "FinancialYear": fy,
-            "Month": month,
-            "Target": target,
-            "uploadUser": upload_user,
-            "uploadTimestamp": formatted_timestamp,
-            "uploadTimeRaw": raw_timestamp,
-        }
+        # Append to the history and upsert the latest-per-month table in one transaction
+        query = f"""
+        BEGIN TRANSACTION;
+        INSERT INTO `{TARGET_TABLE}` (FinancialYear, Month, Target, uploadUser, uploadTimestamp, uploadTimeRaw)
+        VALUES (@fy, @month, @target, @user, @ts, @raw);
+        MERGE `{CURRENT_TARGET_TABLE}` T
+        USING (SELECT @fy AS FinancialYear, @month AS Month, @target AS Target,
+                      @user AS uploadUser, @ts AS uploadTimestamp, @raw AS uploadTimeRaw) S
+        ON T.FinancialYear = S.FinancialYear AND T.Month = S.Month
+        WHEN MATCHED AND T.uploadTimeRaw <= S.uploadTimeRaw THEN
+          UPDATE SET Target = S.Target, uploadUser = S.uploadUser,
+                     uploadTimestamp = S.uploadTimestamp, uploadTimeRaw = S.uploadTimeRaw
+        WHEN NOT MATCHED THEN INSERT ROW;
+        COMMIT TRANSACTION;
+        """
 
-        errors = client.insert_rows_json(table, [row])
-        if errors:
-            print("❌ Insert errors:", errors)
-            return jsonify({"success": False, "error": str(errors)}), 500
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("fy", "STRING", fy),
+                bigquery.ScalarQueryParameter("month", "STRING", month),
+                bigquery.ScalarQueryParameter("target", "FLOAT64", float(target)),
+                bigquery.ScalarQueryParameter("user", "STRING", upload_user),
+                bigquery.ScalarQueryParameter("ts", "STRING", formatted_timestamp),
+                bigquery.ScalarQueryParameter("raw", "STRING", raw_timestamp),
+            ]
+        )
+        ensure_current_targets()
+        client.query(query, job_config=job_config).result()
 
         return jsonify({"success": True, "message": "Monthly target submitted."})
     except Exception as e:
@@ -499,9 +601,8 @@ def get_monthly_targets():
 
     query = f"""
     SELECT Month, Target, uploadTimestamp, uploadTimeRaw, uploadUser
-    FROM `{TARGET_TABLE}`
+    FROM `{CURRENT_TARGET_TABLE}`
     WHERE FinancialYear = @fy
-    QUALIFY ROW_NUMBER() OVER (PARTITION BY Month ORDER BY uploadTimeRaw DESC) = 1
     ORDER BY
       CASE
         WHEN Month = 'Jan' THEN 1
@@ -524,6 +625,7 @@ def get_monthly_targets():
     )
 
     try:
+        ensure_current_targets()
         results = client.query(query, job_config=job_config).result()
         return jsonify([dict(row) for row in results])
     except Exception as e:
@@ -538,14 +640,15 @@ def get_consultant_margins():
     if not fy:
         return jsonify({"error": "Missing 'fy'"}), 400
 
+    # Both queries read the consultant × month × week rollup, not the raw invoice lines
     # Query 1: Consultant totals (unchanged – keep if you still use it elsewhere)
-    query1 = """
+    query1 = f"""
     SELECT 
       Consultant,
       Area,
       SUM(Margin) AS TotalMargin,
       Quarter
-    FROM `futureyou-458212.InvoiceData.InvoiceEnquiry`
+    FROM `{MARGIN_ROLLUP_TABLE}`
     WHERE FinancialYear = @fy
     GROUP BY Consultant, Quarter, Area
     ORDER BY TotalMargin DESC
@@ -554,7 +657,7 @@ def get_consultant_margins():
     # Query 2: Consultant + Type totals WITH Quarter + Month
     # - MonthName: the original FutureYouMonth (e.g., 'Aug')
     # - Month: numeric calendar month 1..12 (helps sorting if needed)
-    query2 = """
+    query2 = f"""
     SELECT
       Consultant,
       Area,
@@ -569,7 +672,7 @@ def get_consultant_margins():
         WHEN 'Oct' THEN 10 WHEN 'Nov' THEN 11 WHEN 'Dec' THEN 12
         ELSE NULL
       END AS Month
-    FROM `futureyou-458212.InvoiceData.InvoiceEnquiry`
+    FROM `{MARGIN_ROLLUP_TABLE}`
     WHERE FinancialYear = @fy
     GROUP BY Consultant, Area, Type, Quarter, MonthName, Month
     ORDER BY Consultant, Type, Quarter, Month
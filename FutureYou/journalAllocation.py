@@ -0,0 +1,113 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+class JournalKey(namedtuple("JournalKey", ["year", "month", "week", "contractor"])):
+    """(calendar year, company month, week, contractor) — the grain manual-journal costs are booked at."""
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, year, month, week, contractor):
+        return cls(int(year), str(month), int(week), (contractor or "").strip().lower())
+
+    def label(self):
+        """The export "Key" column, e.g. "2024:Aug:1:jane smith"."""
+        return f"{self.year}:{self.month}:{self.week}:{self.contractor}"
+
+
+class JournalCost:
+    __slots__ = ("amount", "units", "matched")
+
+    def __init__(self):
+        self.amount = 0.0
+        self.units = 0.0
+        self.matched = False
+
+
+Allocation = namedtuple("Allocation", ["codes", "keys", "amount", "units"])
+
+
+class JournalAllocationIndex:
+    """
+    Manual-journal cost and units per JournalKey, for allocating contractor cost to Temp
+    invoice lines.
+
+    allocate() takes a whole batch of lines at once: their (year, month, week,
+    contractor) columns are factorised, each distinct key is looked up once, and the
+    results are spread back to the lines with numpy indexing — no per-line key strings.
+    Keys that some Temp line consumed are marked matched; unmatched() lists the journal
+    cost no invoice picked up.
+    """
+
+    def __init__(self):
+        self.costs = {}
+
+    @classmethod
+    def from_journal_rows(cls, rows):
+        index = cls()
+        for row in rows:
+            index.add(
+                row["Year"], row["Month"], row["Week"], row.get("Contractor", ""),
+                float(row.get("Line Amount", 0) or 0),
+                float(row.get("Units Worked", 0) or 0),
+                int(row.get("Account Code", 0) or 0),
+            )
+        return index
+
+    def add(self, year, month, week, contractor, amount, units, account=0):
+        key = JournalKey.of(year, month, week, contractor)
+        cost = self.costs.get(key)
+        if cost is None:
+            cost = self.costs[key] = JournalCost()
+        if not (account == 826 and contractor != ""):
+            # super (826) on a named contractor is not part of their cost
+            cost.amount += amount
+        cost.units += units
+
+    def allocate(self, years, months, weeks, contractors, consuming=None):
+        """
+        Allocation(codes, keys, amount, units) for a batch of lines: a key code per line,
+        the distinct JournalKeys, and each line's journal amount and units (0 when the key
+        has no journal). consuming (bool array) limits which lines mark their key matched.
+        """
+        columns = [np.asarray(values, dtype=object) for values in (years, months, weeks, contractors)]
+        combined = np.zeros(len(columns[0]), dtype=np.int64)
+        for values in columns:
+            column_codes, distinct = pd.factorize(values)
+            combined = combined * len(distinct) + column_codes
+        codes, distinct_combined = pd.factorize(combined)
+        first = np.empty(len(distinct_combined), dtype=np.int64)
+        first[codes[::-1]] = np.arange(len(codes))[::-1]
+        keys = [JournalKey.of(*values) for values in zip(*(values[first] for values in columns))]
+        amounts = np.zeros(len(keys))
+        units = np.zeros(len(keys))
+        for position, key in enumerate(keys):
+            cost = self.costs.get(key)
+            if cost is not None:
+                amounts[position] = cost.amount
+                units[position] = cost.units
+
+        used = codes if consuming is None else codes[np.asarray(consuming, dtype=bool)]
+        for position in np.unique(used):
+            cost = self.costs.get(keys[position])
+            if cost is not None:
+                cost.matched = True
+        return Allocation(codes, keys, amounts[codes], units[codes])
+
+    def unmatched(self):
+        """[(JournalKey, JournalCost)] with cost or units that no allocated line consumed, largest first."""
+        unmatched = [(k, c) for k, c in self.costs.items() if not c.matched and (c.amount or c.units)]
+        return sorted(unmatched, key=lambda item: -abs(item[1].amount))
+
+    def report_unmatched(self, limit=10):
+        unmatched = self.unmatched()
+        if not unmatched:
+            print("✅ Every manual-journal contractor cost matched an invoice line.")
+            return unmatched
+        total = sum(cost.amount for _, cost in unmatched)
+        print(f"⚠️ {len(unmatched)} manual-journal key(s) (${total:,.2f}) matched no Temp invoice line:")
+        for key, cost in unmatched[:limit]:
+            print(f"   {key.label()}: ${cost.amount:,.2f}, {cost.units:g} units")
+        return unmatched
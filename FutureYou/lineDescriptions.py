@@ -0,0 +1,107 @@
+import re
+from collections import namedtuple
+
+# Base Wage lines name the contractor after the first of these (in this order) that appears
+BASE_WAGE_KINDS = [
+    ("Public Holiday of ", "Public Holiday"),
+    ("personal leave of ", "Personal Leave"),
+    ("sick leave of ", "Sick Leave"),
+    ("contracting services of ", ""),
+    ("payment in lieu of notice of ", "Payment in Lieu of Notice"),
+]
+BASE_WAGE_KEYWORDS = re.compile("|".join(re.escape(keyword) for keyword, _ in BASE_WAGE_KINDS))
+BASE_WAGE_RANK = {keyword: rank for rank, (keyword, _) in enumerate(BASE_WAGE_KINDS)}
+LEAVE_TYPES = dict(BASE_WAGE_KINDS)
+
+UNITS = re.compile(r"-\s*(\d+(?:\.\d+)?)\s*(?:day|hour)\(s\)", re.IGNORECASE)
+JOURNAL_FIELDS = re.compile(r"^[^:]*:([^:]*)(?::([^:]*))?")
+
+CACHE_LIMIT = 200_000
+
+LineDescription = namedtuple("LineDescription", ["contractor", "leave_type", "units"])
+
+
+def _between(text, start_kw, end_kw, start=None):
+    start = text.find(start_kw) if start is None else start
+    if start == -1: return None
+    start += len(start_kw)
+    end = text.find(end_kw, start)
+    return text[start:end].strip() if end != -1 else None
+
+
+class LineDescriptionParser:
+    """
+    Contractor, leave type and units from a Temp invoice line description, e.g.
+    "Base Wage - sick leave of Jane Smith for the week ending 02/08/2024 - 7.6 hour(s)"
+    → ("Jane Smith", "Sick Leave", 7.6).
+
+    One scan of the description with a compiled keyword pattern finds which Base Wage
+    kind it is (the first in BASE_WAGE_KINDS order, as before) and where the name
+    starts; units come from one regex search. Results are cached per description —
+    weekly contractor invoices repeat the same phrases, so most lines are a dict hit.
+    contractor / units are None when the description doesn't carry them.
+    """
+
+    def __init__(self, limit=CACHE_LIMIT):
+        self.limit = limit
+        self.cache = {}
+        self.journal_cache = {}
+        self.hits = self.misses = 0
+
+    def parse(self, description):
+        parsed = self.cache.get(description)
+        if parsed is not None:
+            self.hits += 1
+            return parsed
+        self.misses += 1
+        if len(self.cache) >= self.limit:
+            self.cache.clear()
+        parsed = self.cache[description] = self._parse(description)
+        return parsed
+
+    def _parse(self, description):
+        match = UNITS.search(description)
+        units = float(match.group(1)) if match else None
+
+        if description.startswith("Base Wage -"):
+            first = {}
+            for found in BASE_WAGE_KEYWORDS.finditer(description):
+                first.setdefault(found.group(), found.start())
+            if first:
+                keyword = min(first, key=BASE_WAGE_RANK.get)
+                contractor = _between(description, keyword, " for the week", first[keyword])
+                return LineDescription(contractor, LEAVE_TYPES[keyword], units)
+
+        if description.startswith("Annual Leave -"):
+            return LineDescription(_between(description, " of ", " for the week"), "Annual Leave", units)
+        if description.startswith("Annual Leave Payout -"):
+            return LineDescription(_between(description, " of ", " on "), "Annual Leave Payout", units)
+        return LineDescription(_between(description, "contracting services of ", " for the week"), "", units)
+
+    def parse_journal(self, description):
+        """
+        (contractor, units) from a Temp manual-journal line ("<type>:<contractor>:<units>"),
+        both as written (units stays a string); None for a part that is missing.
+        """
+        parsed = self.journal_cache.get(description)
+        if parsed is not None:
+            self.hits += 1
+            return parsed
+        self.misses += 1
+        if len(self.journal_cache) >= self.limit:
+            self.journal_cache.clear()
+        match = JOURNAL_FIELDS.match(description)
+        if not match:
+            parsed = (None, None)
+        else:
+            contractor, units = match.groups()
+            parsed = (contractor.strip(), units.strip() if units is not None else None)
+        self.journal_cache[description] = parsed
+        return parsed
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+LINE_DESCRIPTIONS = LineDescriptionParser()
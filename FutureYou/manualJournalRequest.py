@@ -1,39 +1,25 @@
-import requests
 import os
 import sys
 import csv
 from databaseMappings import journal_account_code_mapping
+from lineDescriptions import LINE_DESCRIPTIONS
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from helpers.databaseHelpers import parse_xero_date, get_company_month, week_of_company_month
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken
+from helpers.databaseHelpers import parse_xero_date
+from helpers.companyCalendar import COMPANY_CALENDAR
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
+from helpers.xeroClient import XeroClient
+from helpers.xeroResponseCache import XeroResponseCache
 
-def fetch_manual_journals(access_token, xero_tenant_id):
-    url = "https://api.xero.com/api.xro/2.0/ManualJournals"
-    headers = {
-        "Authorization": f"Bearer " + access_token,
-        "Xero-tenant-id": xero_tenant_id,
-        "Accept": "application/json"
-    }
-    journals = []
-    page = 1
-    while True:
-        params = {
-            "where": 'Date>=DateTime(2024, 7, 1) AND Status=="POSTED"',
-            "page": page,
-            "pageSize": 1000,
-        }
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching manual journals: {response.status_code} - {response.text}")
+MANUAL_JOURNAL_PARAMS = {
+    "where": 'Date>=DateTime(2024, 7, 1) AND Status=="POSTED"',
+    "pageSize": 1000,
+}
 
-        data = response.json().get("ManualJournals", [])
-        if not data: break
-        journals.extend(data)
-        page += 1
-    return journals
+def fetch_manual_journals(access_token, xero_tenant_id):
+    client = XeroClient(access_token, xero_tenant_id)
+    return client.getAllPages("ManualJournals", MANUAL_JOURNAL_PARAMS)
 
 def parse_manual_journal_lines(journals, client_name):
     rows = []
@@ -41,8 +27,13 @@ def parse_manual_journal_lines(journals, client_name):
         journal_id = journal.get("ManualJournalID", "")
         date = parse_xero_date(journal.get("Date", ""))
         if not date: continue
-        invoice_month = get_company_month(date)
-        invoice_week = week_of_company_month(date)
+        try:
+            calendar_day = COMPANY_CALENDAR.lookup(date)
+        except ValueError as e:
+            print(f"⚠️ Skipping manual journal {journal_id}: {e}")
+            continue
+        invoice_month = calendar_day.month
+        invoice_week = calendar_day.week
         narration = journal.get("Narration", "")
         status = journal.get("Status", "")
         updated_date = parse_xero_date(journal.get("UpdatedDateUTC", ""))
@@ -53,9 +44,7 @@ def parse_manual_journal_lines(journals, client_name):
             contractor = ""
             units_worked = 0.0
             if narration.startswith("Temp") and ":" in description:
-                parts = description.split(":")
-                contractor = parts[1].strip() if len(parts) > 1 else None
-                units_worked = parts[2].strip() if len(parts) > 2 else None
+                contractor, units_worked = LINE_DESCRIPTIONS.parse_journal(description)
 
             tracking_data = line.get("Tracking", [])
             category = ""
@@ -85,14 +74,18 @@ def parse_manual_journal_lines(journals, client_name):
             })
     return rows
 
-def get_manual_journal_data():
+def get_manual_journal_data(replay=False):
     clients = ["FUTUREYOU_CONTRACTING", "FUTUREYOU_RECRUITMENT"]
     all_journal_data = {}
 
     for client in clients:
-        access_token = getXeroAccessToken(client)
-        tenant_id = XeroTenants(access_token)
-        journals = fetch_manual_journals(access_token, tenant_id)
+        cache = XeroResponseCache(client)
+        if replay:
+            journals = cache.load("ManualJournals")
+        else:
+            access_token = getXeroAccessToken(client)
+            tenant_id = getXeroTenantId(client, access_token)
+            journals = cache.store("ManualJournals", MANUAL_JOURNAL_PARAMS, fetch_manual_journals(access_token, tenant_id))
         parsed_rows = parse_manual_journal_lines(journals, client)
         all_journal_data[client] = parsed_rows
         print(f"Processed {client}'s manual journals: {len(parsed_rows)} entries")
@@ -0,0 +1,42 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.gcpClients import bigQueryClient
+from bigQuerySchemas import PROJECT_ID, TABLES, migrateTable
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the FutureYou BigQuery tables with their declared partitioning and clustering. "
+                    "Run with --apply only while the invoice/ATB workflows are paused."
+    )
+    parser.add_argument("tables", nargs="*", metavar="TABLE",
+                        help=f"Tables to migrate (default: all of {', '.join(TABLES)})")
+    parser.add_argument("--apply", action="store_true", help="Run the migration (default only prints the plan)")
+    parser.add_argument("--no-backup", action="store_true", help="Drop the original (<table>_backup_<yyyymmdd>) after the swap")
+    args = parser.parse_args()
+    unknown = [name for name in args.tables if name not in TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    client = bigQueryClient(PROJECT_ID, os.getenv("FUTUREYOU_BQACCESS"))
+
+    if not args.apply:
+        print("ℹ️ Dry run — pass --apply to migrate.")
+
+    results = {}
+    for name in args.tables or TABLES:
+        results[name] = migrateTable(client, TABLES[name], apply=args.apply, backup=not args.no_backup)
+
+    print("\n" + "\n".join(f"  {name}: {result}" for name, result in results.items()))
+
+
+if __name__ == "__main__":
+    main()
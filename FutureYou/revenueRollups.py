@@ -0,0 +1,105 @@
+import os
+import sys
+import argparse
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.gcpClients import bigQueryClient
+from bigQuerySchemas import PROJECT_ID, TABLES, ensureTable
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+# consultant × FY × month × week grain — Quarter/Area/Type ride along for the legends
+MARGIN_ROLLUP_DIMENSIONS = ["FinancialYear", "FutureYouMonth", "Week", "Quarter", "Consultant", "Area", "Type"]
+
+
+def refreshMarginRollup(client, financial_years=None):
+    """
+    Recompute ConsultantMarginRollup for the given financial years from InvoiceEnquiry.
+
+    The old rows for those years are deleted and re-aggregated inside one transaction, so
+    readers never see a half-refreshed year. InvoiceEnquiry is clustered on
+    FinancialYear, so refreshing a year only scans that year. financial_years=None
+    rebuilds every year.
+    """
+    spec = TABLES["ConsultantMarginRollup"]
+    ensureTable(client, spec)
+    rollup_ref = spec["table"]
+    invoices_ref = TABLES["InvoiceEnquiry"]["table"]
+
+    params = []
+    condition = "TRUE"
+    if financial_years is not None:
+        financial_years = sorted(fy for fy in financial_years if fy)
+        if not financial_years:
+            return []
+        condition = "FinancialYear IN UNNEST(@fys)"
+        params.append(bigquery.ArrayQueryParameter("fys", "STRING", financial_years))
+
+    dimensions = ", ".join(MARGIN_ROLLUP_DIMENSIONS)
+    script = f"""
+        BEGIN TRANSACTION;
+        DELETE FROM `{rollup_ref}` WHERE {condition};
+        INSERT INTO `{rollup_ref}` ({dimensions}, Margin, LineCount, RefreshedAt)
+        SELECT {dimensions}, SUM(Margin), COUNT(*), CURRENT_TIMESTAMP()
+        FROM `{invoices_ref}`
+        WHERE {condition}
+        GROUP BY {dimensions};
+        COMMIT TRANSACTION;
+    """
+    client.query(script, job_config=bigquery.QueryJobConfig(query_parameters=params)).result()
+    print(f"📊 Margin rollup refreshed for {', '.join(financial_years) if financial_years else 'all years'}.")
+    return financial_years
+
+
+def rebuildCurrentTargets(client):
+    """Rebuild MonthlyTargetsCurrent (latest target per FY/month) from the MonthlyTargets history."""
+    spec = TABLES["MonthlyTargetsCurrent"]
+    ensureTable(client, spec)
+    current_ref = spec["table"]
+    history_ref = TABLES["MonthlyTargets"]["table"]
+    columns = ", ".join(f.name for f in spec["schema"])
+    client.query(f"""
+        BEGIN TRANSACTION;
+        DELETE FROM `{current_ref}` WHERE TRUE;
+        INSERT INTO `{current_ref}` ({columns})
+        SELECT {columns} FROM `{history_ref}`
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY FinancialYear, Month ORDER BY uploadTimeRaw DESC) = 1;
+        COMMIT TRANSACTION;
+    """).result()
+    print(f"🎯 Rebuilt {current_ref} from the target history.")
+
+
+def ensureCurrentTargets(client):
+    """
+    Create and fill MonthlyTargetsCurrent if it doesn't exist yet, so the backends that
+    read and MERGE into it work from the first deploy. Returns True if it was built.
+    """
+    try:
+        client.get_table(TABLES["MonthlyTargetsCurrent"]["table"])
+        return False
+    except NotFound:
+        rebuildCurrentTargets(client)
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the FutureYou dashboard rollup tables.")
+    parser.add_argument("--fy", action="append", metavar="FY",
+                        help="Only refresh the margin rollup for this FY (repeatable; default: every year)")
+    parser.add_argument("--skip-targets", action="store_true", help="Don't rebuild MonthlyTargetsCurrent")
+    args = parser.parse_args()
+
+    client = bigQueryClient(PROJECT_ID, os.getenv("FUTUREYOU_BQACCESS"))
+
+    refreshMarginRollup(client, args.fy)
+    if not args.skip_targets:
+        rebuildCurrentTargets(client)
+
+
+if __name__ == "__main__":
+    main()
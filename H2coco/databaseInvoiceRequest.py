@@ -1,22 +1,21 @@
 import sys
 import os
-import requests
 import csv
 import pandas as pd
 import numpy as np
 import re
-from datetime import datetime, timedelta, timezone
-from google.cloud import bigquery
-from google.oauth2 import service_account
-import pandas_gbq
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import pytz
 
 load_dotenv()
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
+from helpers.xeroClient import XeroClient
+from helpers.syncState import getSyncState, IncrementalSync
+from helpers.bigQueryUpsert import upsertDataFrame
+from helpers.gcpClients import bigQueryClient
 
 FULL_RESET = False
 
@@ -40,7 +39,7 @@ def clean_small_numbers(val, threshold=1e-8):
 def export_to_bigquery(rows):
     if not rows:
         print("❌ No rows to upload")
-        return
+        return True
 
     key_path = os.getenv("H2COCO_BQACCESS")
     project_id = "h2coco"
@@ -49,75 +48,37 @@ def export_to_bigquery(rows):
     table_ref = f"{project_id}.{dataset_id}.{table_id}"
 
     try:
-        credentials = service_account.Credentials.from_service_account_file(
-            key_path,
-            scopes=["https://www.googleapis.com/auth/bigquery"]
-        )
-        client = bigquery.Client(credentials=credentials, project=project_id)
+        client = bigQueryClient(project_id, key_path)
 
         deleted_ids = [r["InvoiceID"] for r in rows if r.get("__deleted__") and r.get("InvoiceID")]
-        if deleted_ids:
-            placeholders = ", ".join(f"'{id}'" for id in deleted_ids)
-            query = f"DELETE FROM `{table_ref}` WHERE InvoiceID IN ({placeholders})"
-            client.query(query).result()
-            print(f"🗑️ Deleted {len(deleted_ids)} voided/deleted invoices from BigQuery.")
-
         filtered_rows = [r for r in rows if not r.get("__deleted__")]
-        if not filtered_rows:
+        if not filtered_rows and not deleted_ids:
             print("ℹ️ No valid rows to upload after filtering.")
-            return
+            return True
 
         df = pd.DataFrame(filtered_rows)
         df = df.where(pd.notnull(df), None)
 
-        if FULL_RESET:
-            client.query(f"DELETE FROM `{table_ref}` WHERE 1=1").result()
-            print("⚠️ Full reset: all rows deleted.")
-        else:
-            updated_ids = df["InvoiceID"].dropna().astype(str).tolist()
-            if updated_ids:
-                placeholders = ", ".join(f"'{id}'" for id in updated_ids)
-                client.query(f"DELETE FROM `{table_ref}` WHERE InvoiceID IN ({placeholders})").result()
-                print(f"✅ Deleted {len(updated_ids)} updated invoices from BigQuery.")
-
         date_columns = ["InvoiceDate", "DueDate", "FullyPaidOffDate", "UpdatedDate"]
 
         for col in date_columns:
             if col in df.columns:
                 df[col] = pd.to_datetime(df[col], errors="coerce")
 
-        pandas_gbq.to_gbq(
-            df,
-            f"{dataset_id}.{table_id}",
-            project_id=project_id,
-            credentials=credentials,
-            if_exists="append"
-        )
+        # One MERGE replaces every changed invoice's rows and drops voided/deleted invoices
+        upsertDataFrame(client, df, table_ref, "InvoiceID", deleted_keys=deleted_ids, replace_all=FULL_RESET)
+        if FULL_RESET:
+            print("⚠️ Full reset: table replaced with this run's rows.")
+        if deleted_ids:
+            print(f"🗑️ Deleted {len(deleted_ids)} voided/deleted invoices from BigQuery.")
         print(f"✅ Successfully uploaded {len(df)} rows to BigQuery.")
+        return True
     except Exception as e:
         print(f"❌ Upload failed: {e}")
+        return False
 
 def fetch_all(endpoint, access_token, tenant_id, params=None):
-    all_results = []
-    params = params or {"page": 1, "pageSize": 1000}
-    while True:
-        res = requests.get(
-            f"https://api.xero.com/api.xro/2.0/{endpoint}",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Xero-tenant-id": tenant_id,
-                "Accept": "application/json"
-            },
-            params=params
-        )
-        if res.status_code != 200:
-            raise Exception(f"Fetch failed for {endpoint}: {res.status_code} - {res.text}")
-        data = res.json().get(endpoint, [])
-        if not data:
-            break
-        all_results.extend(data)
-        params["page"] += 1
-    return all_results
+    return XeroClient(access_token, tenant_id).getAllPages(endpoint, params)
 
 def export_to_csv(rows, filename="xero_export.csv"):
     if not rows:
@@ -239,25 +200,24 @@ def transform_credit_notes(credit_notes):
 
 def main():
     client = "H2COCO"
-    updated_since = datetime.now(timezone.utc) - timedelta(days=1)
-    updated_date_str = f'DateTime({updated_since.year},{updated_since.month:02},{updated_since.day:02})'
+    sync = IncrementalSync(getSyncState("h2coco", "FinancialData", os.getenv("H2COCO_BQACCESS")), client)
 
     access_token = getXeroAccessToken(client)
-    tenant_id = XeroTenants(access_token)
+    tenant_id = getXeroTenantId(client, access_token)
 
     invoice_params = {
-        "where": 'Type=="ACCREC" AND Date>=DateTime(2023,07,01)' if FULL_RESET else f'Type=="ACCREC" AND UpdatedDateUTC>={updated_date_str}',
+        "where": 'Type=="ACCREC" AND Date>=DateTime(2023,07,01)' if FULL_RESET else sync.where("Invoices", 'Type=="ACCREC"'),
         "page": 1,
         "pageSize": 1000
     }
     credit_params = {
-        "where": 'Date>=DateTime(2024,07,01)' if FULL_RESET else f'UpdatedDateUTC>={updated_date_str}',
+        "where": 'Date>=DateTime(2024,07,01)' if FULL_RESET else sync.where("CreditNotes"),
         "page": 1,
         "pageSize": 1000
     }
 
-    invoices = fetch_all("Invoices", access_token, tenant_id, invoice_params)
-    credit_notes = fetch_all("CreditNotes", access_token, tenant_id, credit_params)
+    invoices = sync.observe("Invoices", fetch_all("Invoices", access_token, tenant_id, invoice_params))
+    credit_notes = sync.observe("CreditNotes", fetch_all("CreditNotes", access_token, tenant_id, credit_params))
     invoices = [inv for inv in invoices if inv.get("Status", "").upper() not in ["VOIDED", "DELETED"]]
 
     print(f"Fetched {len(invoices)} invoices, {len(credit_notes)} credit notes")
@@ -270,7 +230,8 @@ def main():
     all_rows = invoice_rows + credit_rows
 
     export_to_csv(all_rows, "xero_combined_export.csv")
-    export_to_bigquery(all_rows)
+    if export_to_bigquery(all_rows):
+        sync.commit()
 
 if __name__ == "__main__":
     main()
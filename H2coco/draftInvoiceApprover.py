@@ -1,58 +1,57 @@
 import sys
-import time
 import logging
 import os
 import re
-import requests
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroBatchWriter import updateInvoices
+
+
+UPDATE_FIELDS = [
+    "Type", "Date", "DueDate", "Status", "LineItems", "InvoiceNumber",
+]
+
+
+def invoiceUpdatePayload(invoice):
+    payload = {k: v for k, v in invoice.items() if k in UPDATE_FIELDS and v is not None}
+    payload["InvoiceID"] = invoice.get("InvoiceID")
+    return payload
+
+
+def xeroAPIUpdateBills(invoices, accessToken, xeroTenantId):
+    """Update invoices/bills in batches of up to 50. Returns one result per invoice, in order
+    ({"ok", "record", "error"}); only the failed ones are retried."""
+    results = updateInvoices(accessToken, xeroTenantId, [invoiceUpdatePayload(inv) for inv in invoices])
+    for invoice, result in zip(invoices, results):
+        if not result["ok"]:
+            print(f"Failed to update invoice {invoice.get('InvoiceNumber', invoice.get('InvoiceID'))}: {result['error']}")
+    return results
 
 
 def xeroAPIUpdateBill(invoice, accessToken, xeroTenantId):
-    url = f"https://api.xero.com/api.xro/2.0/Invoices/{invoice.get('InvoiceID')}"
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-tenant-id": xeroTenantId,
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-
-    update_fields = [
-        "Type", "Date", "DueDate", "Status", "LineItems", "InvoiceNumber",
-    ]
+    result = xeroAPIUpdateBills([invoice], accessToken, xeroTenantId)[0]
+    return {"Invoices": [result["record"]]} if result["ok"] else None
 
-    payload = {k: v for k, v in invoice.items() if k in update_fields and v is not None}
-
-    max_retries = 5
-    for attempt in range(max_retries):
-        response = requests.post(url, headers=headers, json=payload)
-
-        if response.status_code in [200, 201]:        
-            return response.json()
-        elif response.status_code == 429:
-            retry_after = response.headers.get("Retry-After")
-            if retry_after:
-                wait_time = int(retry_after) + 1
-            else:
-                wait_time = 10 * (attempt + 1) # simple backoff
-            
-            print(f"Rate limit (429): waiting {wait_time}s before retry ({attempt+1}/{max_retries})...")
-            time.sleep(wait_time)
-            continue
+
+def updateBills(bills, label, done, failed, accessToken, xeroTenantId):
+    """Send the prepared bills/journals in batches and report each one, e.g. done="approved", failed="approval"."""
+    results = []
+    for bill, result in zip(bills, xeroAPIUpdateBills(bills, accessToken, xeroTenantId)):
+        inv_number = bill.get("InvoiceNumber", "")
+        if result["ok"]:
+            print(f"{label} {inv_number} {done} successfully.")
+            results.append((inv_number, f"✅ {done.capitalize()}"))
         else:
-            print(f"Failed to update invoice: {response.status_code} - {response.text}")
-            return None
+            print(f"{label} {inv_number} {failed} failed.")
+            results.append((inv_number, "❌ Failed"))
+    print("--------------------------------------------------")
+    return results
 
-    print(f"Failed to update invoice after {max_retries} attempts.")
-    return None
-    
 
-def approveDraftInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
+def prepareDraftInvoiceAndBills(inv, related_bills):
     newZealand = False
     marketing = False
-    inv_number = inv.get("InvoiceNumber", "Unknown")
-    results = []
 
     # Check flags across ALL related bills
     for bill in related_bills:
@@ -150,36 +149,55 @@ def approveDraftInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
 
     for line in inv.get("LineItems", []): line.pop("TaxAmount", None)
 
-    print(f"Approving invoice: {inv_number} ({len(related_bills)} bill(s))")
-    invoiceResponse = xeroAPIUpdateBill(inv, accessToken, xeroTenantId)
-
-    if invoiceResponse:
-        updated_invoice = invoiceResponse.get("Invoices", [{}])[0]
-        pre_total = inv.get("Total")
-        post_total = updated_invoice.get("Total")
-        print(f"Invoice {inv_number} approved successfully. Pre-total: {pre_total}, Post-total: {post_total}")
-        results.append((inv_number, "Invoice", "✅ Approved"))
-
-        for bill in related_bills:
-            billResponse = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-            bill_num = bill.get("InvoiceNumber", "Unknown")
-            if billResponse:
-                print(f"Bill {bill_num} approved successfully.")
-                results.append((bill_num, "Bill", "✅ Approved"))
-            else:
-                print(f"Bill {bill_num} approval failed.")
-                results.append((bill_num, "Bill", "❌ Failed"))
-    else:
-        print(f"Invoice {inv_number} approval failed, bills not updated.")
-        results.append((inv_number, "Invoice", "❌ Failed"))
+
+def approveDraftInvoicesAndBills(approvals, accessToken, xeroTenantId):
+    """Approve (invoice, related_bills) pairs: every invoice in one batched call, then the
+    bills of the invoices that were approved in another. Bills of a failed invoice are not sent."""
+    for inv, related_bills in approvals:
+        prepareDraftInvoiceAndBills(inv, related_bills)
+
+    print(f"Approving {len(approvals)} invoice(s)...")
+    invoice_results = xeroAPIUpdateBills([inv for inv, _ in approvals], accessToken, xeroTenantId)
+
+    approved_bills = [
+        bill
+        for (_, related_bills), result in zip(approvals, invoice_results) if result["ok"]
+        for bill in related_bills
+    ]
+    bill_results = iter(xeroAPIUpdateBills(approved_bills, accessToken, xeroTenantId))
+
+    results = []
+    for (inv, related_bills), invoice_result in zip(approvals, invoice_results):
+        inv_number = inv.get("InvoiceNumber", "Unknown")
+        if invoice_result["ok"]:
+            pre_total = inv.get("Total")
+            post_total = invoice_result["record"].get("Total")
+            print(f"Invoice {inv_number} approved successfully. Pre-total: {pre_total}, Post-total: {post_total}")
+            results.append((inv_number, "Invoice", "✅ Approved"))
+
+            for bill in related_bills:
+                bill_num = bill.get("InvoiceNumber", "Unknown")
+                if next(bill_results)["ok"]:
+                    print(f"Bill {bill_num} approved successfully.")
+                    results.append((bill_num, "Bill", "✅ Approved"))
+                else:
+                    print(f"Bill {bill_num} approval failed.")
+                    results.append((bill_num, "Bill", "❌ Failed"))
+        else:
+            print(f"Invoice {inv_number} approval failed, bills not updated.")
+            results.append((inv_number, "Invoice", "❌ Failed"))
 
     print("--------------------------------------------------")
     return results
 
 
+def approveDraftInvoiceAndBills(inv, related_bills, accessToken, xeroTenantId):
+    return approveDraftInvoicesAndBills([(inv, related_bills)], accessToken, xeroTenantId)
+
+
 def processStockAdjustmentJournals(bills, accessToken, xeroTenantId):
     """Stock Adjustment Journals (Journal-SA-*): set BAS Excluded + account 5010, keep DRAFT."""
-    results = []
+    matched = []
     for bill in bills:
         if bill.get("Contact", {}).get("Name", "") != "Stock Journal":
             continue
@@ -193,22 +211,15 @@ def processStockAdjustmentJournals(bills, accessToken, xeroTenantId):
                 line["AccountCode"] = "5010"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Saving stock adjustment journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Stock adjustment journal {inv_number} saved successfully.")
-            results.append((inv_number, "✅ Saved"))
-        else:
-            print(f"Stock adjustment journal {inv_number} save failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return updateBills(matched, "Stock adjustment journal", "saved", "save", accessToken, xeroTenantId)
 
 
 def processRecostJournals(bills, accessToken, xeroTenantId):
     """Recost Journals (Journal - PO-*[ReCost]): set BAS Excluded + account 5020, approve."""
-    results = []
+    matched = []
     for bill in bills:
         if bill.get("Contact", {}).get("Name", "") != "Stock Journal":
             continue
@@ -223,23 +234,16 @@ def processRecostJournals(bills, accessToken, xeroTenantId):
                 line["AccountCode"] = "5020"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving recost journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Recost journal {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"Recost journal {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return updateBills(matched, "Recost journal", "approved", "approval", accessToken, xeroTenantId)
 
 
 def processCreditNoteJournals(bills, accessToken, xeroTenantId):
     """Credit Note Journals (Journal-CN-*): set BAS Excluded, approve.
     If contact is Marketing, remap account 5000 → 5465 (marketing free stock)."""
-    results = []
+    matched = []
     for bill in bills:
         contact_name = bill.get("Contact", {}).get("Name", "")
         if contact_name not in ("Stock Journal", "Marketing"):
@@ -257,22 +261,15 @@ def processCreditNoteJournals(bills, accessToken, xeroTenantId):
                 line["AccountCode"] = "5465"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving credit note journal: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Credit note journal {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"Credit note journal {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return updateBills(matched, "Credit note journal", "approved", "approval", accessToken, xeroTenantId)
 
 
 def processSunRoadBills(bills, accessToken, xeroTenantId):
     """Stock Journals with 'Sun Road Food & Beverage - CDS' in reference: set BAS Excluded, approve."""
-    results = []
+    matched = []
     for bill in bills:
         if bill.get("Contact", {}).get("Name", "") != "Stock Journal":
             continue
@@ -285,23 +282,17 @@ def processSunRoadBills(bills, accessToken, xeroTenantId):
             line["TaxType"] = "BASEXCLUDED"
             line.pop("TaxAmount", None)
 
-        time.sleep(1)
         print(f"Approving Sun Road bill: {inv_number}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
-            print(f"Sun Road bill {inv_number} approved successfully.")
-            results.append((inv_number, "✅ Approved"))
-        else:
-            print(f"Sun Road bill {inv_number} approval failed.")
-            results.append((inv_number, "❌ Failed"))
-        print("--------------------------------------------------")
-    return results
+        matched.append(bill)
+
+    return updateBills(matched, "Sun Road bill", "approved", "approval", accessToken, xeroTenantId)
         
 
 def processPOBills(bills, accessToken, xeroTenantId):
     """PO bills (PO-XXXXXXXX - PO-XXXXXXXX): shorten reference and prepend full PO to line item descriptions, save as DRAFT."""
     pattern = re.compile(r"^(PO-(\d{8})) - PO-\d{8}$")
     results = []
+    matched = []
 
     for bill in bills:
         inv_number = bill.get("InvoiceNumber", "")
@@ -317,16 +308,18 @@ def processPOBills(bills, accessToken, xeroTenantId):
             desc = line.get("Description", "")
             line["Description"] = f"{full_po} {desc}"
 
-        time.sleep(1)
         print(f"Saving PO bill: {inv_number} → {short_po}")
-        response = xeroAPIUpdateBill(bill, accessToken, xeroTenantId)
-        if response:
+        matched.append((bill, inv_number, short_po))
+
+    po_results = xeroAPIUpdateBills([bill for bill, _, _ in matched], accessToken, xeroTenantId)
+    for (_, inv_number, short_po), result in zip(matched, po_results):
+        if result["ok"]:
             print(f"PO bill {short_po} saved successfully.")
             results.append((inv_number, short_po, "✅ Saved"))
         else:
             print(f"PO bill {short_po} save failed.")
             results.append((inv_number, short_po, "❌ Failed"))
-        print("--------------------------------------------------")
+    print("--------------------------------------------------")
     return results
 
 
@@ -402,10 +395,10 @@ def main():
     ]
 
     invoice_results = []
+    approvals = []
 
     print("--------------------------------------------------")
     for invoice in draftInvoices:
-        time.sleep(1)
         invNumber = invoice.get("InvoiceNumber", "No Invoice Number")
         if not invNumber.startswith("SI-"):
             logging.warning(f"Skipping invoice with unexpected format: {invNumber}")
@@ -420,11 +413,14 @@ def main():
         ]
 
         if related_bills:
-            invoice_results.extend(approveDraftInvoiceAndBills(invoice, related_bills, accessToken, xeroTenantId))
+            approvals.append((invoice, related_bills))
         else:
             logging.warning(f"No matching bills found for {invNumber} (search: {soNumber}), skipping.")
             invoice_results.append((invNumber, "Invoice", "⚠️ Skipped (no matching bills)"))
 
+    if approvals:
+        invoice_results.extend(approveDraftInvoicesAndBills(approvals, accessToken, xeroTenantId))
+
     sa_results = processStockAdjustmentJournals(draftBills, accessToken, xeroTenantId)
     recost_results = processRecostJournals(draftBills, accessToken, xeroTenantId)
     cn_results = processCreditNoteJournals(draftBills, accessToken, xeroTenantId)
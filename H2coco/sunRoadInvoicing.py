@@ -25,6 +25,7 @@ from datetime import datetime, timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroClient import XeroClient
 
 # ── Constants ────────────────────────────────────────────────────────────────
 SUNROAD_CONTACT         = "Sun Road Food & Beverage - CDS"
@@ -45,26 +46,15 @@ NZL_COUNTRY_CODES = {"NZL", "NZ", "NEW ZEALAND"}
 
 
 
-def _xero_headers(access_token, tenant_id):
-    return {
-        "Authorization": f"Bearer {access_token}",
-        "Xero-tenant-id": tenant_id,
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
-
 def xero_update_invoice(invoice_id, payload, access_token, tenant_id):
-    url = f"https://api.xero.com/api.xro/2.0/Invoices/{invoice_id}"
-    resp = requests.post(url, headers=_xero_headers(access_token, tenant_id), json=payload)
+    resp = XeroClient(access_token, tenant_id).post(f"Invoices/{invoice_id}", json=payload)
     if resp.status_code in (200, 201):
         return resp.json().get("Invoices", [{}])[0]
     raise RuntimeError(f"Update invoice failed {resp.status_code}: {resp.text}")
 
 
 def xero_create_invoice(payload, access_token, tenant_id):
-    url = "https://api.xero.com/api.xro/2.0/Invoices"
-    resp = requests.post(url, headers=_xero_headers(access_token, tenant_id), json=payload)
+    resp = XeroClient(access_token, tenant_id).post("Invoices", json=payload)
     if resp.status_code in (200, 201):
         return resp.json().get("Invoices", [{}])[0]
     raise RuntimeError(f"Create invoice failed {resp.status_code}: {resp.text}")
@@ -82,8 +72,7 @@ def xero_create_payment(invoice_id, account_code, date_str, currency_rate, amoun
             "Reference":    reference,
         }]
     }
-    url = "https://api.xero.com/api.xro/2.0/Payments"
-    resp = requests.post(url, headers=_xero_headers(access_token, tenant_id), json=payload)
+    resp = XeroClient(access_token, tenant_id).post("Payments", json=payload)
     if resp.status_code in (200, 201):
         return resp.json()
     raise RuntimeError(f"Create payment failed {resp.status_code}: {resp.text}")
@@ -318,8 +307,7 @@ def test_cds(si_number):
 
     Usage: python sunRoadInvoicing.py --test-cds SI-00021927
     """
-    from xeroAuthHelper import getXeroAccessToken
-    from xeroAuth import XeroTenants
+    from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
 
     api_id  = os.environ.get("H2COCO_UNLEASHED_API_ID", "")
     api_key = os.environ.get("H2COCO_UNLEASHED_API_KEY", "")
@@ -380,7 +368,7 @@ def test_cds(si_number):
         print(f"  qty={li['Quantity']}  unit={li['UnitAmount']}  {li['Description']}")
 
     access_token   = getXeroAccessToken("H2COCO")
-    tenant_id      = XeroTenants(access_token)
+    tenant_id      = getXeroTenantId("H2COCO", access_token)
     contact_id     = SUNROAD_CDS_CONTACT_ID
 
     today    = datetime.now().strftime("%Y-%m-%d")
@@ -2,12 +2,9 @@ import sys
 import os
 import json
 import pandas as pd
-import requests
 from datetime import datetime
 from google.cloud import bigquery
-from google.oauth2 import service_account
 import xml.etree.ElementTree as ET
-import pandas_gbq
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,9 +12,10 @@ load_dotenv()
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroClient import XeroClient
+from helpers.gcpClients import bigQueryClient
 
 
-XERO_PAYMENTS_URL = "https://api.xero.com/api.xro/2.0/Payments"
 PAYMENT_ACCOUNT_CODE = "2010"  # Supplier Prepayments
 
 
@@ -31,8 +29,7 @@ def export_to_bigquery(paid_po_records):
     df = pd.DataFrame(paid_po_records)
     df["date"] = pd.to_datetime(df["date"])
 
-    credentials = service_account.Credentials.from_service_account_file(key_path)
-    client = bigquery.Client(credentials=credentials, project=project_id)
+    client = bigQueryClient(project_id, key_path)
 
     job = client.load_table_from_dataframe(
         dataframe=df,
@@ -49,14 +46,13 @@ def fetch_paid_po_records():
     dataset_id = "FinancialData"
     table_id = "SupplierPrepaymentPayments"
 
-    client = bigquery.Client.from_service_account_json(key_path)
+    client = bigQueryClient(project_id, key_path)
     query = f"""
         SELECT poNumber
         FROM `{project_id}.{dataset_id}.{table_id}`
         ORDER BY date DESC
     """
-    df = pandas_gbq.read_gbq(query, project_id=project_id, credentials=client._credentials)
-    return df["poNumber"].astype(int).tolist()
+    return [int(row["poNumber"]) for row in client.query(query).result()]
 
 
 def write_github_summary(paid, skipped, failed):
@@ -117,12 +113,7 @@ def post_payment(invoice_id, amount, payment_date, currency_rate, reference, acc
             "Reference": reference
         }]
     }
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "Xero-tenant-id": xero_tenant_id
-    }
-    return requests.post(XERO_PAYMENTS_URL, headers=headers, data=json.dumps(payload))
+    return XeroClient(access_token, xero_tenant_id).post("Payments", json=payload)
 
 
 def main():
@@ -2,7 +2,6 @@ import sys
 import os
 import json
 import pandas as pd
-import requests
 import logging
 from datetime import datetime
 from openpyxl import Workbook  # Add this import
@@ -10,6 +9,7 @@ from openpyxl import Workbook  # Add this import
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from helpers.fetchInvoicesForClient import fetchInvoicesForClient
+from helpers.xeroClient import XeroClient
 from helpers.emailAttachment import sendEmailWithAttachment
 
 if not os.path.exists('logs'): os.makedirs('logs')
@@ -109,6 +109,7 @@ def main():
     unpaidPOs = []
 
     # Create and send individual payment requests
+    xero = XeroClient(accessToken, xeroTenantId)
     for poNumber, date, currencyRate, amount in zip(poNumbers, dates, currencyRates, amounts):
 
         invoiceData = poInvoiceDict.get(poNumber)
@@ -137,14 +138,7 @@ def main():
             }
 
             # Send the payment request to the Xero API
-            url = "https://api.xero.com/api.xro/2.0/Payments"
-            headers = {
-                "Authorization": f"Bearer {accessToken}",
-                "Content-Type": "application/json",
-                "Xero-tenant-id": xeroTenantId
-            }
-
-            response = requests.post(url, headers=headers, data=json.dumps(paymentPayload))
+            response = xero.post("Payments", json=paymentPayload)
             if response.status_code in [200, 201]:
                 logging.info(f"Payment for PO {poNumber} ({invoiceData['supplierInvNumber']}) of ${amount} at exchange rate of {currencyRate} allocated on {paymentDate.strftime('%Y-%m-%d')}.")
                 paidPOs.append(poNumber)
@@ -2,22 +2,21 @@ import os
 import sys
 import re
 import argparse
-import requests
 from datetime import date, datetime, timezone
 from rapidfuzz import fuzz, process
 from dotenv import load_dotenv
 import pandas as pd
-from google.api_core.exceptions import NotFound
-from google.cloud import bigquery
 from google.oauth2 import service_account
-import pandas_gbq
 import gspread
 
 load_dotenv()
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken, get_github_variable, update_github_variable
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId, get_github_variable, update_github_variable
+from helpers.xeroClient import XeroClient
+from helpers.bigQueryUpsert import upsertDataFrame
+from helpers.gcpClients import bigQueryClient
+from helpers.bigQueryCost import QUERY_COSTS
 
 REVENUE_GL_CODES = {"4000", "4001", "4010"}
 HISTORY_START = "2024-07-01"
@@ -140,18 +139,10 @@ def _xero_date_filter(date_str):
     return f"DateTime({y},{int(m)},{int(d)})"
 
 
-def _xero_headers(access_token, tenant_id):
-    return {
-        "Authorization": f"Bearer {access_token}",
-        "Xero-tenant-id": tenant_id,
-        "Accept": "application/json",
-    }
-
-
-def _paginate(url, headers, params, key, desc):
+def _paginate(client, path, params, key, desc):
     results, page = [], 1
     while True:
-        resp = requests.get(url, headers=headers, params={**params, "page": page}, timeout=120)
+        resp = client.get(path, params={**params, "page": page})
         if resp.status_code != 200:
             raise Exception(f"Xero API error (page {page}): {resp.status_code} - {resp.text}")
         batch = resp.json().get(key, [])
@@ -179,8 +170,8 @@ def fetch_invoices(access_token, tenant_id, updated_since, catalog):
     where = f'Type=="ACCREC" AND Date>={dt_filter}' + _updated_since_clause(updated_since)
 
     invoices = _paginate(
-        "https://api.xero.com/api.xro/2.0/Invoices",
-        _xero_headers(access_token, tenant_id),
+        XeroClient(access_token, tenant_id),
+        "Invoices",
         {"Statuses": "AUTHORISED,PAID", "where": where, "pageSize": 1000},
         "Invoices",
         "invoices",
@@ -230,8 +221,8 @@ def fetch_credit_notes(access_token, tenant_id, updated_since, catalog):
     where = f'Type=="ACCRECCREDIT" AND Date>={dt_filter}' + _updated_since_clause(updated_since)
 
     credit_notes = _paginate(
-        "https://api.xero.com/api.xro/2.0/CreditNotes",
-        _xero_headers(access_token, tenant_id),
+        XeroClient(access_token, tenant_id),
+        "CreditNotes",
         {"where": where, "Statuses": "AUTHORISED,PAID", "pageSize": 1000},
         "CreditNotes",
         "credit notes",
@@ -283,8 +274,8 @@ def fetch_manual_journals(access_token, tenant_id, updated_since):
     where = f'Date>=DateTime({y}, {int(m)}, {int(d)}) AND Status=="POSTED"' + _updated_since_clause(updated_since)
 
     journals = _paginate(
-        "https://api.xero.com/api.xro/2.0/ManualJournals",
-        _xero_headers(access_token, tenant_id),
+        XeroClient(access_token, tenant_id),
+        "ManualJournals",
         {"where": where, "pageSize": 1000},
         "ManualJournals",
         "manual journals",
@@ -338,24 +329,11 @@ def upsert_to_bigquery(rows, truncate=False):
         return
 
     key_path = os.getenv("H2DATASERVICES_BQACCESS")
-    credentials = service_account.Credentials.from_service_account_file(
-        key_path,
-        scopes=["https://www.googleapis.com/auth/bigquery"]
-    )
-    client = bigquery.Client(credentials=credentials, project=BQ_PROJECT)
+    client = bigQueryClient(BQ_PROJECT, key_path)
 
     if truncate:
         client.delete_table(BQ_TABLE_REF, not_found_ok=True)
         print(f"⚠️ Dropped {BQ_TABLE_REF} — will be recreated with current schema.")
-    else:
-        try:
-            transaction_ids = list({r["transactionId"] for r in rows if r.get("transactionId")})
-            if transaction_ids:
-                placeholders = ", ".join(f"'{tid}'" for tid in transaction_ids)
-                client.query(f"DELETE FROM `{BQ_TABLE_REF}` WHERE transactionId IN ({placeholders})").result()
-                print(f"🗑️ Deleted existing rows for {len(transaction_ids)} transactions.")
-        except NotFound:
-            print(f"ℹ️ Table {BQ_TABLE_REF} does not exist yet — will be created on insert.")
 
     df = pd.DataFrame(rows)
     df = df.where(pd.notnull(df), None)
@@ -364,13 +342,8 @@ def upsert_to_bigquery(rows, truncate=False):
         if col in df.columns:
             df[col] = pd.to_datetime(df[col], errors="coerce")
 
-    pandas_gbq.to_gbq(
-        df,
-        f"{BQ_DATASET}.{BQ_TABLE}",
-        project_id=BQ_PROJECT,
-        credentials=credentials,
-        if_exists="append"
-    )
+    # Replaces every line of each transaction in one MERGE (creates the table if it was dropped)
+    upsertDataFrame(client, df, BQ_TABLE_REF, "transactionId")
     print(f"✅ Uploaded {len(df)} rows to {BQ_TABLE_REF}.")
 
 
@@ -403,7 +376,7 @@ def main():
     catalog = fetch_product_catalog(key_path)
 
     access_token = getXeroAccessToken("H2COCO")
-    tenant_id = XeroTenants(access_token)
+    tenant_id = getXeroTenantId("H2COCO", access_token)
 
     invoices = fetch_invoices(access_token, tenant_id, updated_since, catalog)
     print(f"  invoices:        {len(invoices)} lines")
@@ -434,6 +407,9 @@ def main():
             f.write(f"| Manual Journals | {len(journals)} |\n")
             f.write(f"| **Total** | **{len(all_rows)}** |\n\n")
             f.write(mode_note)
+            cost_lines = QUERY_COSTS.summaryLines()
+            if cost_lines:
+                f.write("\n" + "\n".join(cost_lines) + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""
+Benchmark: cold start and first request of the FutureYou admin and forecasting backends.
+
+Each backend is imported in a fresh interpreter (what a Cloud Run cold start pays before
+gunicorn can serve), then one authenticated request is sent through Flask's test client
+(where lazily created BigQuery/Firestore clients are built). With --before REF the same
+is measured on that git revision, exported to a temp directory, for a before/after table.
+
+Needs the backend requirements and credentials (FUTUREYOU_BQACCESS /
+FUTUREYOU_FIRESTOREACCESS or gcloud default credentials) for the request to reach
+BigQuery. A tree that fails to start (e.g. builds its clients at import without
+credentials) is reported with its error. Without GCP access, --path /__missing__
+times the cold start plus a request that makes no GCP call.
+
+    python benchmarks/backendStartup.py --before HEAD~1 --runs 3
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+BACKENDS = {
+    "admin": ("FutureYou/adminWebsite/backend/app.py", "/forecasting/monthly-targets?fy=FY26"),
+    "forecasting": ("FutureYou/forecastingWebsite/backend/app.py", "/monthly-targets?fy=FY26"),
+}
+
+CHILD = r"""
+import time
+started = time.perf_counter()
+import os, sys, json, importlib.util
+path, url = sys.argv[1], sys.argv[2]
+sys.path.insert(0, os.path.dirname(path))
+spec = importlib.util.spec_from_file_location("app", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+
+import jwt
+from datetime import datetime, timedelta, timezone
+token = jwt.encode(
+    {"username": "benchmark", "role": "finance", "name": "Benchmark", "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+    os.environ["FUTUREYOU_FORECAST_SECRET_KEY"], algorithm="HS256",
+)
+response = module.app.test_client().get(url, headers={"Authorization": f"Bearer {token}"})
+finished = time.perf_counter()
+print(json.dumps({"import_s": imported - started, "request_s": finished - imported, "status": response.status_code}))
+"""
+
+
+def measure(root, backend, runs, url=None):
+    path, default_url = BACKENDS[backend]
+    url = url or default_url
+    env = {**os.environ, "FUTUREYOU_FORECAST_SECRET_KEY": os.getenv("FUTUREYOU_FORECAST_SECRET_KEY", "benchmark")}
+    samples = []
+    for _ in range(runs):
+        child = subprocess.run(
+            [sys.executable, "-c", CHILD, os.path.join(root, path), url],
+            cwd=os.path.dirname(os.path.join(root, path)), env=env,
+            capture_output=True, text=True,
+        )
+        if child.returncode:
+            # e.g. a tree that builds its clients at import, run without credentials
+            error = (child.stderr.strip().splitlines() or ["exit %d" % child.returncode])[-1]
+            return {"import_s": float("nan"), "request_s": float("nan"), "status": error.split(":")[0]}
+        samples.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    return {
+        "import_s": statistics.median(s["import_s"] for s in samples),
+        "request_s": statistics.median(s["request_s"] for s in samples),
+        "status": samples[-1]["status"],
+    }
+
+
+def exportRevision(ref, target):
+    archive = subprocess.run(["git", "archive", ref], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend cold start and first request")
+    parser.add_argument("--before", metavar="REF", help="Also measure this git revision (e.g. HEAD~1)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement (median reported)")
+    parser.add_argument("--backend", choices=list(BACKENDS), action="append", help="Only these backends")
+    parser.add_argument("--path", help="Request this path instead (e.g. /__missing__ times Flask alone, no GCP calls)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as before_root:
+        trees = [("current", REPO_ROOT)]
+        if args.before:
+            exportRevision(args.before, before_root)
+            trees.insert(0, (args.before, before_root))
+
+        print(f"{'backend':<12} {'tree':<10} {'import':>8} {'1st request':>12} {'total':>8} {'status':>7}")
+        for backend in args.backend or BACKENDS:
+            for label, root in trees:
+                result = measure(root, backend, args.runs, args.path)
+                total = result["import_s"] + result["request_s"]
+                print(f"{backend:<12} {label:<10} {result['import_s']:>7.2f}s {result['request_s']:>11.2f}s "
+                      f"{total:>7.2f}s {result['status']!s:>7}")
+
+
+if __name__ == "__main__":
+    main()
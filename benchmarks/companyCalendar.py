@@ -0,0 +1,79 @@
+"""
+Benchmark: company month / week / financial year for 1M dates.
+
+Compares the per-row functions databaseHelpers had before the calendar table (which
+rebuilt the month cutoffs on every call; loaded from git, --legacy REF) with
+COMPANY_CALENDAR.lookup per row and COMPANY_CALENDAR.map_dates on the whole column, and
+checks that all three agree on every date. Dates are drawn from 2019–2025: the calendar
+file deliberately departs from the old rules from Dec 2026.
+
+    python benchmarks/companyCalendar.py --dates 1000000
+"""
+import sys
+import os
+import time
+import argparse
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+
+from helpers.companyCalendar import COMPANY_CALENDAR
+
+
+def legacyFunctions(ref):
+    """get_company_month / week_of_company_month / get_financial_year as of ref."""
+    if not ref:
+        ref = subprocess.run(
+            ["git", "log", "-1", "--format=%H", "-S", "def get_month_cutoffs", "--", "helpers/databaseHelpers.py"],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip() + "~1"
+    source = subprocess.run(
+        ["git", "show", f"{ref}:helpers/databaseHelpers.py"], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    namespace = {}
+    exec(compile(source, f"{ref}:helpers/databaseHelpers.py", "exec"), namespace)
+    return namespace["get_company_month"], namespace["week_of_company_month"], namespace["get_financial_year"], ref
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:>8.2f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the company calendar lookup")
+    parser.add_argument("--dates", type=int, default=1_000_000)
+    parser.add_argument("--legacy", metavar="REF", help="Revision to load the old functions from (default: before the table)")
+    args = parser.parse_args()
+
+    get_company_month, week_of_company_month, get_financial_year, ref = legacyFunctions(args.legacy)
+    rng = np.random.default_rng(7)
+    column = pd.Series(np.datetime64("2019-01-01") + rng.integers(0, 365 * 7, args.dates).astype("timedelta64[D]"))
+    dates = [d.date() for d in column.dt.to_pydatetime()]
+    print(f"{len(dates):,} dates, legacy functions from {ref}\n")
+
+    legacy, legacy_s = timed("legacy per row", lambda: [
+        (get_financial_year(d), get_company_month(d), week_of_company_month(d)) for d in dates
+    ])
+    lookup, lookup_s = timed("lookup per row", lambda: [
+        COMPANY_CALENDAR.lookup(d)[:3] for d in dates
+    ])
+    mapped, mapped_s = timed("map_dates (vectorised)", lambda: COMPANY_CALENDAR.map_dates(column))
+
+    vectorised = list(zip(mapped["financial_year"], mapped["month"], mapped["week"].astype(int)))
+    mismatches = sum(a != b or a != c for a, b, c in zip(legacy, lookup, vectorised))
+    print(f"\nlookup {legacy_s / lookup_s:.0f}x, map_dates {legacy_s / mapped_s:.0f}x faster than legacy; "
+          f"{mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: FutureYou invoice rows -> Parquet upload payload.
+
+Compares the old path (list of row dicts -> DataFrame -> to_datetime before and after
+the rename -> Parquet) with the Arrow path (rows streamed into ArrowRowBuilder ->
+typed record batches -> Parquet) on a synthetic dataset shaped like
+extract_invoice_lines output. Each path runs in its own process so peak RSS is
+comparable. No BigQuery calls are made; the Parquet bytes are what
+load_table_from_file / load_table_from_dataframe would upload.
+
+    python benchmarks/invoiceArrowLoad.py --rows 500000
+"""
+import sys
+import os
+import io
+import time
+import random
+import resource
+import argparse
+import subprocess
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "FutureYou")))
+
+CONSULTANTS = [f"{code} Consultant {i}" for i, code in enumerate(["SYD", "MEL", "BNE", "PER", "ADL"] * 8)]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def syntheticRows(count, seed=7):
+    """Yield rows with the same keys and value types as extract_invoice_lines."""
+    rnd = random.Random(seed)
+    start = date(2024, 7, 1)
+    for i in range(count):
+        day = start + timedelta(days=rnd.randrange(540))
+        consultant_code = rnd.choice(CONSULTANTS)
+        subtotal = round(rnd.uniform(100, 20000), 2)
+        invoice_type = "Temp" if i % 3 else "Perm"
+        yield {
+            "Year": day.year,
+            "FinancialYear": f"FY{str(day.year + 1)[-2:]}" if day.month >= 7 else f"FY{str(day.year)[-2:]}",
+            "Month": day.strftime("%B"),
+            "FutureYou Month": MONTHS[day.month - 1],
+            "Week": (day.day - 1) // 7 + 1,
+            "Invoice #": f"{'TC-' if invoice_type == 'Temp' else ''}INV-{i // 4:07d}",
+            "Type": invoice_type,
+            "To": f"Client {rnd.randrange(2000)}",
+            "Key": f"{day.year}:{day.strftime('%B')}:{(day.day - 1) // 7 + 1}:contractor {i % 5000}",
+            "Description": f"Timesheet for contractor {i % 5000} for the week ending {day:%d/%m/%Y}",
+            "Contractor": f"contractor {i % 5000}" if invoice_type == "Temp" else "",
+            "Invoice Date": f"{day.day}/{day.month}/{day.year}",
+            "Invoice Total": round(subtotal * 1.1, 2),
+            "EX GST": subtotal,
+            "Margin": round(subtotal * 0.2, 2) if i % 7 else "",
+            "Office": consultant_code[:3],
+            "Consultant Code": consultant_code,
+            "Consultant": consultant_code.split(" ", 1)[1],
+            "Area": "Area " + consultant_code[:3],
+            "Account": "200",
+            "Account Name": "Sales",
+            "# Placement": round(rnd.choice([0, 1, 1 / 3]), 6),
+            "Currency Code": "AUD",
+            "Currency Rate": 1.0,
+            "Updated Date": f"{day.day}/{day.month}/{day.year}",
+            "InvoiceID": f"{i // 4:08x}-0000-0000-0000-000000000000",
+            "Quarter": "Q1",
+        }
+
+
+def legacyPath(count):
+    """The previous export: row dicts -> DataFrame -> double date coercion -> Parquet."""
+    import numpy as np
+    import pandas as pd
+
+    from bigQuerySchemas import INVOICE_ENQUIRY_COLUMNS
+
+    started = time.perf_counter()
+    all_rows = list(syntheticRows(count))
+    df = pd.DataFrame(all_rows)
+    df["Invoice Date"] = pd.to_datetime(df["Invoice Date"], errors="coerce", dayfirst=True)
+    df["Updated Date"] = pd.to_datetime(df["Updated Date"], errors="coerce", dayfirst=True)
+    for field in ["Invoice Total", "EX GST", "Margin", "# Placement", "Currency Rate"]:
+        df[field] = pd.to_numeric(df[field], errors="coerce").replace([np.inf, -np.inf], None).round(6)
+    df.rename(columns=INVOICE_ENQUIRY_COLUMNS, inplace=True)
+    df = df.where(pd.notnull(df), None)
+    df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], errors="coerce")
+    df["UpdatedDate"] = pd.to_datetime(df["UpdatedDate"], errors="coerce")
+    transformed = time.perf_counter()
+
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return transformed - started, time.perf_counter() - transformed, buffer.tell()
+
+
+def arrowPath(count):
+    """The Arrow export: rows streamed into typed record batches -> Parquet."""
+    from bigQuerySchemas import TABLES, INVOICE_ENQUIRY_COLUMNS
+    from helpers.arrowRows import ArrowRowBuilder, toParquet
+
+    started = time.perf_counter()
+    builder = ArrowRowBuilder(TABLES["InvoiceEnquiry"]["schema"], INVOICE_ENQUIRY_COLUMNS)
+    builder.extend(syntheticRows(count))
+    table = builder.table()
+    transformed = time.perf_counter()
+
+    buffer = toParquet(table)
+    return transformed - started, time.perf_counter() - transformed, buffer.getbuffer().nbytes
+
+
+def runChild(mode, count):
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    transform_s, serialise_s, size = {"legacy": legacyPath, "arrow": arrowPath}[mode](count)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{transform_s:.3f} {serialise_s:.3f} {size} {(peak - baseline) / 1024:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the invoice export transform + Parquet serialisation")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--mode", choices=["legacy", "arrow"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        runChild(args.mode, args.rows)
+        return
+
+    print(f"Synthetic invoice lines: {args.rows:,}\n")
+    print(f"{'path':<8} {'transform':>10} {'parquet':>9} {'total':>8} {'size':>9} {'peak RSS':>10}")
+    for mode in ["legacy", "arrow"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        transform_s, serialise_s, size, rss_mb = float(output[0]), float(output[1]), int(output[2]), float(output[3])
+        print(f"{mode:<8} {transform_s:>9.2f}s {serialise_s:>8.2f}s {transform_s + serialise_s:>7.2f}s "
+              f"{size / 1e6:>7.1f}MB {rss_mb:>8.0f}MB")
+    print("\npeak RSS is the growth over interpreter start-up (includes the legacy path's row-dict list)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Benchmark + parity check: FutureYou invoice / credit note line extraction.
+
+Runs the per-invoice extract_invoice_lines / extract_credit_note_lines from before the
+columnar rewrite (loaded from git, --legacy REF) and the current batch versions on the
+same synthetic Xero documents — Temp invoices with base wage / leave / payout lines and
+matching manual-journal costs (plus a few no invoice bills), Perm invoices with
+placement splits, foreign currency, deleted invoices, unknown account codes, credit
+notes — and checks that both produce the same rows, in the same order. No Xero or
+BigQuery calls are made.
+
+    python benchmarks/invoiceLineFrames.py --invoices 20000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, "FutureYou"))
+
+import databaseInvoiceRequestv2 as current
+from databaseMappings import consultant_area_mapping
+from journalAllocation import JournalAllocationIndex
+
+SCRIPT = "FutureYou/databaseInvoiceRequestv2.py"
+CONTRACTORS = [f"Contractor {name}" for name in ["Alex", "Blair", "Casey", "Drew", "Emery", "Finley", "Gray", "Harper"]]
+CONSULTANTS = list(consultant_area_mapping)[:12] + ["SZZ999 Unmapped Person"]
+TEMP_ACCOUNTS = ["200", "210", "215"]
+PERM_ACCOUNTS = ["225", "226", "240", "250"]
+
+
+def legacyModule(ref):
+    """databaseInvoiceRequestv2 as of ref, executed as a throwaway module."""
+    if not ref:
+        ref = subprocess.run(
+            ["git", "log", "-1", "--format=%H", "-S", "EXPORT_ROW_KEYS = [", "--", SCRIPT],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        ref = f"{ref}~1" if ref else "HEAD"
+    source = subprocess.run(["git", "show", f"{ref}:{SCRIPT}"], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+    namespace = {"__name__": "legacyInvoiceRequest", "__file__": os.path.join(REPO_ROOT, SCRIPT)}
+    exec(compile(source, f"{ref}:{SCRIPT}", "exec"), namespace)
+    return namespace, ref
+
+
+def xeroDate(day):
+    ms = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() * 1000)
+    return f"/Date({ms}+0000)/"
+
+
+def tracking(rnd, consultant=True, category=True):
+    entries = []
+    if category:
+        entries.append({"Name": "Category", "Option": rnd.choice(["Sydney", "Perth"])})
+    if consultant:
+        entries.append({"Name": "Consultant", "Option": rnd.choice(CONSULTANTS)})
+    return entries
+
+
+def temperDescription(rnd, contractor, week_end):
+    units = rnd.choice([7.6, 8, 15.2, 38, 40])
+    return rnd.choice([
+        f"Base Wage - contracting services of {contractor} for the week ending {week_end} - {units} hour(s)",
+        f"Base Wage - Public Holiday of {contractor} for the week ending {week_end} - 7.6 hour(s)",
+        f"Base Wage - sick leave of {contractor} for the week ending {week_end} - {units} hour(s)",
+        f"Annual Leave - 1 day(s) of {contractor} for the week ending {week_end}",
+        f"Annual Leave Payout - balance of {contractor} on {week_end}",
+        f"Contracting services of {contractor} for the week ending {week_end}",
+        f"Program fee for {contractor}",
+    ])
+
+
+def syntheticDocuments(count, seed=11):
+    rnd = random.Random(seed)
+    start = datetime(2024, 7, 1)
+    invoices, credit_notes, journal_rows = [], [], []
+    for i in range(count):
+        day = start + timedelta(days=rnd.randrange(480))
+        week_end = (day + timedelta(days=(4 - day.weekday()) % 7)).strftime("%d/%m/%Y")
+        temp = i % 3 != 0
+        invoice = {
+            "InvoiceID": f"inv-{i}",
+            "InvoiceNumber": (f"TC-INV{i}" if i % 50 == 0 else f"TC-{i:06d}") if temp else f"INV-{i:04d}",
+            "Status": "DELETED" if i % 97 == 0 else "AUTHORISED",
+            "Date": xeroDate(day),
+            "UpdatedDateUTC": xeroDate(day + timedelta(days=rnd.randrange(5))),
+            "Contact": {"Name": f"Client {i % 40}"},
+            "CurrencyCode": "NZD" if i % 23 == 0 else "AUD",
+            "CurrencyRate": 1.0857 if i % 23 == 0 else 1,
+            "LineItems": [],
+        }
+        for _ in range(rnd.randint(1, 8) if temp else rnd.randint(1, 3)):
+            contractor = rnd.choice(CONTRACTORS)
+            amount = round(rnd.uniform(-200, 4000), 2)
+            invoice["LineItems"].append({
+                "Description": temperDescription(rnd, contractor, week_end) if temp else f"Placement fee {i}",
+                "LineAmount": amount,
+                "TaxAmount": round(amount * 0.1, 2),
+                "AccountCode": rnd.choice(TEMP_ACCOUNTS if temp else PERM_ACCOUNTS) if rnd.random() > 0.01 else "999",
+                "Tracking": tracking(rnd, consultant=rnd.random() > 0.03),
+            })
+            if temp and rnd.random() < 0.6:
+                calendar_day = current.COMPANY_CALENDAR.lookup(day)
+                journal_rows.append({
+                    "Year": day.year, "Month": calendar_day.month, "Week": calendar_day.week,
+                    "Contractor": contractor, "Line Amount": -round(amount * rnd.uniform(0.6, 0.85), 2),
+                    "Units Worked": rnd.choice([0, 7.6, 38]), "Account Code": rnd.choice([500, 826]),
+                })
+        invoices.append(invoice)
+        if i % 500 == 0:
+            # journal cost for a contractor no invoice bills — reported as unmatched
+            calendar_day = current.COMPANY_CALENDAR.lookup(day)
+            journal_rows.append({
+                "Year": day.year, "Month": calendar_day.month, "Week": calendar_day.week, "Contractor": "Contractor Nobody",
+                "Line Amount": -1000.0, "Units Worked": 38, "Account Code": 500,
+            })
+        if i % 10 == 0:
+            credit_notes.append({
+                "CreditNoteID": f"cn-{i}",
+                "CreditNoteNumber": f"CN-{i:05d}" if i % 20 else f"CN{i:06d}",
+                "Status": "VOIDED" if i % 110 == 0 else "AUTHORISED",
+                "Date": xeroDate(day),
+                "UpdatedDateUTC": xeroDate(day),
+                "Contact": {"Name": f"Client {i % 40}"},
+                "CurrencyRate": 1,
+                "LineItems": [{
+                    "Description": f"Credit {i}", "LineAmount": round(rnd.uniform(0, 900), 2) if i % 30 else 0.001,
+                    "TaxAmount": 5.0, "AccountCode": rnd.choice(TEMP_ACCOUNTS + PERM_ACCOUNTS + [""]),
+                    "Tracking": tracking(rnd, consultant=rnd.random() > 0.2, category=rnd.random() > 0.2),
+                }],
+            })
+    return invoices, credit_notes, journal_rows
+
+
+def journalTotals(build_key, journal_rows):
+    """journal_amounts / journal_units the way main() built them before JournalAllocationIndex."""
+    amounts, units = {}, {}
+    for row in journal_rows:
+        key = build_key(row["Year"], row["Month"], row["Week"], row["Contractor"])
+        if row["Account Code"] == 826 and row["Contractor"] != "":
+            amounts[key] = amounts.get(key, 0)
+        else:
+            amounts[key] = amounts.get(key, 0) + row["Line Amount"]
+        units[key] = units.get(key, 0) + row["Units Worked"]
+    return amounts, units
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and parity-check the columnar invoice line extraction")
+    parser.add_argument("--invoices", type=int, default=20_000)
+    parser.add_argument("--legacy", metavar="REF", help="Revision to load the per-invoice extractors from")
+    args = parser.parse_args()
+
+    legacy, ref = legacyModule(args.legacy)
+    legacy["consultant_area_mapping"] = current.consultant_area_mapping = consultant_area_mapping
+    invoices, credit_notes, journal_rows = syntheticDocuments(args.invoices)
+    amounts, units = journalTotals(legacy["build_key"], journal_rows)
+    lines = sum(len(inv["LineItems"]) for inv in invoices)
+    print(f"{len(invoices):,} invoices ({lines:,} lines), {len(credit_notes):,} credit notes; legacy from {ref}\n")
+
+    def runLegacy():
+        rows, deleted = [], []
+        for invoice in invoices:
+            for row in legacy["extract_invoice_lines"](invoice, amounts, units):
+                if row.get("__deleted__"):
+                    if row.get("InvoiceID"):
+                        deleted.append(row["InvoiceID"])
+                else:
+                    rows.append(row)
+        for cn in credit_notes:
+            rows.extend(legacy["extract_credit_note_lines"](cn))
+        return rows, deleted
+
+    def runColumnar():
+        frame, deleted = current.extract_invoice_lines(invoices, journal_index)
+        return frame, current.extract_credit_note_lines(credit_notes), deleted
+
+    journal_index = JournalAllocationIndex.from_journal_rows(journal_rows)
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")  # both print one warning per unknown account code
+    try:
+        (legacy_rows, legacy_deleted), legacy_s = timed(runLegacy)
+        (frame, cn_frame, deleted), columnar_s = timed(runColumnar)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    print(f"{'legacy per invoice':<24} {legacy_s:>8.2f}s\n{'columnar':<24} {columnar_s:>8.2f}s")
+
+    keys = current.EXPORT_ROW_KEYS
+    columnar_rows = frame.to_dict("records") + cn_frame.to_dict("records")
+    mismatches = [
+        (i, key, a.get(key), b.get(key))
+        for i, (a, b) in enumerate(zip(legacy_rows, columnar_rows))
+        for key in keys if a.get(key) != b.get(key)
+    ]
+    if len(legacy_rows) != len(columnar_rows):
+        mismatches.append(("row count", None, len(legacy_rows), len(columnar_rows)))
+    if legacy_deleted != deleted:
+        mismatches.append(("deleted ids", None, len(legacy_deleted), len(deleted)))
+
+    print(f"\n{len(columnar_rows):,} rows, {len(deleted):,} deleted; {legacy_s / columnar_s:.1f}x faster; "
+          f"{len(mismatches)} mismatches; {len(journal_index.unmatched()):,} of {len(journal_index.costs):,} "
+          f"journal keys unmatched")
+    for mismatch in mismatches[:10]:
+        print(f"   {mismatch}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
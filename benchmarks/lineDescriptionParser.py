@@ -0,0 +1,116 @@
+"""
+Benchmark + parity check: contractor / units parsing of FutureYou line descriptions.
+
+Runs the old extract_contractor + extract_units_worked (loaded from git, --legacy REF) and
+the old manual-journal description.split(":") against LineDescriptionParser on the same
+synthetic descriptions — weekly contractor invoices repeat their phrases, so a small
+share of them is distinct — plus edge cases (several keywords, missing " for the week",
+capitalised phrases). Checks that contractor and units agree on every line.
+
+    python benchmarks/lineDescriptionParser.py --lines 500000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import subprocess
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, "FutureYou"))
+
+from lineDescriptions import LineDescriptionParser
+
+SCRIPT = "FutureYou/databaseInvoiceRequestv2.py"
+CONTRACTORS = [f"{first} {last}" for first in ["Alex", "Blair", "Casey", "Drew", "Emery"] for last in ["Ng", "Smith", "O'Neil"]]
+TEMPLATES = [
+    "Base Wage - contracting services of {name} for the week ending {week} - {units} hour(s)",
+    "Base Wage - Public Holiday of {name} for the week ending {week} - 7.6 hour(s)",
+    "Base Wage - personal leave of {name} for the week ending {week} - {units} hour(s)",
+    "Base Wage - sick leave of {name} for the week ending {week} - 1 day(s)",
+    "Base Wage - payment in lieu of notice of {name} for the week ending {week} - 5 day(s)",
+    "Annual Leave - 2 day(s) of {name} for the week ending {week}",
+    "Annual Leave Payout - balance of {name} on {week}",
+    "Contracting services of {name} for the week ending {week}",
+    "contracting services of {name} for the week ending {week} - {units} HOUR(S)",
+    "Program fee for {name}",
+    "Base Wage - sick leave of {name} ending {week} - contracting services of {name} for the week",
+    "Base Wage - overtime of {name} for the week ending {week}",
+    "",
+]
+EDGE_JOURNAL = ["", "Wages", "Wages:", "Wages: Jane Smith ", "Wages:Jane Smith: 38 ", "Super:Jane:7.6:extra"]
+
+
+def legacyFunctions(ref):
+    """extract_contractor / extract_units_worked as of ref (before the parser)."""
+    if not ref:
+        ref = subprocess.run(
+            ["git", "log", "-1", "--format=%H", "-S", "EXPORT_ROW_KEYS = [", "--", SCRIPT],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip() + "~1"
+    source = subprocess.run(["git", "show", f"{ref}:{SCRIPT}"], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+    namespace = {"__name__": "legacyInvoiceRequest", "__file__": os.path.join(REPO_ROOT, SCRIPT)}
+    exec(compile(source, f"{ref}:{SCRIPT}", "exec"), namespace)
+    return namespace["extract_contractor"], namespace["extract_units_worked"], ref
+
+
+def legacyJournalSplit(description):
+    """manualJournalRequest.parse_manual_journal_lines before the parser."""
+    parts = description.split(":")
+    contractor = parts[1].strip() if len(parts) > 1 else None
+    units_worked = parts[2].strip() if len(parts) > 2 else None
+    return contractor, units_worked
+
+
+def syntheticDescriptions(count, seed=5):
+    rnd = random.Random(seed)
+    weeks = [(date(2024, 7, 5) + timedelta(weeks=i)).strftime("%d/%m/%Y") for i in range(60)]
+    lines, journals = [], []
+    for _ in range(count):
+        values = {"name": rnd.choice(CONTRACTORS), "week": rnd.choice(weeks), "units": rnd.choice([7.6, 15.2, 38, 40])}
+        lines.append(rnd.choice(TEMPLATES).format(**values))
+        journals.append(f"{rnd.choice(['Wages', 'Super', 'Payroll Tax'])}:{values['name']}:{values['units']}")
+    return lines, journals + EDGE_JOURNAL
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:>8.2f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and parity-check the line description parser")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--legacy", metavar="REF", help="Revision to load extract_contractor / extract_units_worked from")
+    args = parser.parse_args()
+
+    extract_contractor, extract_units_worked, ref = legacyFunctions(args.legacy)
+    lines, journals = syntheticDescriptions(args.lines)
+    print(f"{len(lines):,} invoice lines ({len(set(lines)):,} distinct), {len(journals):,} journal lines; legacy from {ref}\n")
+
+    legacy, legacy_s = timed("legacy find() scans", lambda: (
+        [(extract_contractor("Temp", d), extract_units_worked(d)) for d in lines],
+        [legacyJournalSplit(d) for d in journals],
+    ))
+    descriptions = LineDescriptionParser()
+    parsed, parsed_s = timed("compiled + cached", lambda: (
+        [descriptions.parse(d)[::2] for d in lines],
+        [descriptions.parse_journal(d) for d in journals],
+    ))
+
+    mismatches = [(d, a, b) for d, a, b in zip(lines, legacy[0], parsed[0]) if a != b]
+    mismatches += [(d, a, b) for d, a, b in zip(journals, legacy[1], parsed[1]) if a != b]
+    print(f"\n{legacy_s / parsed_s:.1f}x faster, cache hit rate {descriptions.hit_rate():.1%}; {len(mismatches)} mismatches")
+    for mismatch in mismatches[:10]:
+        print(f"   {mismatch}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
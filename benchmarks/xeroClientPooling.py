@@ -0,0 +1,114 @@
+"""
+Benchmark: per-call requests.get vs the pooled XeroClient session.
+
+Starts a local stub Xero server and makes N calls each way, reporting wall time
+and how many TCP connections the server accepted. Pass --certfile/--keyfile to
+serve over TLS so the handshake cost is included, e.g.
+
+    openssl req -x509 -newkey rsa:2048 -nodes -subj /CN=localhost \\
+        -keyout /tmp/stub.key -out /tmp/stub.crt
+    python benchmarks/xeroClientPooling.py --certfile /tmp/stub.crt --keyfile /tmp/stub.key
+"""
+import sys
+import os
+import ssl
+import json
+import time
+import argparse
+import threading
+import requests
+import urllib3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.xeroClient import XeroClient
+from helpers.xeroRateLimiter import XeroRateLimiter
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+STUB_BODY = json.dumps({"Invoices": [{"InvoiceID": "stub", "Status": "AUTHORISED"}]}).encode()
+
+
+class StubXeroHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with StubXeroHandler.lock:
+            StubXeroHandler.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_BODY)))
+        self.end_headers()
+        self.wfile.write(STUB_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def startStubServer(certfile=None, keyfile=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubXeroHandler)
+    scheme = "http"
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/api.xro/2.0"
+
+
+def runUnpooled(base_url, calls):
+    for _ in range(calls):
+        res = requests.get(
+            f"{base_url}/Invoices",
+            headers={"Authorization": "Bearer stub", "Xero-tenant-id": "stub", "Accept": "application/json"},
+            params={"page": 1},
+            verify=False,
+        )
+        res.raise_for_status()
+
+
+def runPooled(base_url, calls):
+    # Unthrottled limiter so the benchmark measures connection cost, not Xero's budget
+    limiter = XeroRateLimiter(minute_limit=10**6, day_limit=10**6)
+    client = XeroClient("stub", "stub", base_url=base_url, limiter=limiter)
+    for _ in range(calls):
+        res = client.get("Invoices", params={"page": 1}, verify=False)
+        res.raise_for_status()
+
+
+def measure(label, fn, base_url, calls):
+    StubXeroHandler.connections = 0
+    start = time.perf_counter()
+    fn(base_url, calls)
+    elapsed = time.perf_counter() - start
+    print(f"| {label} | {calls} | {elapsed:.2f}s | {elapsed / calls * 1000:.2f}ms | {StubXeroHandler.connections} |")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call Xero HTTP requests.")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--certfile", type=str, default=None)
+    parser.add_argument("--keyfile", type=str, default=None)
+    args = parser.parse_args()
+
+    server, base_url = startStubServer(args.certfile, args.keyfile)
+    print(f"Stub server at {base_url}\n")
+    print("| Mode | Calls | Total | Per call | Connections |")
+    print("| --- | --- | --- | --- | --- |")
+    unpooled = measure("requests.get per call", runUnpooled, base_url, args.calls)
+    pooled = measure("XeroClient (pooled)", runPooled, base_url, args.calls)
+    print(f"\nSpeed-up: {unpooled / pooled:.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
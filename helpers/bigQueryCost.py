@@ -0,0 +1,247 @@
+import os
+import re
+import copy
+import time
+import atexit
+import threading
+from collections import deque
+
+ON_DEMAND_USD_PER_TIB = 6.25
+QUERY_COST_HISTORY = 500
+
+# BQ_COST_MODE: "record" (default) runs queries and records their stats; "estimate" dry-runs
+# each query first and records the estimate next to the actual; "dry-run" only dry-runs
+# queries and skips every write call in DRY_RUN_SKIPPED (loads, inserts, copies, table
+# create/delete) — nothing executes, reads come back empty, and sync watermarks are not
+# committed. Staged upserts (bigQueryUpsert) skip their staging table and dry-run the MERGE. BQ_MAX_BYTES_PER_QUERY refuses to run any query whose dry-run estimate is
+# larger (implies "estimate").
+COST_MODES = ("record", "estimate", "dry-run")
+
+DRY_RUN_SKIPPED = (
+    "load_table_from_dataframe", "load_table_from_file", "load_table_from_uri", "load_table_from_json",
+    "insert_rows", "insert_rows_json", "insert_rows_from_dataframe",
+    "copy_table", "delete_table", "create_table", "update_table",
+)
+
+_STATEMENT = re.compile(
+    r"^\s*(?:BEGIN\b[^;]*;\s*)?"
+    r"(MERGE|DELETE|INSERT|UPDATE|TRUNCATE\s+TABLE|CREATE(?:\s+OR\s+REPLACE)?\s+TABLE|SELECT)\b",
+    re.IGNORECASE,
+)
+_TABLE = re.compile(r"`?([\w\-]+\.[\w\-]+(?:\.[\w\-]+)?)`?")
+_FROM_TABLE = re.compile(r"\bFROM\s+`?([\w\-]+\.[\w\-]+(?:\.[\w\-]+)?)`?", re.IGNORECASE)
+
+
+def queryLabel(sql):
+    """Short label for a statement, e.g. 'MERGE InvoiceEnquiry' or 'SELECT RecruiterForecasts'."""
+    match = _STATEMENT.match(sql or "")
+    if not match:
+        return "query"
+    verb = match.group(1).split()[0].upper()
+    rest = sql[match.end():]
+    table = (_FROM_TABLE if verb == "SELECT" else _TABLE).search(rest)
+    return f"{verb} {table.group(1).split('.')[-1]}" if table else verb
+
+
+def _formatBytes(num_bytes):
+    if num_bytes is None:
+        return "—"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1000:
+            return f"{num_bytes:,.0f} {unit}" if unit == "B" else f"{num_bytes:,.1f} {unit}"
+        num_bytes /= 1000
+    return f"{num_bytes:,.2f} TB"
+
+
+class QueryCostLedger:
+    """
+    Per-process record of every BigQuery query job: bytes processed/billed, slot-ms and
+    wall time, plus the dry-run estimate when one was made.
+
+    track() only remembers the job; settle() reads the stats of the jobs that have
+    finished (the caller's own result() already fetched them, so no extra API calls) and
+    logs one line per job. The backends settle after each request, the ETLs when they
+    render summaryLines() for GITHUB_STEP_SUMMARY, and anything left is settled at exit.
+    """
+
+    def __init__(self, mode=None, max_bytes=None, history=QUERY_COST_HISTORY):
+        self.mode = (mode or os.getenv("BQ_COST_MODE") or "record").lower()
+        if self.mode not in COST_MODES:
+            raise ValueError(f"❌ BQ_COST_MODE must be one of {', '.join(COST_MODES)} (got {self.mode!r})")
+        self.max_bytes = max_bytes or int(os.getenv("BQ_MAX_BYTES_PER_QUERY", 0) or 0) or None
+        self.entries = deque(maxlen=history)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def track(self, label, job, estimated_bytes=None):
+        with self.lock:
+            self.pending.append((label, job, estimated_bytes, time.perf_counter()))
+        return job
+
+    def settle(self, final=False):
+        """Record every tracked job that has finished (with final, wait on the stragglers' status too)."""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        waiting = []
+        for label, job, estimated, started in pending:
+            if job.state != "DONE" and final:
+                try:
+                    job.reload()
+                except Exception:
+                    pass
+            if job.state == "DONE":
+                self.record(label, job, estimated, started)
+            else:
+                waiting.append((label, job, estimated, started))
+        if waiting:
+            with self.lock:
+                self.pending = waiting + self.pending
+
+    def record(self, label, job, estimated_bytes=None, started=None):
+        ended = job.ended or job.started
+        wall_s = (ended - job.started).total_seconds() if job.started and ended else (
+            time.perf_counter() - started if started else None
+        )
+        entry = {
+            "label": label,
+            "job_id": job.job_id,
+            "dry_run": bool(getattr(job, "dry_run", False)),
+            "estimated_bytes": estimated_bytes,
+            "bytes_processed": job.total_bytes_processed,
+            "bytes_billed": None if getattr(job, "dry_run", False) else job.total_bytes_billed,
+            "slot_ms": job.slot_millis,
+            "wall_s": wall_s,
+            "cache_hit": bool(job.cache_hit),
+            "error": job.error_result.get("message") if job.error_result else None,
+        }
+        with self.lock:
+            self.entries.append(entry)
+        status = f"❌ {entry['error']}" if entry["error"] else ("dry run" if entry["dry_run"] else "done")
+        print(f"📈 {label}: {_formatBytes(entry['bytes_processed'])} processed, "
+              f"{entry['slot_ms'] or 0:,} slot-ms, {wall_s or 0:.2f}s ({status})")
+        return entry
+
+    def totals(self):
+        with self.lock:
+            entries = list(self.entries)
+        billed = sum(e["bytes_billed"] or 0 for e in entries)
+        return {
+            "queries": len(entries),
+            "bytes_processed": sum(e["bytes_processed"] or 0 for e in entries),
+            "bytes_billed": billed,
+            "slot_ms": sum(e["slot_ms"] or 0 for e in entries),
+            "usd": billed / 2 ** 40 * ON_DEMAND_USD_PER_TIB,
+        }
+
+    def summaryLines(self):
+        """Markdown cost table for the run (empty when no queries ran)."""
+        self.settle(final=True)
+        with self.lock:
+            entries = list(self.entries)
+        if not entries:
+            return []
+        totals = self.totals()
+        lines = [
+            f"### BigQuery Cost ({self.mode})",
+            "| Query | Estimated | Processed | Billed | Slot-ms | Wall |",
+            "| --- | --- | --- | --- | --- | --- |",
+        ]
+        for e in entries:
+            label = f"{e['label']} ❌" if e["error"] else e["label"]
+            lines.append(
+                f"| {label} | {_formatBytes(e['estimated_bytes'])} | {_formatBytes(e['bytes_processed'])} | "
+                f"{_formatBytes(e['bytes_billed'])} | {e['slot_ms'] or 0:,} | {e['wall_s'] or 0:.2f}s |"
+            )
+        lines += [
+            f"| **Total ({totals['queries']})** | | **{_formatBytes(totals['bytes_processed'])}** | "
+            f"**{_formatBytes(totals['bytes_billed'])}** | **{totals['slot_ms']:,}** | |",
+            "",
+            f"_≈ ${totals['usd']:,.4f} at on-demand ${ON_DEMAND_USD_PER_TIB}/TiB_",
+            "",
+        ]
+        return lines
+
+
+QUERY_COSTS = QueryCostLedger()
+atexit.register(QUERY_COSTS.settle, final=True)
+
+
+def isDryRun():
+    """True under BQ_COST_MODE=dry-run — ETLs skip their writes and watermark commits."""
+    return QUERY_COSTS.mode == "dry-run"
+
+
+class SkippedJob:
+    """Stands in for the load/copy job a dry-run skipped: already done, nothing written."""
+    job_id = "dry-run-skipped"
+    state = "DONE"
+    output_rows = 0
+    errors = None
+    error_result = None
+
+    def result(self, *args, **kwargs):
+        return self
+
+    def done(self, *args, **kwargs):
+        return True
+
+
+def _skippedWrite(name, args, kwargs):
+    if name.startswith(("load_", "copy_")):
+        target = args[1] if len(args) > 1 else kwargs.get("destination")
+    else:
+        target = args[0] if args else kwargs.get("table")
+    target = getattr(target, "table_id", target)
+    print(f"🧪 BQ_COST_MODE=dry-run: skipped {name}({target or ''})")
+    if name.startswith("insert_rows"):
+        return []
+    if name in ("create_table", "update_table"):
+        return args[0] if args else None
+    if name == "delete_table":
+        return None
+    return SkippedJob()
+
+
+class TrackedBigQueryClient:
+    """
+    bigquery.Client wrapper whose query() records every job in a QueryCostLedger.
+
+    Everything else (load jobs, get_table, dataset, ...) is passed straight through to the
+    wrapped client — except, in dry-run mode, the write calls in DRY_RUN_SKIPPED, which
+    are logged and skipped (load/copy calls return a finished SkippedJob).
+    """
+
+    def __init__(self, client, ledger=None):
+        self._client = client
+        self._ledger = ledger or QUERY_COSTS
+
+    def __getattr__(self, name):
+        if name in DRY_RUN_SKIPPED and self._ledger.mode == "dry-run":
+            return lambda *args, **kwargs: _skippedWrite(name, args, kwargs)
+        return getattr(self._client, name)
+
+    def _dryRun(self, query, job_config, **kwargs):
+        from google.cloud import bigquery
+
+        config = copy.deepcopy(job_config) if job_config is not None else bigquery.QueryJobConfig()
+        config.dry_run = True
+        config.use_query_cache = False
+        return self._client.query(query, job_config=config, **kwargs)
+
+    def query(self, query, job_config=None, label=None, **kwargs):
+        ledger = self._ledger
+        label = label or queryLabel(query)
+        estimated = None
+
+        if ledger.mode != "record" or ledger.max_bytes:
+            dry_job = self._dryRun(query, job_config, **kwargs)
+            estimated = dry_job.total_bytes_processed
+            if ledger.mode == "dry-run":
+                return ledger.track(label, dry_job, estimated_bytes=estimated)
+            if ledger.max_bytes and estimated and estimated > ledger.max_bytes:
+                raise ValueError(
+                    f"❌ {label} would process {_formatBytes(estimated)} "
+                    f"(BQ_MAX_BYTES_PER_QUERY={_formatBytes(ledger.max_bytes)})"
+                )
+
+        return ledger.track(label, self._client.query(query, job_config=job_config, **kwargs), estimated)
@@ -0,0 +1,247 @@
+import time
+
+import pyarrow as pa
+from google.api_core import exceptions
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+STREAM_BATCH_ROWS = 500
+STREAM_APPEND_ATTEMPTS = 4
+
+_PROTO_TYPES = {
+    "STRING": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "INTEGER": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "INT64": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "FLOAT": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "FLOAT64": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "BOOL": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    "BOOLEAN": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    # The Write API takes TIMESTAMP as epoch microseconds and DATE as days since epoch
+    "TIMESTAMP": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "DATE": descriptor_pb2.FieldDescriptorProto.TYPE_INT32,
+}
+
+# google.rpc.Code values the append response can carry
+_STATUS_ERRORS = {
+    3: exceptions.InvalidArgument,
+    4: exceptions.DeadlineExceeded,
+    6: exceptions.AlreadyExists,
+    10: exceptions.Aborted,
+    11: exceptions.OutOfRange,
+    13: exceptions.InternalServerError,
+    14: exceptions.ServiceUnavailable,
+}
+_RETRYABLE = (
+    exceptions.DeadlineExceeded,
+    exceptions.Aborted,
+    exceptions.InternalServerError,
+    exceptions.ServiceUnavailable,
+    ConnectionError,
+)
+
+
+def rowDescriptor(fields, name="InvoiceRow"):
+    """proto2 DescriptorProto for a list of BigQuery SchemaFields (every field optional, so None -> NULL)."""
+    descriptor = descriptor_pb2.DescriptorProto(name=name)
+    for number, field in enumerate(fields, start=1):
+        descriptor.field.add(
+            name=field.name,
+            number=number,
+            type=_PROTO_TYPES[field.field_type.upper()],
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+        )
+    return descriptor
+
+
+def rowMessageClass(descriptor):
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name=f"{descriptor.name}.proto", package="bigQueryStreamSink", syntax="proto2"
+    )
+    file_proto.message_type.add().CopyFrom(descriptor)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName(f"bigQueryStreamSink.{descriptor.name}"))
+
+
+def _writeValues(table):
+    """Cast TIMESTAMP/DATE columns to the integers the Write API expects."""
+    for index, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            column = table.column(index).cast(pa.timestamp("us", tz="UTC")).cast(pa.int64())
+        elif pa.types.is_date32(field.type):
+            column = table.column(index).cast(pa.int32())
+        else:
+            continue
+        table = table.set_column(index, field.name, column)
+    return table
+
+
+class BigQueryStorageWriter:
+    """Committed-mode write streams through the BigQuery Storage Write API (google-cloud-bigquery-storage)."""
+
+    def __init__(self, credentials=None):
+        from google.cloud import bigquery_storage_v1
+        from google.cloud.bigquery_storage_v1 import types
+
+        self.types = types
+        self.client = bigquery_storage_v1.BigQueryWriteClient(credentials=credentials)
+
+    def createStream(self, table_ref):
+        project_id, dataset_id, table_id = table_ref.split(".")
+        stream = self.types.WriteStream(type_=self.types.WriteStream.Type.COMMITTED)
+        return self.client.create_write_stream(
+            parent=self.client.table_path(project_id, dataset_id, table_id), write_stream=stream
+        ).name
+
+    def append(self, stream, descriptor, rows, offset):
+        request = self.types.AppendRowsRequest(
+            write_stream=stream,
+            offset=offset,
+            proto_rows=self.types.AppendRowsRequest.ProtoData(
+                writer_schema=self.types.ProtoSchema(proto_descriptor=descriptor),
+                rows=self.types.ProtoRows(serialized_rows=rows),
+            ),
+        )
+        response = next(iter(self.client.append_rows(iter([request]))))
+        if response.error.code:
+            raise _STATUS_ERRORS.get(response.error.code, exceptions.GoogleAPICallError)(response.error.message)
+        if response.row_errors:
+            raise ValueError(f"❌ {len(response.row_errors)} rows rejected: {response.row_errors[0].message}")
+
+    def finalize(self, stream):
+        return self.client.finalize_write_stream(name=stream).row_count
+
+
+class FakeStreamWriter:
+    """
+    In-memory writer with the Write API's committed-stream offset rules, for local runs.
+
+    An append at an offset that is already written raises AlreadyExists, one past the
+    end raises OutOfRange. fail_appends makes the next N appends raise
+    ServiceUnavailable; lose_responses makes the next N appends land and then raise
+    DeadlineExceeded, as when the response is lost after the server committed the rows.
+    """
+
+    def __init__(self, fail_appends=0, lose_responses=0):
+        self.fail_appends = fail_appends
+        self.lose_responses = lose_responses
+        self.streams = {}
+        self.appends = 0
+
+    def createStream(self, table_ref):
+        name = f"{table_ref}/streams/fake-{len(self.streams) + 1}"
+        self.streams[name] = {"rows": [], "descriptor": None, "finalized": False}
+        return name
+
+    def append(self, stream, descriptor, rows, offset):
+        self.appends += 1
+        state = self.streams[stream]
+        if state["finalized"]:
+            raise exceptions.FailedPrecondition(f"Stream {stream} is finalized")
+        if self.fail_appends:
+            self.fail_appends -= 1
+            raise exceptions.ServiceUnavailable("fake transient failure")
+        if offset < len(state["rows"]):
+            raise exceptions.AlreadyExists(f"Offset {offset} already written")
+        if offset > len(state["rows"]):
+            raise exceptions.OutOfRange(f"Offset {offset} is past the end ({len(state['rows'])})")
+        state["descriptor"] = descriptor
+        state["rows"].extend(rows)
+        if self.lose_responses:
+            self.lose_responses -= 1
+            raise exceptions.DeadlineExceeded("fake lost response")
+
+    def finalize(self, stream):
+        self.streams[stream]["finalized"] = True
+        return len(self.streams[stream]["rows"])
+
+    def readRows(self, stream):
+        """Decode a stream's committed rows back into dicts (NULL columns omitted)."""
+        state = self.streams[stream]
+        if not state["rows"]:
+            return []
+        message_class = rowMessageClass(state["descriptor"])
+        decoded = []
+        for payload in state["rows"]:
+            message = message_class.FromString(payload)
+            decoded.append({field.name: value for field, value in message.ListFields()})
+        return decoded
+
+
+class StorageWriteSink:
+    """
+    Streams typed Arrow tables into a BigQuery table through one committed write stream.
+
+    Rows are visible as soon as each append returns — no load jobs. Every append carries
+    the stream offset it expects to write at, so a retried append whose first attempt
+    actually landed comes back AlreadyExists and is skipped instead of duplicating rows
+    (exactly-once within the stream). To resume after a restart without re-sending,
+    persist sink.stream / sink.offset and pass them back in.
+
+    The sink is append-only: callers that re-stream an existing key must delete its old
+    rows first (see databaseInvoiceRequestv2.stream_to_bigquery).
+    """
+
+    def __init__(self, table_ref, fields, writer=None, stream=None, offset=0,
+                 batch_rows=STREAM_BATCH_ROWS, max_attempts=STREAM_APPEND_ATTEMPTS):
+        self.table_ref = table_ref
+        self.writer = writer or BigQueryStorageWriter()
+        self.descriptor = rowDescriptor(fields)
+        self.message_class = rowMessageClass(self.descriptor)
+        self.columns = [f.name for f in fields]
+        self.stream = stream
+        self.offset = offset
+        self.batch_rows = batch_rows
+        self.max_attempts = max_attempts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _serialise(self, rows):
+        message_class = self.message_class
+        return [
+            message_class(**{k: v for k, v in row.items() if v is not None}).SerializeToString()
+            for row in rows
+        ]
+
+    def _append(self, rows):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.writer.append(self.stream, self.descriptor, rows, self.offset)
+                return "written"
+            except exceptions.AlreadyExists:
+                # An earlier attempt committed this batch before its response was lost
+                return "already written"
+            except _RETRYABLE as e:
+                if attempt == self.max_attempts:
+                    raise
+                wait = min(2 ** (attempt - 1), 10)
+                print(f"⚠️ Append at offset {self.offset} failed ({e}) — retrying in {wait}s")
+                time.sleep(wait)
+
+    def write(self, table):
+        """Append every row of an Arrow table (columns matching the sink's fields). Returns rows written."""
+        if not table.num_rows:
+            return 0
+        if self.stream is None:
+            self.stream = self.writer.createStream(self.table_ref)
+            print(f"📡 Opened write stream {self.stream}")
+
+        table = _writeValues(table.select(self.columns))
+        for batch in table.to_batches(max_chunksize=self.batch_rows):
+            rows = self._serialise(batch.to_pylist())
+            self._append(rows)
+            self.offset += len(rows)
+        return table.num_rows
+
+    def close(self):
+        """Finalize the stream (no further appends). Returns the stream's committed row count."""
+        if self.stream is None:
+            return 0
+        row_count = self.writer.finalize(self.stream)
+        print(f"📡 Finalized {self.stream} ({row_count} rows)")
+        self.stream = None
+        self.offset = 0
+        return row_count
@@ -0,0 +1,209 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+from helpers.arrowRows import toParquet
+from helpers.bigQueryCost import isDryRun
+
+DELETED_COLUMN = "_deleted"
+STAGING_TABLE_TTL = timedelta(hours=1)
+
+
+def _keyMatch(key_columns, target="T", source_table="staging"):
+    """WHERE-style condition: the target row's key appears anywhere in the staging table."""
+    if len(key_columns) == 1:
+        key = key_columns[0]
+        return f"{target}.`{key}` IN (SELECT `{key}` FROM {source_table})"
+    target_key = ", ".join(f"{target}.`{k}`" for k in key_columns)
+    source_key = ", ".join(f"`{k}`" for k in key_columns)
+    return f"STRUCT({target_key}) IN (SELECT AS STRUCT {source_key} FROM {source_table})"
+
+
+def _stagingFrame(df, key_columns, deleted_keys):
+    staged = df.copy()
+    staged[DELETED_COLUMN] = False
+    deleted_keys = list(deleted_keys or [])
+    if not deleted_keys:
+        return staged
+
+    deleted = pd.DataFrame(
+        [k if isinstance(k, (tuple, list)) else (k,) for k in deleted_keys], columns=key_columns
+    )
+    deleted[DELETED_COLUMN] = True
+    return pd.concat([staged, deleted], ignore_index=True) if not staged.empty else deleted
+
+
+def _stagingRef(table_ref):
+    project_id, dataset_id, table_id = table_ref.split(".")
+    return f"{project_id}.{dataset_id}._staging_{table_id}_{uuid.uuid4().hex[:8]}"
+
+
+def _mergeQuery(table_ref, source, key_columns, columns, replace_all):
+    """MERGE replacing the target rows whose key appears in source (a table or subquery with DELETED_COLUMN)."""
+    column_list = ", ".join(f"`{c}`" for c in columns)
+    remove_condition = "" if replace_all else f" AND {_keyMatch(key_columns, source_table=source)}"
+    insert_clause = f"WHEN NOT MATCHED BY TARGET THEN INSERT ({column_list}) VALUES ({column_list})" if columns else ""
+    return f"""
+        MERGE `{table_ref}` T
+        USING (SELECT * FROM {source} WHERE NOT {DELETED_COLUMN}) S
+        ON FALSE
+        WHEN NOT MATCHED BY SOURCE{remove_condition} THEN DELETE
+        {insert_clause}
+    """
+
+
+def _mergeFromStaging(client, table_ref, staging_ref, key_columns, columns, replace_all):
+    """Expire the loaded staging table, run the MERGE and drop the staging table."""
+    try:
+        staging_table = client.get_table(staging_ref)
+        staging_table.expires = datetime.now(timezone.utc) + STAGING_TABLE_TTL
+        client.update_table(staging_table, ["expires"])
+
+        job = client.query(_mergeQuery(table_ref, f"`{staging_ref}`", key_columns, columns, replace_all))
+        job.result()
+    finally:
+        client.delete_table(staging_ref, not_found_ok=True)
+    return job.num_dml_affected_rows or 0
+
+
+# SchemaField legacy type names -> GoogleSQL types for CAST
+_SQL_TYPES = {"INTEGER": "INT64", "FLOAT": "FLOAT64", "BOOLEAN": "BOOL"}
+
+
+def _dryRunMerge(client, table_ref, schema, key_columns, replace_all, row_count):
+    """
+    BQ_COST_MODE=dry-run: estimate the upsert's MERGE without creating a staging table.
+
+    The staging table is replaced by a zero-row inline source with the staged columns'
+    target types; a MERGE's bytes processed come from the target columns it reads, not
+    from the source rows, so the estimate is the real statement's. Returns 0.
+    """
+    from google.cloud import bigquery
+
+    fields = [f for f in schema if f.name != DELETED_COLUMN]
+    casts = ", ".join(f"CAST(NULL AS {_SQL_TYPES.get(f.field_type, f.field_type)}) AS `{f.name}`" for f in fields)
+    source = f"(SELECT {casts}, FALSE AS {DELETED_COLUMN} FROM UNNEST([1]) WHERE FALSE)"
+    query = _mergeQuery(table_ref, source, key_columns, [f.name for f in fields], replace_all)
+    client.query(query, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False))
+    print(f"🧪 BQ_COST_MODE=dry-run: estimated the MERGE of {row_count} rows into {table_ref} (nothing staged or written).")
+    return 0
+
+
+def upsertDataFrame(client, df, table_ref, key_columns, deleted_keys=None, replace_all=False):
+    """
+    Replace the rows of table_ref for every key in df (and delete deleted_keys) with one MERGE.
+
+    df is loaded into a short-lived staging table next to the target, then a single
+    MERGE deletes the target rows whose key is staged and inserts the staged rows. A key
+    can have many rows (e.g. one per invoice line) — all of its old rows are replaced.
+    With replace_all the MERGE also deletes every target row that isn't staged, giving
+    an atomic full reload. If the target table doesn't exist yet it is created by loading
+    df into it directly.
+
+    Returns the number of rows the MERGE affected (inserted + deleted).
+    """
+    key_columns = [key_columns] if isinstance(key_columns, str) else list(key_columns)
+
+    try:
+        target = client.get_table(table_ref)
+    except NotFound:
+        if df.empty:
+            return 0
+        if isDryRun():
+            print(f"🧪 BQ_COST_MODE=dry-run: {table_ref} doesn't exist — would create it with {len(df)} rows.")
+            return 0
+        client.load_table_from_dataframe(
+            df, table_ref, job_config=bigquery.LoadJobConfig(write_disposition="WRITE_APPEND")
+        ).result()
+        print(f"🆕 Created {table_ref} with {len(df)} rows.")
+        return len(df)
+
+    staged = _stagingFrame(df, key_columns, deleted_keys)
+    if staged.empty:
+        return 0
+
+    # Load with the target's column types so the MERGE doesn't need any casts
+    schema = [field for field in target.schema if field.name in staged.columns]
+    schema.append(bigquery.SchemaField(DELETED_COLUMN, "BOOL"))
+    if isDryRun():
+        return _dryRunMerge(client, table_ref, schema, key_columns, replace_all, len(df))
+
+    staging_ref = _stagingRef(table_ref)
+    try:
+        client.load_table_from_dataframe(
+            staged, staging_ref,
+            job_config=bigquery.LoadJobConfig(schema=schema, write_disposition="WRITE_TRUNCATE"),
+        ).result()
+    except Exception:
+        client.delete_table(staging_ref, not_found_ok=True)
+        raise
+
+    columns = [c for c in df.columns if c != DELETED_COLUMN]
+    affected = _mergeFromStaging(client, table_ref, staging_ref, key_columns, columns, replace_all)
+    print(f"🔀 Merged {len(df)} rows into {table_ref} ({affected} rows affected).")
+    return affected
+
+
+def upsertArrowTable(client, table, table_ref, key_columns, deleted_keys=None, replace_all=False):
+    """
+    Same MERGE upsert as upsertDataFrame for a typed Arrow table.
+
+    The rows (plus deleted keys) are written to Parquet in memory and loaded with
+    load_table_from_file, so the column types come straight from the Arrow schema —
+    no DataFrame, no per-row JSON/CSV serialisation. The staging table still takes the
+    target's column types (as in upsertDataFrame), so the MERGE needs no casts.
+    """
+    key_columns = [key_columns] if isinstance(key_columns, str) else list(key_columns)
+    parquet_config = dict(source_format=bigquery.SourceFormat.PARQUET)
+
+    try:
+        target = client.get_table(table_ref)
+    except NotFound:
+        if not table.num_rows:
+            return 0
+        if isDryRun():
+            print(f"🧪 BQ_COST_MODE=dry-run: {table_ref} doesn't exist — would create it with {table.num_rows} rows.")
+            return 0
+        client.load_table_from_file(
+            toParquet(table), table_ref,
+            job_config=bigquery.LoadJobConfig(write_disposition="WRITE_APPEND", **parquet_config),
+        ).result()
+        print(f"🆕 Created {table_ref} with {table.num_rows} rows.")
+        return table.num_rows
+
+    staged = table.append_column(DELETED_COLUMN, pa.array([False] * table.num_rows, type=pa.bool_()))
+    deleted_keys = list(deleted_keys or [])
+    if deleted_keys:
+        deleted = pa.Table.from_pylist(
+            [
+                {**dict(zip(key_columns, k if isinstance(k, (tuple, list)) else (k,))), DELETED_COLUMN: True}
+                for k in deleted_keys
+            ],
+            schema=staged.schema,
+        )
+        staged = pa.concat_tables([staged, deleted])
+    if not staged.num_rows:
+        return 0
+
+    schema = [field for field in target.schema if field.name in staged.column_names]
+    schema.append(bigquery.SchemaField(DELETED_COLUMN, "BOOL"))
+    if isDryRun():
+        return _dryRunMerge(client, table_ref, schema, key_columns, replace_all, table.num_rows)
+
+    staging_ref = _stagingRef(table_ref)
+    try:
+        client.load_table_from_file(
+            toParquet(staged), staging_ref,
+            job_config=bigquery.LoadJobConfig(schema=schema, write_disposition="WRITE_TRUNCATE", **parquet_config),
+        ).result()
+    except Exception:
+        client.delete_table(staging_ref, not_found_ok=True)
+        raise
+
+    affected = _mergeFromStaging(client, table_ref, staging_ref, key_columns, table.column_names, replace_all)
+    print(f"🔀 Merged {table.num_rows} rows into {table_ref} ({affected} rows affected).")
+    return affected
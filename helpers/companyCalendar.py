@@ -0,0 +1,145 @@
+# companyCalendar.py
+
+import os
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+QUARTERS = {
+    "Jan": "Q3", "Feb": "Q3", "Mar": "Q3",
+    "Apr": "Q4", "May": "Q4", "Jun": "Q4",
+    "Jul": "Q1", "Aug": "Q1", "Sep": "Q1",
+    "Oct": "Q2", "Nov": "Q2", "Dec": "Q2"
+}
+
+CALENDAR_PATH = os.path.join(os.path.dirname(__file__), "companyCalendar.json")
+
+CalendarDay = namedtuple("CalendarDay", ["financial_year", "month", "week", "quarter"])
+
+
+def get_financial_year(date):
+    return f"FY{str(date.year + 1)[-2:]}" if date.month >= 7 else f"FY{str(date.year)[-2:]}"
+
+
+def load_calendar_file(path=CALENDAR_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+class CompanyCalendar:
+    """
+    Date → (financial year, company month, week, quarter) table compiled from the calendar
+    file (companyCalendar.json), the one definition shared with the frontends.
+
+    The file lists every company month with its weeks as [first day, last day]; compiling
+    checks that they run back to back with no gaps or overlaps, months in order. A lookup
+    is then an index into a tuple, and map_dates() does the same for a whole column with
+    numpy indexing. financial_year is the date's July–June year, as stored in
+    InvoiceEnquiry — the file's fy labels the company month, which differs for the few
+    days a July company month starts in June.
+    """
+
+    def __init__(self, data):
+        self.version = data.get("version", "")
+        months = data.get("months") or []
+        if not months:
+            raise ValueError("❌ Company calendar has no months")
+
+        self.first = date.fromisoformat(months[0]["weeks"][0][0])
+        self.first_ordinal = self.first.toordinal()
+        self.spans = []
+        days = []
+        expected = self.first
+        for position, entry in enumerate(months):
+            month = entry["month"]
+            if position and MONTHS.index(month) != (MONTHS.index(months[position - 1]["month"]) + 1) % 12:
+                raise ValueError(f"❌ Company calendar: {entry['fy']} {month} follows {months[position - 1]['month']}")
+            for week, (start, end) in enumerate(entry["weeks"], start=1):
+                start, end = date.fromisoformat(start), date.fromisoformat(end)
+                if start != expected or end < start:
+                    raise ValueError(
+                        f"❌ Company calendar: {entry['fy']} {month} week {week} is {start}–{end}, expected it to start {expected}"
+                    )
+                for offset in range((end - start).days + 1):
+                    day = start + timedelta(days=offset)
+                    days.append(CalendarDay(get_financial_year(day), month, week, QUARTERS[month]))
+                expected = end + timedelta(days=1)
+            self.spans.append((entry["fy"], month, date.fromisoformat(entry["weeks"][0][0]), expected - timedelta(days=1)))
+
+        self.days = tuple(days)
+        self.last = expected - timedelta(days=1)
+
+        self.financial_years = np.array([d.financial_year for d in self.days], dtype=object)
+        self.months = np.array([d.month for d in self.days], dtype=object)
+        self.weeks = np.array([d.week for d in self.days], dtype=np.int64)
+        self.quarters = np.array([d.quarter for d in self.days], dtype=object)
+        for column in (self.financial_years, self.months, self.weeks, self.quarters):
+            column.flags.writeable = False
+
+    @classmethod
+    def from_file(cls, path=CALENDAR_PATH):
+        return cls(load_calendar_file(path))
+
+    def lookup(self, day):
+        if isinstance(day, datetime):
+            day = day.date()
+        index = day.toordinal() - self.first_ordinal
+        if not 0 <= index < len(self.days):
+            raise ValueError(f"❌ {day} is outside the company calendar ({self.first} – {self.last})")
+        return self.days[index]
+
+    def company_month(self, day):
+        return self.lookup(day).month
+
+    def week(self, day):
+        return self.lookup(day).week
+
+    def quarter(self, day):
+        return self.lookup(day).quarter
+
+    def map_dates(self, values):
+        """
+        Vectorised lookup for an array/Series/list of dates.
+
+        Returns a DataFrame with financial_year, month, week and quarter columns (aligned
+        with the input Series' index). Missing dates give None/NaN; a date outside the
+        calendar raises ValueError, as lookup() does.
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        day_numbers = pd.to_datetime(series).values.astype("datetime64[D]")
+        missing = np.isnat(day_numbers)
+        positions = day_numbers.astype(np.int64) - (self.first - date(1970, 1, 1)).days
+        in_table = ~missing & (positions >= 0) & (positions < len(self.days))
+        if not (in_table | missing).all():
+            outside = day_numbers[~in_table & ~missing]
+            raise ValueError(
+                f"❌ {len(outside):,} date(s) outside the company calendar ({self.first} – {self.last}), "
+                f"e.g. {outside[0]}"
+            )
+        positions = np.where(in_table, positions, 0)
+
+        weeks = pd.array(self.weeks[positions], dtype="Int64")
+        weeks[~in_table] = pd.NA
+        result = pd.DataFrame({
+            "financial_year": np.where(in_table, self.financial_years[positions], None),
+            "month": np.where(in_table, self.months[positions], None),
+            "week": weeks,
+            "quarter": np.where(in_table, self.quarters[positions], None),
+        }, index=series.index)
+        return result
+
+
+COMPANY_CALENDAR = CompanyCalendar.from_file()
+
+
+def get_company_month(invoice_date):
+    return COMPANY_CALENDAR.company_month(invoice_date)
+
+
+def week_of_company_month(date):
+    return COMPANY_CALENDAR.week(date)
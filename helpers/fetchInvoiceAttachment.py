@@ -1,27 +1,21 @@
 import json
-import requests
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from helpers.xeroClient import XeroClient
+from helpers.xeroAsyncClient import getMany
+
 
 def fetchXeroInvoiceAttachmentsIds(accessToken, xeroTenantId, invoiceIds):
-    baseUrl = "https://api.xero.com/api.xro/2.0/Invoices"
+    invoiceIds = list(invoiceIds)
     invoiceAttachments = {}
 
-    for invoiceId in invoiceIds:
-        url = f"{baseUrl}/{invoiceId}/Attachments"
-
-        response = requests.get(
-            url,
-            headers={
-                "Authorization": f"Bearer {accessToken}",
-                "Xero-tenant-id": xeroTenantId,
-                "Accept": "application/json",
-            },
-        )
+    # One call per invoice, fanned out concurrently under the tenant's rate limits
+    responses = getMany(accessToken, xeroTenantId, [f"Invoices/{invoiceId}/Attachments" for invoiceId in invoiceIds])
 
+    for invoiceId, response in zip(invoiceIds, responses):
         if response.status_code == 200:
             jsonResponse = response.json()
             attachments = jsonResponse.get("Attachments", [])
@@ -35,15 +29,11 @@ def fetchXeroInvoiceAttachmentsIds(accessToken, xeroTenantId, invoiceIds):
 
 
 def fetchXeroInvoiceAttachmentsPDF(accessToken, tenantId, invoiceId, attachmentId):
-    url = f"https://api.xero.com/api.xro/2.0/Invoices/{invoiceId}/Attachments/{attachmentId}"
-    
-    headers = {
-        "Authorization": f"Bearer {accessToken}",
-        "Xero-Tenant-Id": tenantId,
-        "Accept": "application/pdf"  
-    }
-
-    response = requests.get(url, headers=headers)
+    client = XeroClient(accessToken, tenantId)
+    response = client.get(
+        f"Invoices/{invoiceId}/Attachments/{attachmentId}",
+        headers={"Accept": "application/pdf"},
+    )
 
     if response.status_code == 200:
         return response.content  # Return binary content (e.g., PDF, image, etc.)
@@ -3,15 +3,14 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from xeroAuth import XeroTenants
-from xeroAuthHelper import getXeroAccessToken
+from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
 from helpers.fetchXeroInvoices import fetchXeroInvoices
 
 
 def fetchInvoicesForClient(client_name, invoice_status):
     """Fetch invoices for a given client."""
     access_token = getXeroAccessToken(client_name)
-    xero_tenant_id = XeroTenants(access_token)
+    xero_tenant_id = getXeroTenantId(client_name, access_token)
     
     if not xero_tenant_id:
         raise Exception(f"Could not retrieve Xero tenant ID for {client_name}.")
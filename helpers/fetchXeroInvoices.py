@@ -1,25 +1,26 @@
-import json
-import requests
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def fetchXeroInvoices(accessToken, xeroTenantId, status):
-    url = "https://api.xero.com/api.xro/2.0/Invoices"
+from helpers.xeroClient import XeroClient
+
+
+def iter_invoices(client, statuses, where=None):
+    """
+    Yield every invoice with the given status(es), streaming page by page.
 
-    response = requests.get(
-        url,
-        headers={
-            "Authorization": f"Bearer {accessToken}",
-            "Xero-tenant-id": xeroTenantId,
-            "Accept": "application/json",
-        },
-        params={"Statuses": [status], "pageSize": 1000},
-    )
+    statuses is a single status or a list of them; where is an optional Xero filter
+    expression, e.g. 'Type=="ACCREC"'.
+    """
+    if isinstance(statuses, str):
+        statuses = [statuses]
+    params = {"Statuses": ",".join(statuses)}
+    if where:
+        params["where"] = where
+    yield from client.iterPages("Invoices", params)
 
-    if response.status_code == 200:
-        json_response = response.json()
-        return json_response
-    else:
-        raise Exception(f"Error fetching invoices: {response.status_code} - {response.text}")
\ No newline at end of file
+
+def fetchXeroInvoices(accessToken, xeroTenantId, status):
+    client = XeroClient(accessToken, xeroTenantId)
+    return {"Invoices": list(iter_invoices(client, status))}
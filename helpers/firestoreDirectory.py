@@ -0,0 +1,112 @@
+import threading
+
+DIRECTORY_COLLECTIONS = ("recruiters", "areas", "users")
+SNAPSHOT_TIMEOUT = 15  # seconds to wait for a collection's first snapshot
+
+
+class FirestoreDirectory:
+    """
+    In-memory copy of the small Firestore collections (recruiters, areas, users).
+
+    Each collection is loaded once and then kept current by an on_snapshot listener, so
+    lookups are plain dict reads instead of a Firestore round trip per request. Every
+    snapshot rebuilds that collection's documents and indexes and swaps them in whole,
+    so readers never see a half-applied update. Indexes: users and recruiters by
+    username, recruiters by consultant code (their Xero tracking name, e.g.
+    "SYD Jane Smith").
+
+    listen=False loads each collection once with stream() — for one-shot scripts. Writers
+    call patch() after a Firestore write so their own change is visible before the
+    listener delivers it.
+    """
+
+    def __init__(self, db, collections=DIRECTORY_COLLECTIONS, listen=True, timeout=SNAPSHOT_TIMEOUT):
+        self.db = db
+        self.lock = threading.Lock()
+        self.docs = {name: {} for name in collections}
+        self.indexes = {}
+        self.watches = []
+        self._reindex()
+
+        for name in collections:
+            if listen and self._listen(name, timeout):
+                continue
+            self._replace(name, self.db.collection(name).stream())
+
+    def _listen(self, name, timeout):
+        loaded = threading.Event()
+
+        def onSnapshot(snapshots, changes, read_time):
+            self._replace(name, snapshots)
+            loaded.set()
+
+        try:
+            self.watches.append(self.db.collection(name).on_snapshot(onSnapshot))
+        except Exception as e:
+            print(f"⚠️ Firestore listener for {name} failed ({e}) — loading once instead")
+            return False
+        if not loaded.wait(timeout):
+            print(f"⚠️ No {name} snapshot after {timeout}s — loading once instead")
+            return False
+        return True
+
+    def _replace(self, name, snapshots):
+        documents = {snapshot.id: snapshot.to_dict() or {} for snapshot in snapshots}
+        with self.lock:
+            self.docs = {**self.docs, name: documents}
+            self._reindex()
+
+    def _reindex(self):
+        recruiters = self.docs.get("recruiters", {})
+        users = self.docs.get("users", {})
+        self.indexes = {
+            "users_by_username": {d.get("username"): (i, d) for i, d in users.items() if d.get("username")},
+            "recruiters_by_username": {d.get("username"): (i, d) for i, d in recruiters.items() if d.get("username")},
+            "recruiters_by_code": {
+                d.get("xeroTrackingName"): (i, d) for i, d in recruiters.items() if d.get("xeroTrackingName")
+            },
+        }
+
+    def patch(self, name, doc_id, fields=None, delete=False):
+        """Apply a write locally (merge fields into the document, or drop it) ahead of the listener."""
+        with self.lock:
+            documents = dict(self.docs.get(name, {}))
+            if delete:
+                documents.pop(doc_id, None)
+            else:
+                documents[doc_id] = {**documents.get(doc_id, {}), **(fields or {})}
+            self.docs = {**self.docs, name: documents}
+            self._reindex()
+
+    def documents(self, name):
+        """[{"id": ..., **fields}] for every document in the collection."""
+        return [{"id": doc_id, **data} for doc_id, data in self.docs[name].items()]
+
+    def recruiters(self, active=None):
+        recruiters = self.documents("recruiters")
+        return recruiters if active is None else [r for r in recruiters if bool(r.get("active")) == active]
+
+    def areas(self):
+        return self.documents("areas")
+
+    def usernames(self):
+        return set(self.indexes["users_by_username"])
+
+    def userByUsername(self, username):
+        """(doc_id, fields) of the user with this username, or None."""
+        return self.indexes["users_by_username"].get(username)
+
+    def recruiterByUsername(self, username):
+        return self.indexes["recruiters_by_username"].get(username)
+
+    def recruiterByCode(self, consultant_code):
+        return self.indexes["recruiters_by_code"].get(consultant_code)
+
+    def areaByConsultantCode(self):
+        """{xeroTrackingName: area} for every recruiter with a tracking name."""
+        return {code: data.get("area", "") for code, (_, data) in self.indexes["recruiters_by_code"].items()}
+
+    def close(self):
+        for watch in self.watches:
+            watch.unsubscribe()
+        self.watches = []
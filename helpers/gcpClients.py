@@ -0,0 +1,90 @@
+import os
+import threading
+
+BIGQUERY_SCOPES = ["https://www.googleapis.com/auth/bigquery"]
+
+_lock = threading.RLock()
+_credentials = {}
+_clients = {}
+
+
+def getCredentials(key_path=None, scopes=None, missing_ok=False):
+    """
+    Service-account credentials for key_path, loaded once per (key_path, scopes).
+
+    Returns None when key_path is unset or empty, so the client falls back to the default
+    credentials (Cloud Run, GitHub Actions WIF, gcloud login). A key_path that doesn't
+    exist raises FileNotFoundError — a mis-provisioned secret must not quietly run under
+    another identity — unless missing_ok, which logs a warning and falls back (the
+    backends, whose deployed .env may name a key file that only exists locally).
+    """
+    if not key_path:
+        return None
+    if not os.path.exists(key_path):
+        if not missing_ok:
+            raise FileNotFoundError(f"❌ Service-account key file {key_path} does not exist.")
+        print(f"⚠️ Service-account key file {key_path} does not exist — using the default credentials")
+        return None
+    cache_key = (os.path.abspath(key_path), tuple(scopes or ()))
+    with _lock:
+        if cache_key not in _credentials:
+            from google.oauth2 import service_account
+            _credentials[cache_key] = service_account.Credentials.from_service_account_file(
+                key_path, scopes=scopes
+            )
+        return _credentials[cache_key]
+
+
+def _client(kind, project_id, key_path, database, factory):
+    cache_key = (kind, project_id, os.path.abspath(key_path) if key_path else None, database)
+    with _lock:
+        if cache_key not in _clients:
+            _clients[cache_key] = factory()
+        return _clients[cache_key]
+
+
+def bigQueryClient(project_id, key_path=None, missing_key_ok=False):
+    """
+    Shared bigquery.Client per project and key file, created (and its library imported) on
+    first use. Its query() jobs are recorded in bigQueryCost.QUERY_COSTS. missing_key_ok
+    is passed to getCredentials.
+    """
+    def factory():
+        from google.cloud import bigquery
+        from helpers.bigQueryCost import TrackedBigQueryClient
+        credentials = getCredentials(key_path, BIGQUERY_SCOPES, missing_ok=missing_key_ok)
+        return TrackedBigQueryClient(bigquery.Client(credentials=credentials, project=project_id))
+    return _client("bigquery", project_id, key_path, None, factory)
+
+
+def firestoreClient(project_id, database=None, key_path=None, missing_key_ok=False):
+    """Shared firestore.Client per project, database and key file, created on first use."""
+    def factory():
+        from google.cloud import firestore
+        credentials = getCredentials(key_path, missing_ok=missing_key_ok)
+        return firestore.Client(project=project_id, database=database, credentials=credentials)
+    return _client("firestore", project_id, key_path, database, factory)
+
+
+class LazyClient:
+    """
+    Module-level stand-in for a client that is only built on first attribute access.
+
+    Lets a backend keep `forecast_bq = LazyClient(lambda: bigQueryClient(...))` at import
+    time without paying for credential loading and client construction until the first
+    request that actually needs it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+
+    def _resolve(self):
+        if self._instance is None:
+            with _lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
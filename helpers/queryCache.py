@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_TTL = 300  # seconds
+QUERY_CACHE_MAX_ENTRIES = 512
+SLICE_VERSION_COLLECTION = "queryCacheVersions"
+
+
+class QueryCache:
+    """
+    Thread-safe TTL + LRU cache for read endpoints, keyed by endpoint name and parameters.
+
+    getOrLoad() returns the cached result while it is fresher than its TTL, otherwise
+    runs the loader and stores what it returns; the least recently used entry is
+    evicted once max_entries is reached. Writers call invalidate() with the slice they
+    changed, e.g. invalidate("forecasts/view", fy="FY26", month="Jul") drops every
+    cached view for that fy and month whatever its other parameters. The cache lives in
+    the worker process, so each gunicorn worker warms its own copy and invalidate() only
+    reaches that copy — endpoints that must not serve stale reads after a write on
+    another instance also key on SliceVersions.
+    """
+
+    def __init__(self, ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(endpoint, params):
+        return endpoint, tuple(sorted((k, "" if v is None else str(v)) for k, v in params.items()))
+
+    def get(self, endpoint, params):
+        key = self._key(endpoint, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["expires"] <= time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, endpoint, params, value, ttl=None):
+        key = self._key(endpoint, params)
+        with self.lock:
+            self.entries[key] = {"value": value, "expires": time.monotonic() + (ttl or self.ttl)}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def getOrLoad(self, endpoint, params, loader, ttl=None):
+        """Cached result for (endpoint, params), or loader() stored for ttl seconds. Failures are not cached."""
+        value = self.get(endpoint, params)
+        if value is None:
+            value = loader()
+            self.set(endpoint, params, value, ttl)
+        return value
+
+    def invalidate(self, endpoint, **params):
+        """Drop the endpoint's entries whose parameters include all of params. Returns how many were dropped."""
+        match = set(self._key(endpoint, params)[1])
+        with self.lock:
+            stale = [key for key in self.entries if key[0] == endpoint and match <= set(key[1])]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class SliceVersions:
+    """
+    Write counters for cached data slices, kept in Firestore so every instance sees them.
+
+    Writers bump() the slices they changed, e.g. bump("forecasts", fy="FY26", month="Jul");
+    readers add current() for the same slice to their cache parameters, so a write on any
+    instance or worker makes every other copy of that slice's cached reads miss. current()
+    is one direct document get (strongly consistent, a few ms) — far cheaper than the
+    BigQuery read it guards. If Firestore can't be read, current() returns a value no
+    cached entry has, so the read goes to BigQuery rather than risk a stale result.
+    """
+
+    def __init__(self, db, collection=SLICE_VERSION_COLLECTION):
+        self.db = db
+        self.collection = collection
+
+    @staticmethod
+    def _docId(name, params):
+        return "|".join([name] + [f"{k}={params[k]}" for k in sorted(params)])
+
+    def current(self, name, **params):
+        try:
+            snapshot = self.db.collection(self.collection).document(self._docId(name, params)).get()
+        except Exception as e:
+            print(f"⚠️ Couldn't read the {name} cache version ({e}) — bypassing the cache")
+            return f"unversioned-{time.monotonic()}"
+        return (snapshot.to_dict() or {}).get("version", 0) if snapshot.exists else 0
+
+    def bump(self, name, **params):
+        from google.cloud import firestore
+        self.db.collection(self.collection).document(self._docId(name, params)).set(
+            {"version": firestore.Increment(1), "updatedAt": firestore.SERVER_TIMESTAMP}, merge=True
+        )
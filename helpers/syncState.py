@@ -0,0 +1,169 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from helpers.bigQueryCost import isDryRun
+
+# Used when an endpoint has no watermark yet (matches the old fixed lookback).
+DEFAULT_LOOKBACK = timedelta(days=1)
+SYNC_STATE_DB = os.getenv(
+    "XERO_SYNC_STATE_DB",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "syncState.sqlite")),
+)
+SYNC_STATE_TABLE = "SyncState"
+
+
+def parseXeroTimestamp(value):
+    """Parse a Xero '/Date(1700000000000+0000)/' or ISO timestamp into an aware UTC datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    match = re.search(r"/Date\((-?\d+)", str(value))
+    if match:
+        return datetime.fromtimestamp(int(match.group(1)) / 1000, tz=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def xeroDateTimeFilter(dt):
+    """Format a datetime for a Xero where clause, e.g. DateTime(2025,07,01,13,05,00)."""
+    return f"DateTime({dt.year},{dt.month:02},{dt.day:02},{dt.hour:02},{dt.minute:02},{dt.second:02})"
+
+
+class SqliteSyncState:
+    """Watermark store in a local SQLite file — for local runs and ad-hoc reloads."""
+
+    def __init__(self, path=SYNC_STATE_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " client TEXT NOT NULL, endpoint TEXT NOT NULL, watermark TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL, PRIMARY KEY (client, endpoint))"
+            )
+
+    def get(self, client, endpoint):
+        with self.lock, sqlite3.connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT watermark FROM sync_state WHERE client = ? AND endpoint = ?", (client, endpoint)
+            ).fetchone()
+        return parseXeroTimestamp(row[0]) if row else None
+
+    def set(self, client, endpoint, watermark):
+        with self.lock, sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO sync_state (client, endpoint, watermark, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (client, endpoint) DO UPDATE SET watermark = excluded.watermark, updated_at = excluded.updated_at",
+                (client, endpoint, watermark.isoformat(), datetime.now(timezone.utc).isoformat()),
+            )
+
+
+class BigQuerySyncState:
+    """Watermark store in a BigQuery metadata table next to the data it tracks, so it survives between CI runs."""
+
+    def __init__(self, project_id, dataset_id, key_path=None, table_id=SYNC_STATE_TABLE):
+        from google.cloud import bigquery
+        from helpers.gcpClients import bigQueryClient
+
+        self.bigquery = bigquery
+        self.client = bigQueryClient(project_id, key_path)
+
+        self.table_ref = f"{project_id}.{dataset_id}.{table_id}"
+        schema = [
+            bigquery.SchemaField("client", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("endpoint", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("watermark", "TIMESTAMP", mode="REQUIRED"),
+            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+        ]
+        self.client.create_table(bigquery.Table(self.table_ref, schema=schema), exists_ok=True)
+
+    def _params(self, client, endpoint, watermark=None):
+        params = [
+            self.bigquery.ScalarQueryParameter("client", "STRING", client),
+            self.bigquery.ScalarQueryParameter("endpoint", "STRING", endpoint),
+        ]
+        if watermark is not None:
+            params.append(self.bigquery.ScalarQueryParameter("watermark", "TIMESTAMP", watermark))
+        return self.bigquery.QueryJobConfig(query_parameters=params)
+
+    def get(self, client, endpoint):
+        rows = list(self.client.query(
+            f"SELECT watermark FROM `{self.table_ref}` WHERE client = @client AND endpoint = @endpoint",
+            job_config=self._params(client, endpoint),
+        ).result())
+        return parseXeroTimestamp(rows[0]["watermark"]) if rows else None
+
+    def set(self, client, endpoint, watermark):
+        self.client.query(
+            f"""
+            MERGE `{self.table_ref}` T
+            USING (SELECT @client AS client, @endpoint AS endpoint, @watermark AS watermark) S
+            ON T.client = S.client AND T.endpoint = S.endpoint
+            WHEN MATCHED THEN UPDATE SET watermark = S.watermark, updated_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT (client, endpoint, watermark, updated_at)
+                VALUES (S.client, S.endpoint, S.watermark, CURRENT_TIMESTAMP())
+            """,
+            job_config=self._params(client, endpoint, watermark),
+        ).result()
+
+
+def getSyncState(project_id, dataset_id, key_path=None):
+    """BigQuery-backed store, or the local SQLite file when XERO_SYNC_STATE_DB is set (local runs)."""
+    if os.getenv("XERO_SYNC_STATE_DB"):
+        return SqliteSyncState(SYNC_STATE_DB)
+    return BigQuerySyncState(project_id, dataset_id, key_path)
+
+
+class IncrementalSync:
+    """
+    Per-run view of one client's watermarks.
+
+    since()/where() give the filter for each endpoint from the stored watermark (or the
+    default lookback on the first run). observe() tracks the newest UpdatedDateUTC seen,
+    and commit() persists it — call it only once the export has succeeded, so a failed
+    or skipped run is picked up again by the next one.
+    """
+
+    def __init__(self, store, client, lookback=DEFAULT_LOOKBACK):
+        self.store = store
+        self.client = client
+        self.lookback = lookback
+        self.started = datetime.now(timezone.utc)
+        self.watermarks = {}
+        self.observed = {}
+
+    def since(self, endpoint):
+        if endpoint not in self.watermarks:
+            self.watermarks[endpoint] = self.store.get(self.client, endpoint)
+        return self.watermarks[endpoint] or self.started - self.lookback
+
+    def where(self, endpoint, base=None):
+        clause = f"UpdatedDateUTC>={xeroDateTimeFilter(self.since(endpoint))}"
+        return f"{base} AND {clause}" if base else clause
+
+    def observe(self, endpoint, records, field="UpdatedDateUTC"):
+        latest = self.observed.get(endpoint)
+        for record in records:
+            updated = parseXeroTimestamp(record.get(field))
+            if updated and (latest is None or updated > latest):
+                latest = updated
+        if latest:
+            self.observed[endpoint] = latest
+        return records
+
+    def commit(self):
+        if isDryRun():
+            print(f"🧪 BQ_COST_MODE=dry-run: {self.client} watermarks not committed")
+            return
+        for endpoint, latest in self.observed.items():
+            previous = self.watermarks.get(endpoint)
+            if previous is None or latest > previous:
+                self.store.set(self.client, endpoint, latest)
+                print(f"📝 {self.client} {endpoint} watermark → {latest.isoformat()}")
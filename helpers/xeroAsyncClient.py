@@ -0,0 +1,104 @@
+import sys
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.xeroClient import XeroClient, XERO_API_URL, XERO_TIMEOUT, XERO_MAX_RETRIES
+from helpers.xeroRateLimiter import getRateLimiter, XERO_CONCURRENT_LIMIT
+
+try:
+    import httpx
+except ImportError:  # optional: getMany falls back to the pooled sync client on threads
+    httpx = None
+
+
+class AsyncXeroClient:
+    """
+    asyncio Xero client for fan-out workloads (one call per invoice, etc.).
+
+    Shares the tenant's rate limiter with XeroClient, so the minute/day budgets and
+    Retry-After blocks apply across both. Calls in flight are capped by an asyncio
+    semaphore sized to the tenant's concurrent-call limit. Use as an async context
+    manager:
+
+        async with AsyncXeroClient(token, tenant_id) as client:
+            responses = await client.getMany(["Invoices/<id>/History", ...])
+    """
+
+    def __init__(self, access_token, tenant_id, base_url=XERO_API_URL, limiter=None,
+                 max_concurrency=XERO_CONCURRENT_LIMIT):
+        if httpx is None:
+            raise ImportError("AsyncXeroClient requires httpx (pip install httpx).")
+        if not access_token or not tenant_id:
+            raise Exception("Missing Xero authentication credentials.")
+        self.access_token = access_token
+        self.tenant_id = tenant_id
+        self.base_url = base_url.rstrip("/")
+        self.limiter = limiter or getRateLimiter(tenant_id)
+        self.max_concurrency = max_concurrency
+        self.semaphore = None
+        self.client = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=XERO_TIMEOUT,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            headers={
+                "Authorization": f"Bearer {self.access_token}",
+                "Xero-tenant-id": self.tenant_id,
+                "Accept": "application/json",
+            },
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def request(self, method, path, params=None, json=None, headers=None, max_retries=XERO_MAX_RETRIES):
+        for attempt in range(max_retries + 1):
+            async with self.semaphore:
+                wait = self.limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                response = await self.client.request(method, path.lstrip("/"), params=params, json=json, headers=headers)
+
+            retry_after = self.limiter.update(response.status_code, response.headers)
+            if response.status_code != 429 or attempt == max_retries:
+                return response
+            print(f"⚠️ Rate limit hit on {path}. Waiting {retry_after:.0f}s before retry ({attempt + 1}/{max_retries})...")
+        return response
+
+    async def get(self, path, params=None, **kwargs):
+        return await self.request("GET", path, params=params, **kwargs)
+
+    async def getMany(self, paths, headers=None):
+        """GET every path concurrently; responses come back in the same order as paths."""
+        return await asyncio.gather(*(self.get(path, headers=headers) for path in paths))
+
+
+async def _getManyAsync(access_token, tenant_id, paths, base_url, headers):
+    async with AsyncXeroClient(access_token, tenant_id, base_url=base_url) as client:
+        return await client.getMany(paths, headers=headers)
+
+
+def getMany(access_token, tenant_id, paths, base_url=XERO_API_URL, headers=None):
+    """
+    Sync wrapper: GET every path for one tenant concurrently and return the responses
+    in order. Each response has status_code, json(), text and content like requests.
+
+    Uses AsyncXeroClient when httpx is installed, otherwise the pooled XeroClient on
+    a thread pool of the same size.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    if httpx is not None:
+        return asyncio.run(_getManyAsync(access_token, tenant_id, paths, base_url, headers))
+
+    client = XeroClient(access_token, tenant_id, base_url=base_url)
+    with ThreadPoolExecutor(max_workers=XERO_CONCURRENT_LIMIT) as executor:
+        return list(executor.map(lambda path: client.get(path, headers=headers), paths))
@@ -0,0 +1,106 @@
+import sys
+import os
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.xeroClient import XeroClient
+
+# Xero accepts up to 50 elements per create/update call
+XERO_BATCH_SIZE = 50
+XERO_BATCH_ATTEMPTS = 2
+
+
+def elementError(element):
+    """Return the validation message for one element of a summarizeErrors=false response, or None if it succeeded."""
+    messages = [e.get("Message", "") for e in element.get("ValidationErrors", []) if e.get("Message")]
+    if messages or element.get("HasErrors") or element.get("StatusAttributeString") == "ERROR":
+        return "; ".join(messages) or "Unknown validation error"
+    return None
+
+
+class XeroBatchWriter:
+    """
+    Sends create/update elements to a Xero endpoint in batches of up to 50.
+
+    Each call uses summarizeErrors=false so Xero reports success or failure per element.
+    write() returns one result per input element, in input order:
+        {"item": <element sent>, "ok": bool, "record": <element Xero returned>, "error": str|None,
+         "unknown": bool}
+
+    Validation errors are final: the same input would fail again, so they are never
+    re-sent. A transport failure (timeout, connection error, 5xx) leaves the outcome
+    unknown — Xero may already have applied the batch — so those elements are marked
+    "unknown" and only re-sent when the write is an idempotent POST update, i.e.
+    retry_key is set and the element carries it (e.g. InvoiceID). Creates such as PUT
+    Payments are never re-sent; check Xero before sending them again.
+    """
+
+    def __init__(self, client, endpoint, key=None, method="POST", batch_size=XERO_BATCH_SIZE,
+                 max_attempts=XERO_BATCH_ATTEMPTS, retry_key=None):
+        self.client = client
+        self.endpoint = endpoint
+        self.key = key or endpoint
+        self.method = method
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_key = retry_key
+
+    def _send(self, items):
+        """[(record, error, unknown)] per item; unknown=True when the call itself failed in transit."""
+        try:
+            response = self.client.request(
+                self.method, self.endpoint, params={"summarizeErrors": "false"}, json={self.key: items}
+            )
+        except requests.RequestException as e:
+            return [(None, f"{type(e).__name__}: {e}", True)] * len(items)
+        if response.status_code >= 500:
+            return [(None, f"HTTP {response.status_code}: {response.text[:500]}", True)] * len(items)
+        if response.status_code not in [200, 201]:
+            return [(None, f"HTTP {response.status_code}: {response.text[:500]}", False)] * len(items)
+
+        elements = response.json().get(self.key, [])
+        results = [(element, elementError(element), False) for element in elements[:len(items)]]
+        results += [(None, "Missing from Xero response", False)] * (len(items) - len(results))
+        return results
+
+    def _retryable(self, item):
+        return self.method == "POST" and self.retry_key is not None and bool(item.get(self.retry_key))
+
+    def write(self, items):
+        items = list(items)
+        results = [None] * len(items)
+        pending = list(range(len(items)))
+
+        for attempt in range(1, self.max_attempts + 1):
+            retry = []
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                for index, (record, error, unknown) in zip(batch, self._send([items[i] for i in batch])):
+                    results[index] = {"item": items[index], "ok": error is None, "record": record,
+                                      "error": error, "unknown": unknown}
+                    if unknown and self._retryable(items[index]):
+                        retry.append(index)
+
+            if not retry or attempt == self.max_attempts:
+                break
+            print(f"🔁 Retrying {len(retry)} {self.key} element(s) after a transport error "
+                  f"(attempt {attempt + 1}/{self.max_attempts})...")
+            pending = retry
+
+        unknown = [r for r in results if r["unknown"]]
+        if unknown:
+            print(f"⚠️ {len(unknown)} {self.key} element(s) failed in transit and may already be applied in Xero "
+                  f"— check before re-sending: {unknown[0]['error']}")
+        return results
+
+
+def updateInvoices(accessToken, xeroTenantId, invoices):
+    """Create or update invoices/bills in batches. Each element must carry its InvoiceID to update (and to be retried)."""
+    return XeroBatchWriter(XeroClient(accessToken, xeroTenantId), "Invoices", retry_key="InvoiceID").write(invoices)
+
+
+def createPayments(accessToken, xeroTenantId, payments):
+    """Create payments in batches (PUT Payments). Never retried — a failed call may already have created them."""
+    return XeroBatchWriter(XeroClient(accessToken, xeroTenantId), "Payments", method="PUT").write(payments)
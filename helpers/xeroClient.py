@@ -0,0 +1,169 @@
+import sys
+import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from helpers.xeroRateLimiter import getRateLimiter, XERO_CONCURRENT_LIMIT
+
+XERO_API_URL = "https://api.xero.com/api.xro/2.0"
+XERO_PAYROLL_URL = "https://api.xero.com/payroll.xro/1.0"
+XERO_TIMEOUT = 120
+XERO_MAX_RETRIES = 5
+XERO_PAGE_SIZE = 1000
+
+# One pooled session per process — every XeroClient shares it so pages and
+# writes reuse warm keep-alive connections instead of a new TLS handshake each.
+_session = None
+
+
+def getXeroSession():
+    """Return the process-wide keep-alive session used for all Xero calls."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        _session = session
+    return _session
+
+
+class XeroClient:
+    """
+    Tenant-aware Xero API client.
+
+    Wraps the shared pooled session with the bearer token and tenant header so
+    callers only pass the endpoint path, e.g. client.get("Invoices", params=...).
+    Every call goes through the tenant's rate limiter and 429s are retried after
+    Retry-After. Returns the raw requests.Response so existing status-code
+    handling still works.
+    """
+
+    def __init__(self, access_token, tenant_id, base_url=XERO_API_URL, session=None, limiter=None):
+        if not access_token or not tenant_id:
+            raise Exception("Missing Xero authentication credentials.")
+        self.access_token = access_token
+        self.tenant_id = tenant_id
+        self.base_url = base_url.rstrip("/")
+        self.session = session or getXeroSession()
+        self.limiter = limiter or getRateLimiter(tenant_id)
+
+    @classmethod
+    def forClient(cls, client_name, **kwargs):
+        """Authenticate the named client and return a ready XeroClient."""
+        from xeroAuthHelper import getXeroAccessToken, getXeroTenantId
+
+        access_token = getXeroAccessToken(client_name)
+        tenant_id = getXeroTenantId(client_name, access_token)
+        if not tenant_id:
+            raise Exception(f"Could not retrieve Xero tenant ID for {client_name}.")
+        return cls(access_token, tenant_id, **kwargs)
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def headers(self, extra=None):
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Xero-tenant-id": self.tenant_id,
+        }
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def request(self, method, path, params=None, json=None, headers=None, timeout=XERO_TIMEOUT,
+                max_retries=XERO_MAX_RETRIES, **kwargs):
+        for attempt in range(max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.request(
+                    method,
+                    self.url(path),
+                    headers=self.headers(headers),
+                    params=params,
+                    json=json,
+                    timeout=timeout,
+                    **kwargs,
+                )
+            finally:
+                self.limiter.release()
+
+            retry_after = self.limiter.update(response.status_code, response.headers)
+            if response.status_code != 429 or attempt == max_retries:
+                return response
+            print(f"⚠️ Rate limit hit on {path}. Waiting {retry_after:.0f}s before retry ({attempt + 1}/{max_retries})...")
+        return response
+
+    def get(self, path, params=None, **kwargs):
+        return self.request("GET", path, params=params, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def put(self, path, json=None, **kwargs):
+        return self.request("PUT", path, json=json, **kwargs)
+
+    def getPage(self, path, params, page):
+        """Fetch one page of a paged endpoint and return the parsed JSON body."""
+        response = self.get(path, params={**params, "page": page})
+        if response.status_code != 200:
+            raise Exception(f"Fetch failed for {path} (page {page}): {response.status_code} - {response.text}")
+        return response.json()
+
+    def iterPages(self, path, params=None, key=None):
+        """
+        Yield the records of a paged endpoint one at a time.
+
+        Pages are requested lazily, so the next page is only fetched once the caller
+        has consumed the previous one. Stops at pagination.pageCount or a short page.
+        """
+        key = key or path.split("/")[-1]
+        params = {"pageSize": XERO_PAGE_SIZE, **(params or {})}
+        page = params.pop("page", 1)
+        page_size = int(params["pageSize"])
+
+        while True:
+            body = self.getPage(path, params, page)
+            batch = body.get(key, [])
+            yield from batch
+            page_count = (body.get("pagination") or {}).get("pageCount")
+            if len(batch) < page_size or (page_count and page >= page_count):
+                return
+            page += 1
+
+    def getAllPages(self, path, params=None, key=None, max_workers=XERO_CONCURRENT_LIMIT):
+        """
+        Fetch every page of a paged endpoint and return the records in page order.
+
+        The first page is fetched on its own to read pagination.pageCount; the rest are
+        then fetched concurrently (the tenant limiter still caps calls in flight). If
+        the endpoint does not return pagination metadata, the remaining pages are
+        walked one at a time with iterPages.
+        """
+        key = key or path.split("/")[-1]
+        params = {"pageSize": XERO_PAGE_SIZE, **(params or {})}
+        first_page = params.pop("page", 1)
+        page_size = int(params["pageSize"])
+
+        body = self.getPage(path, params, first_page)
+        results = list(body.get(key, []))
+        page_count = (body.get("pagination") or {}).get("pageCount")
+
+        if page_count:
+            pages = range(first_page + 1, page_count + 1)
+            if pages:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for page_body in executor.map(lambda page: self.getPage(path, params, page), pages):
+                        results.extend(page_body.get(key, []))
+        elif len(results) >= page_size:
+            results.extend(self.iterPages(path, {**params, "page": first_page + 1}, key))
+        return results
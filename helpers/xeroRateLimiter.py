@@ -0,0 +1,100 @@
+import threading
+import time
+
+# Xero's published per-tenant limits
+XERO_MINUTE_LIMIT = 60
+XERO_DAY_LIMIT = 5000
+XERO_CONCURRENT_LIMIT = 5
+DEFAULT_RETRY_AFTER = 60
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Full capacity is available as a burst, then refills at capacity/period."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait before it is valid."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def sync(self, remaining):
+        """Clamp the bucket to the remaining budget Xero reports."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class XeroRateLimiter:
+    """
+    Per-tenant limiter for the minute/day call budgets and the concurrent-call cap.
+
+    Calls go out immediately while the buckets have tokens. After each response the
+    buckets are re-synced from X-MinLimit-Remaining / X-DayLimit-Remaining, and a 429
+    blocks every caller for the tenant until Retry-After has passed.
+    """
+
+    def __init__(self, minute_limit=XERO_MINUTE_LIMIT, day_limit=XERO_DAY_LIMIT,
+                 concurrent_limit=XERO_CONCURRENT_LIMIT):
+        self.minute = TokenBucket(minute_limit, 60)
+        self.day = TokenBucket(day_limit, 86400)
+        self.concurrency = threading.BoundedSemaphore(concurrent_limit)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a call from both budgets and return how long to wait before making it (no concurrency slot)."""
+        return max(self.minute.reserve(), self.day.reserve(), self.blocked_until - time.monotonic())
+
+    def acquire(self):
+        self.concurrency.acquire()
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self):
+        self.concurrency.release()
+
+    def update(self, status_code, headers):
+        """Record the limits reported on a response. Returns the Retry-After seconds for a 429, else 0."""
+        minute_remaining = headers.get("X-MinLimit-Remaining")
+        if minute_remaining is not None:
+            self.minute.sync(int(minute_remaining))
+        day_remaining = headers.get("X-DayLimit-Remaining")
+        if day_remaining is not None:
+            self.day.sync(int(day_remaining))
+
+        if status_code != 429:
+            return 0
+
+        try:
+            retry_after = float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+        except ValueError:
+            retry_after = DEFAULT_RETRY_AFTER
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        return retry_after
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def getRateLimiter(tenant_id):
+    """Return the shared limiter for a tenant, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(tenant_id)
+        if limiter is None:
+            limiter = _limiters[tenant_id] = XeroRateLimiter()
+        return limiter
@@ -0,0 +1,105 @@
+import os
+import gzip
+import json
+import hashlib
+from datetime import datetime, timezone
+
+from helpers.xeroClient import XERO_PAGE_SIZE
+
+XERO_RESPONSE_CACHE_DIR = os.getenv(
+    "XERO_RESPONSE_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".xeroCache")),
+)
+
+
+class XeroResponseCache:
+    """
+    Local content-addressed cache of raw Xero records for one client.
+
+    Each page is stored once as gzipped JSON lines under objects/<sha256>.jsonl.gz.
+    A small manifest per request (endpoint + params) lists its pages in order, and
+    <endpoint>/latest.json points at the most recent fetch so a replay can rebuild
+    the last run without calling the API. storeNote()/loadNote() keep small run details
+    (e.g. the watermark a run filtered with) next to the responses it fetched.
+    """
+
+    def __init__(self, namespace, root=XERO_RESPONSE_CACHE_DIR):
+        self.namespace = namespace
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+
+    def _endpointDir(self, endpoint):
+        return os.path.join(self.root, self.namespace, endpoint.replace("/", "_"))
+
+    @staticmethod
+    def requestKey(endpoint, params):
+        request = {k: v for k, v in (params or {}).items() if k != "page"}
+        encoded = json.dumps({"endpoint": endpoint, "params": request}, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+    def _writeObject(self, records):
+        body = "".join(json.dumps(r, sort_keys=True, default=str) + "\n" for r in records).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        path = os.path.join(self.objects_dir, f"{digest}.jsonl.gz")
+        if not os.path.exists(path):
+            os.makedirs(self.objects_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(body, mtime=0))
+            os.replace(tmp_path, path)
+        return digest
+
+    def _readObject(self, digest):
+        with gzip.open(os.path.join(self.objects_dir, f"{digest}.jsonl.gz"), "rt") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def store(self, endpoint, params, records):
+        """Record the result of a fetch, split back into Xero-sized pages."""
+        page_size = int((params or {}).get("pageSize", XERO_PAGE_SIZE))
+        pages = [self._writeObject(records[i:i + page_size]) for i in range(0, len(records), page_size)]
+        manifest = {
+            "endpoint": endpoint,
+            "params": {k: v for k, v in (params or {}).items() if k != "page"},
+            "pages": pages,
+            "records": len(records),
+            "fetchedAt": datetime.now(timezone.utc).isoformat(),
+        }
+
+        endpoint_dir = self._endpointDir(endpoint)
+        os.makedirs(endpoint_dir, exist_ok=True)
+        for name in (f"{self.requestKey(endpoint, params)}.json", "latest.json"):
+            with open(os.path.join(endpoint_dir, name), "w") as f:
+                json.dump(manifest, f, indent=2, default=str)
+        return records
+
+    def load(self, endpoint, params=None):
+        """
+        Return cached records for the request, or for the latest fetch of the endpoint
+        when params is None. Raises FileNotFoundError if nothing has been cached.
+        """
+        endpoint_dir = self._endpointDir(endpoint)
+        name = f"{self.requestKey(endpoint, params)}.json" if params is not None else "latest.json"
+        manifest_path = os.path.join(endpoint_dir, name)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No cached {endpoint} response for {self.namespace} in {endpoint_dir}")
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        records = []
+        for digest in manifest["pages"]:
+            records.extend(self._readObject(digest))
+        print(f"♻️ Replaying {len(records)} {endpoint} records for {self.namespace} (fetched {manifest['fetchedAt']})")
+        return records
+
+    def storeNote(self, name, data):
+        os.makedirs(os.path.join(self.root, self.namespace), exist_ok=True)
+        with open(os.path.join(self.root, self.namespace, f"{name}.json"), "w") as f:
+            json.dump({**data, "recordedAt": datetime.now(timezone.utc).isoformat()}, f, indent=2, default=str)
+
+    def loadNote(self, name):
+        """The note stored under name, or None if the last run didn't record one."""
+        path = os.path.join(self.root, self.namespace, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
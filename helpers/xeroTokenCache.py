@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import base64
+import threading
+
+# Xero access tokens live for 30 minutes; hand them out until shortly before that.
+DEFAULT_TOKEN_LIFETIME = 1800
+TOKEN_EXPIRY_MARGIN = 120
+
+# Optional encrypted on-disk store for local runs. Set XERO_TOKEN_CACHE_KEY to a
+# Fernet key (Fernet.generate_key()) to enable it; requires the cryptography package.
+TOKEN_CACHE_FILE = os.getenv("XERO_TOKEN_CACHE_FILE", os.path.expanduser("~/.xero_token_cache"))
+TOKEN_CACHE_KEY = os.getenv("XERO_TOKEN_CACHE_KEY")
+
+_tokens = {}
+_disk_loaded = False
+_cache_lock = threading.Lock()
+_client_locks = {}
+
+
+def clientLock(client):
+    """Per-client lock so concurrent callers don't race to spend the same refresh token."""
+    with _cache_lock:
+        return _client_locks.setdefault(client.upper(), threading.Lock())
+
+
+def tokenExpiry(access_token):
+    """Read the exp claim from the access token JWT, falling back to the standard 30 minutes."""
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, ValueError, TypeError):
+        return time.time() + DEFAULT_TOKEN_LIFETIME
+
+
+def _fernet():
+    if not TOKEN_CACHE_KEY:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        print("⚠️ XERO_TOKEN_CACHE_KEY is set but cryptography is not installed; on-disk token cache disabled.")
+        return None
+    return Fernet(TOKEN_CACHE_KEY)
+
+
+def _loadDiskCache():
+    global _disk_loaded
+    if _disk_loaded:
+        return
+    _disk_loaded = True
+    fernet = _fernet()
+    if not fernet or not os.path.exists(TOKEN_CACHE_FILE):
+        return
+    try:
+        with open(TOKEN_CACHE_FILE, "rb") as f:
+            stored = json.loads(fernet.decrypt(f.read()))
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable token cache {TOKEN_CACHE_FILE}: {e}")
+        return
+    for client, entry in stored.items():
+        _tokens.setdefault(client, entry)
+
+
+def _saveDiskCache():
+    fernet = _fernet()
+    if not fernet:
+        return
+    fd = os.open(TOKEN_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(fernet.encrypt(json.dumps(_tokens).encode()))
+
+
+def getCachedEntry(client):
+    """Return the cached entry for a client while its access token is still fresh, else None."""
+    with _cache_lock:
+        _loadDiskCache()
+        entry = _tokens.get(client.upper())
+        if entry and entry.get("access_token") and entry["expires_at"] - TOKEN_EXPIRY_MARGIN > time.time():
+            return entry
+        return None
+
+
+def getCachedToken(client):
+    entry = getCachedEntry(client)
+    return entry["access_token"] if entry else None
+
+
+def storeToken(client, access_token):
+    """Cache a freshly issued access token for the client (and persist it if the disk store is on)."""
+    with _cache_lock:
+        entry = _tokens.setdefault(client.upper(), {})
+        entry["access_token"] = access_token
+        entry["expires_at"] = tokenExpiry(access_token)
+        _saveDiskCache()
+
+
+def getCachedTenants(client):
+    """Return the client's cached /connections list, or None if it hasn't been resolved yet.
+
+    Tenant connections don't change when the token is refreshed, so they outlive it.
+    """
+    with _cache_lock:
+        _loadDiskCache()
+        return _tokens.get(client.upper(), {}).get("tenants")
+
+
+def storeTenants(client, tenants):
+    with _cache_lock:
+        _tokens.setdefault(client.upper(), {})["tenants"] = tenants
+        _saveDiskCache()
+
+
+def clearToken(client=None):
+    """Drop one client's cached token, or every token when client is None."""
+    with _cache_lock:
+        if client is None:
+            _tokens.clear()
+        else:
+            _tokens.pop(client.upper(), None)
+        _saveDiskCache()
@@ -97,9 +97,9 @@ def XeroRefreshToken(client_name, refresh_token):
     return json_response.get("access_token"), json_response.get("refresh_token")
 
 
-def XeroTenants(access_token):
+def XeroConnections(access_token):
     """
-    Fetches the Xero tenant ID associated with the given access token.
+    Fetches the Xero tenants (organisations) the given access token is connected to.
     """
     connections_url = "https://api.xero.com/connections"
     response = requests.get(
@@ -114,5 +114,31 @@ def XeroTenants(access_token):
         print(f"❌ Error fetching tenants: {response.status_code} - {response.text}")
         return None
 
-    json_response = response.json()
-    return json_response[0]["tenantId"] if json_response else None
+    return [
+        {"tenantId": c["tenantId"], "tenantName": c.get("tenantName"), "tenantType": c.get("tenantType")}
+        for c in response.json()
+    ]
+
+
+def selectTenant(connections, tenant_name=None):
+    """
+    Picks the tenant ID by name (case-insensitive), or the first connection if no name is given.
+    """
+    if not connections:
+        return None
+    if not tenant_name:
+        return connections[0]["tenantId"]
+
+    for connection in connections:
+        if (connection.get("tenantName") or "").strip().lower() == tenant_name.strip().lower():
+            return connection["tenantId"]
+
+    names = ", ".join(str(c.get("tenantName")) for c in connections)
+    raise ValueError(f"❌ ERROR: No Xero tenant named '{tenant_name}'. Connected tenants: {names}")
+
+
+def XeroTenants(access_token, tenant_name=None):
+    """
+    Fetches the Xero tenant ID associated with the given access token.
+    """
+    return selectTenant(XeroConnections(access_token), tenant_name)
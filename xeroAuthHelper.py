@@ -1,7 +1,8 @@
 import os
 import requests
 import json
-from xeroAuth import XeroFirstAuth, XeroRefreshToken
+from xeroAuth import XeroFirstAuth, XeroRefreshToken, XeroConnections, selectTenant
+from helpers.xeroTokenCache import clientLock, getCachedToken, storeToken, getCachedTenants, storeTenants
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -47,9 +48,46 @@ def update_github_variable(var_name, new_value):
         print(f"❌ ERROR: Failed to update GitHub variable {var_name}: {response.text}")
 
 
-def getXeroAccessToken(client):
+def getXeroAccessToken(client, use_cache=True):
     """
     Retrieves or refreshes the Xero access token for the given client.
+
+    Tokens are cached per client until shortly before they expire, so repeat calls
+    in the same process skip the GitHub and Xero identity round trips.
+    """
+    with clientLock(client):
+        if use_cache:
+            access_token = getCachedToken(client)
+            if access_token:
+                return access_token
+
+        access_token = refreshXeroAccessToken(client)
+        storeToken(client, access_token)
+        return access_token
+
+
+def getXeroTenantId(client, access_token=None):
+    """
+    Resolves the Xero tenant ID for the given client.
+
+    The /connections lookup runs once per client and is cached alongside the token.
+    Set {CLIENT}_TENANT_NAME to pick the organisation by name; otherwise the first
+    connection is used.
+    """
+    connections = getCachedTenants(client)
+    if connections is None:
+        connections = XeroConnections(access_token or getXeroAccessToken(client))
+        if not connections:
+            return None
+        storeTenants(client, connections)
+
+    return selectTenant(connections, os.getenv(f"{client.upper()}_TENANT_NAME"))
+
+
+def refreshXeroAccessToken(client):
+    """
+    Exchanges the client's stored refresh token for a new access token, rotating the
+    refresh token held in GitHub variables.
     """
     client_id = os.getenv(f"{client.upper()}_CLIENT_ID")  
     client_secret = os.getenv(f"{client.upper()}_CLIENT_SECRET")